@@ -1,6 +1,13 @@
-import yfinance as yf
-import time
-from datetime import datetime, timedelta
+import numpy as np
+from datetime import datetime
+
+from alert_state import AlertStateStore, INITIAL_DROP
+from extremes_index import ExtremesIndex
+from job_scheduler import SKIP, Scheduler, run_forever
+from metrics import MetricsServer, STAGE_SECONDS
+from ohlc_cache import OHLCCache
+from quote_snapshot import SnapshotQuoteSource, snapshot_available
+from quote_sources import ConcurrentQuotePoller, YFinanceQuoteSource, CURRENT_PRICE, FIFTY_TWO_WEEK_HIGH
 
 # List of NSE shares and their Yahoo Finance tickers
 # Note: Ensure these tickers are accurate. You can verify on Yahoo Finance.
@@ -22,14 +29,23 @@ INITIAL_DROP_PERCENTAGE = 20
 SUBSEQUENT_DROP_PERCENTAGE = 1
 CHECK_INTERVAL_SECONDS = 60  # Check every 1 minute for alerts
 SUMMARY_INTERVAL_SECONDS = 300 # Print summary every 5 minutes
-
-# Dictionary to store monitoring status for each stock
-# { 'TICKER': {'52_week_high': None, 'current_price': None, 'initial_drop_price': None, 'last_notified_price': None, 'initial_drop_alerted': False} }
-monitoring_status = {}
-last_summary_report_time = datetime.now()
+MAX_FETCH_WORKERS = 8  # Bounded worker pool for quote requests
+REQUESTS_PER_SECOND = 2  # Token-bucket rate limit shared by all workers
+METRICS_PORT = 9108  # Local /metrics (Prometheus) and /metrics.json endpoint; None disables it
+SNAPSHOT_MAX_AGE_SECONDS = 180  # Quotes older than this in the shared snapshot count as missing
+
+# Columnar monitoring status for every stock, indexed by ticker id:
+# 52-week high, current price, initial drop price, last notified price and alerted flags
+alert_store = AlertStateStore(NSE_STOCKS.values(), INITIAL_DROP_PERCENTAGE, SUBSEQUENT_DROP_PERCENTAGE)
+# Rolling 52-week high/low per stock, built from cached daily bars and updated with every
+# live price, so a new high is picked up immediately. Shares ticker ids with alert_store.
+extremes = ExtremesIndex(NSE_STOCKS.values())
+TICKER_NAMES = {ticker: stock_name for stock_name, ticker in NSE_STOCKS.items()}
 
 def get_stock_data(ticker_symbol):
     """Fetches current price and 52-week high for a given ticker."""
+    import yfinance as yf  # the polling loop goes through quote_sources instead
+
     try:
         stock = yf.Ticker(ticker_symbol)
         info = stock.info
@@ -46,60 +62,71 @@ def get_stock_data(ticker_symbol):
         print(f"Error fetching data for {ticker_symbol}: {e}")
         return None, None
 
-def check_and_notify(stock_name, ticker, current_price, fifty_two_week_high):
+def check_and_notify(stock_name, ticker, current_price, fifty_two_week_high=None):
     """
-    Checks for price drops and sends notifications.
+    Checks for price drops and sends notifications. The 52-week high comes from the
+    extremes index unless one is passed in.
     """
-    global monitoring_status
-
-    if ticker not in monitoring_status:
+    ticker_id = alert_store.add_ticker(ticker)
+    extremes.add_ticker(ticker)
+    TICKER_NAMES.setdefault(ticker, stock_name)
+    if fifty_two_week_high is None:
+        fifty_two_week_high = float(update_highs([ticker_id], [current_price])[0])
+    if not alert_store.monitored[ticker_id]:
         # This block might not be strictly needed if initial collection handles it
         # but serves as a fallback or for dynamically added stocks.
-        monitoring_status[ticker] = {
-            '52_week_high': fifty_two_week_high,
-            'current_price': current_price, # Store current price for summary
-            'initial_drop_price': None,
-            'last_notified_price': None,
-            'initial_drop_alerted': False
-        }
-    else:
-        # Update current price for subsequent checks and summary
-        monitoring_status[ticker]['current_price'] = current_price
-
-    status = monitoring_status[ticker]
-
-    # Calculate initial 20% drop threshold
-    initial_drop_threshold = fifty_two_week_high * (1 - INITIAL_DROP_PERCENTAGE / 100)
-
-    # Check for initial 20% drop
-    if not status['initial_drop_alerted'] and current_price <= initial_drop_threshold:
-        print(f"\n--- ALERT! {stock_name} ({ticker}) ---")
-        print(f"Current Price: ₹{current_price:.2f}")
-        print(f"52-Week High: ₹{fifty_two_week_high:.2f}")
-        print(f"Price is {INITIAL_DROP_PERCENTAGE:.0f}% down from its 52-week high (₹{initial_drop_threshold:.2f}).")
-        status['initial_drop_alerted'] = True
-        status['initial_drop_price'] = current_price
-        status['last_notified_price'] = current_price
-        print("Monitoring for further 1% drops...")
-        return
-
-    # If initial drop has been alerted, check for subsequent 1% drops
-    if status['initial_drop_alerted'] and current_price < status['last_notified_price']:
-        # Calculate the next 1% drop threshold from the initial drop price
-        next_drop_threshold = status['last_notified_price'] * (1 - SUBSEQUENT_DROP_PERCENTAGE / 100)
-
-        if current_price <= next_drop_threshold:
-            percentage_fall_from_initial = ((status['initial_drop_price'] - current_price) / status['initial_drop_price']) * 100
+        alert_store.initialize([ticker_id], [fifty_two_week_high], [current_price])
+
+    alerts = alert_store.evaluate([ticker_id], [current_price], highs=[fifty_two_week_high])
+    notify_alerts(alerts, highs=[fifty_two_week_high])
+
+
+def update_highs(ids, prices):
+    """
+    Folds a tick of prices into the extremes index and copies the resulting 52-week
+    highs into alert_store. Ids without any daily bars or price keep their stored high.
+
+    Returns:
+    ndarray: The 52-week highs of the ids.
+    """
+    ids = np.asarray(ids, dtype=np.intp)
+    extremes.observe(ids, prices)
+    highs = extremes.high(ids)
+    known = ~np.isnan(highs)
+    alert_store.high_52_week[ids[known]] = highs[known]
+    return alert_store.high_52_week[ids]
+
+
+def check_and_notify_all(ids, prices):
+    """Runs the drop rules for a whole tick of prices in one vectorized pass."""
+    update_highs(ids, prices)
+    notify_alerts(alert_store.evaluate(ids, prices))
+
+
+def notify_alerts(alerts, highs=None):
+    """Prints the alerts returned by AlertStateStore.evaluate()."""
+    if highs is None:
+        highs = alert_store.high_52_week[alerts['ids']]
+    for i, ticker_id in enumerate(alerts['ids']):
+        ticker = alert_store.tickers[ticker_id]
+        stock_name = TICKER_NAMES.get(ticker, ticker)
+        current_price = alerts['price'][i]
+
+        if alerts['kind'][i] == INITIAL_DROP:
+            # Initial 20% drop from the 52-week high
+            print(f"\n--- ALERT! {stock_name} ({ticker}) ---")
+            print(f"Current Price: ₹{current_price:.2f}")
+            print(f"52-Week High: ₹{highs[i]:.2f}")
+            print(f"Price is {INITIAL_DROP_PERCENTAGE:.0f}% down from its 52-week high (₹{alerts['initial_threshold'][i]:.2f}).")
+            print("Monitoring for further 1% drops...")
+        else:
+            # Subsequent 1% drop from the last notified price
+            initial_drop_price = alerts['initial_drop_price'][i]
+            percentage_fall_from_initial = ((initial_drop_price - current_price) / initial_drop_price) * 100
             print(f"\n--- UPDATE! {stock_name} ({ticker}) ---")
             print(f"Current Price: ₹{current_price:.2f}")
-            print(f"Price has fallen another {SUBSEQUENT_DROP_PERCENTAGE:.0f}% from ₹{status['last_notified_price']:.2f}.")
+            print(f"Price has fallen another {SUBSEQUENT_DROP_PERCENTAGE:.0f}% from ₹{alerts['previous_notified'][i]:.2f}.")
             print(f"Total fall from 20% down level: {percentage_fall_from_initial:.2f}%")
-            status['last_notified_price'] = current_price
-            return
-    elif status['initial_drop_alerted'] and current_price > status['last_notified_price'] * (1 + SUBSEQUENT_DROP_PERCENTAGE / 100):
-        # If the price has recovered significantly, reset the last notified price
-        # This prevents repeated notifications for small fluctuations around the last notified price
-        status['last_notified_price'] = current_price
 
 
 def print_summary_status():
@@ -107,11 +134,12 @@ def print_summary_status():
     print(f"\n--- Summary Report ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')}) ---")
     print(f"{'Stock Name':<30} | {'Current Price':>15} | {'52-Week High':>15} | {'% Down from High':>18}")
     print("-" * 85)
-    for stock_name, ticker in NSE_STOCKS.items():
-        if ticker in monitoring_status:
-            status = monitoring_status[ticker]
+    highs = extremes.high(extremes.ids(NSE_STOCKS.values()))
+    for (stock_name, ticker), high in zip(NSE_STOCKS.items(), highs):
+        status = alert_store.status(ticker)
+        if status is not None:
             current_price = status.get('current_price')
-            fifty_two_week_high = status.get('52_week_high')
+            fifty_two_week_high = float(high) if high == high else status.get('52_week_high')
 
             if current_price is not None and fifty_two_week_high is not None and fifty_two_week_high > 0:
                 percentage_down = ((fifty_two_week_high - current_price) / fifty_two_week_high) * 100
@@ -123,51 +151,75 @@ def print_summary_status():
     print("-" * 85)
 
 def main():
-    global last_summary_report_time
     print("Starting stock price tracker for NSE shares...")
+    if METRICS_PORT is not None:
+        try:
+            metrics_server = MetricsServer(port=METRICS_PORT).start()
+            print(f"Metrics available at {metrics_server.url}/metrics and {metrics_server.url}/metrics.json")
+        except OSError as e:
+            print(f"Metrics endpoint disabled: {e}")
     print("Initial 52-week high data collection in progress...")
 
-    # Initial data collection to populate 52-week highs and current prices
+    # Read from the shared quote snapshot when quote_snapshot.py is running, so this
+    # script makes no network calls of its own; otherwise poll Yahoo Finance directly.
+    if snapshot_available():
+        print("Reading quotes from the shared quote snapshot.")
+        source = SnapshotQuoteSource(max_age=SNAPSHOT_MAX_AGE_SECONDS)
+    else:
+        source = YFinanceQuoteSource()
+    poller = ConcurrentQuotePoller(source, max_workers=MAX_FETCH_WORKERS,
+                                   requests_per_second=REQUESTS_PER_SECOND)
+
+    # 52-week highs come from the cached daily bars; only stocks without any bars fall back
+    # to the quote API's fiftyTwoWeekHigh, which then seeds the index for today
+    missing = extremes.load_cache(OHLCCache(), NSE_STOCKS.values())
+    if missing:
+        fallback = poller.fetch(missing, (FIFTY_TWO_WEEK_HIGH,))
+        seeded = [ticker for ticker in missing if ticker in fallback]
+        extremes.update(extremes.ids(seeded), None, [fallback[t][FIFTY_TWO_WEEK_HIGH] for t in seeded])
+
+    # Initial data collection to populate current prices
+    quotes = poller.fetch(NSE_STOCKS.values(), (CURRENT_PRICE,))
     for stock_name, ticker in NSE_STOCKS.items():
-        current_price, high_52_week = get_stock_data(ticker)
-        if current_price is not None and high_52_week is not None:
-            monitoring_status[ticker] = {
-                '52_week_high': high_52_week,
-                'current_price': current_price, # Store current price here
-                'initial_drop_price': None,
-                'last_notified_price': None,
-                'initial_drop_alerted': False
-            }
+        if ticker in quotes:
+            ticker_id = alert_store.ticker_ids[ticker]
+            current_price = quotes[ticker][CURRENT_PRICE]
+            alert_store.initialize([ticker_id], [np.nan], [current_price])
+            high_52_week = update_highs([ticker_id], [current_price])[0]
             print(f"Initialized {stock_name} ({ticker}): 52-Week High = ₹{high_52_week:.2f}, Current Price = ₹{current_price:.2f}")
             # Check for initial drop immediately after fetching 52-week high
             # In case the stock is already below 20% of its 52-week high at startup
             check_and_notify(stock_name, ticker, current_price, high_52_week)
-        time.sleep(1) # Be mindful of API rate limits
 
     print(f"\nMonitoring started. Checking every {CHECK_INTERVAL_SECONDS} seconds for alerts.")
     print(f"Summary report will be printed every {SUMMARY_INTERVAL_SECONDS / 60:.0f} minutes.")
 
-    while True:
-        current_loop_start_time = datetime.now()
-        for stock_name, ticker in NSE_STOCKS.items():
-            current_price, _ = get_stock_data(ticker) # We only need current price for ongoing checks, 52-week high is in monitoring_status
-            if current_price is not None and ticker in monitoring_status:
-                # Update current price in monitoring status before checking and notifying
-                monitoring_status[ticker]['current_price'] = current_price
-                check_and_notify(stock_name, ticker, current_price, monitoring_status[ticker]['52_week_high'])
-            time.sleep(1) # Small delay between checking each stock to avoid hitting rate limits
-
-        # Check if it's time for the summary report
-        if datetime.now() - last_summary_report_time >= timedelta(seconds=SUMMARY_INTERVAL_SECONDS):
+    # Stage timers bound once; the scheduler itself records each job's lag and cycle time
+    stage_timers = {stage: STAGE_SECONDS.labels(loop='price_informer', stage=stage)
+                    for stage in ('fetch', 'evaluate', 'summary')}
+
+    def check_cycle():
+        # We only need current price for ongoing checks, 52-week highs are in the extremes index.
+        # The poller batches and rate-limits the requests, so no per-ticker sleep is needed.
+        with stage_timers['fetch'].time():
+            quotes = poller.fetch(NSE_STOCKS.values(), (CURRENT_PRICE,))
+        with stage_timers['evaluate'].time():
+            # Missing quotes become NaN and are skipped by the vectorized check
+            prices = np.array([quotes.get(ticker, {}).get(CURRENT_PRICE, np.nan) for ticker in alert_store.tickers], dtype=float)
+            check_and_notify_all(np.arange(alert_store.size), prices)
+        print(f"\n--- Completed 1-minute check cycle at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ---")
+
+    def summary():
+        with stage_timers['summary'].time():
             print_summary_status()
-            last_summary_report_time = datetime.now() # Reset timer for the next summary
 
-        print(f"\n--- Completed 1-minute check cycle at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ---")
-        # Ensure the loop waits for the remaining time to complete the CHECK_INTERVAL_SECONDS
-        time_elapsed = (datetime.now() - current_loop_start_time).total_seconds()
-        sleep_time = CHECK_INTERVAL_SECONDS - time_elapsed
-        if sleep_time > 0:
-            time.sleep(sleep_time)
+    # The first check runs at startup, like the original loop, then on every minute boundary
+    # without drifting; a check that overruns skips the next tick instead of queueing up.
+    # One worker keeps checks and summaries from overlapping.
+    scheduler = Scheduler(max_workers=1)
+    scheduler.every(CHECK_INTERVAL_SECONDS, check_cycle, name='price_informer', policy=SKIP, run_immediately=True)
+    scheduler.every(SUMMARY_INTERVAL_SECONDS, summary, name='price_informer_summary', policy=SKIP)
+    run_forever(scheduler)
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,12 @@
 # Run the calculator when the script is executed
 # prompt: make adjustments in the above code and the let the user enter the historical volatility instead of fetching the information from the yahoo finance database
 
-import yfinance as yf
 import numpy as np
-from scipy.stats import norm
+from scipy.special import ndtr  # the standard normal CDF behind norm.cdf, without importing scipy.stats
 import datetime
+import math
+
+SNAPSHOT_MAX_AGE_SECONDS = 180  # Older snapshot quotes are refetched from Yahoo Finance
 
 # --- Black-Scholes Model Implementation ---
 def black_scholes(S, K, T, r, sigma, option_type, q=0):
@@ -30,9 +32,9 @@ def black_scholes(S, K, T, r, sigma, option_type, q=0):
     d2 = d1 - sigma * np.sqrt(T)
 
     if option_type == 'call':
-        price = S * np.exp(-q * T) * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2)
+        price = S * np.exp(-q * T) * ndtr(d1) - K * np.exp(-r * T) * ndtr(d2)
     elif option_type == 'put':
-        price = K * np.exp(-r * T) * norm.cdf(-d2) - S * np.exp(-q * T) * norm.cdf(-d1)
+        price = K * np.exp(-r * T) * ndtr(-d2) - S * np.exp(-q * T) * ndtr(-d1)
     else:
         raise ValueError("option_type must be 'call' or 'put'")
 
@@ -43,7 +45,15 @@ def get_stock_data(ticker_symbol):
     """
     Fetches live stock data for a given ticker symbol.
     """
+    from quote_snapshot import read_quote  # imported here so the pricing functions load without it
+
+    # Use the shared quote snapshot when quote_snapshot.py is polling this ticker
+    quote = read_quote(ticker_symbol, max_age=SNAPSHOT_MAX_AGE_SECONDS)
+    if quote is not None and not math.isnan(quote['last']) and not math.isnan(quote['dividend_yield']):
+        return quote['last'], quote['dividend_yield']
     try:
+        import yfinance as yf  # imported here so pricing with a known spot never loads it
+
         ticker = yf.Ticker(ticker_symbol)
         info = ticker.info
         current_price = info.get('currentPrice')
@@ -162,6 +172,21 @@ def run_black_scholes_calculator():
     )
     print(f"Put Option Price: ${put_price:.2f}")
 
+    # Listed US equity options are American, so also price them with early exercise
+    from lattice_pricer import american_option_price
+
+    for option_type in ('call', 'put'):
+        american_price = american_option_price(
+            S=current_price,
+            K=strike_price,
+            T=time_to_expiration_years,
+            r=risk_free_rate,
+            sigma=volatility,
+            option_type=option_type,
+            q=dividend_yield
+        )
+        print(f"American {option_type.capitalize()} Price (binomial lattice): ${american_price:.2f}")
+
 # Run the calculator when the script is executed
 if __name__ == "__main__":
     run_black_scholes_calculator()
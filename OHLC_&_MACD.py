@@ -1,9 +1,26 @@
-import yfinance as yf
-import pandas as pd
+from ohlc_cache import OHLCCache
+
+# Local cache shared by every OHLCHistory call: only missing date ranges are downloaded.
+# Created on first use, so importing this script touches neither the disk nor the network.
+ohlc_cache = None
+
+
+def _ohlc_cache():
+    global ohlc_cache
+    if ohlc_cache is None:
+        ohlc_cache = OHLCCache()
+    return ohlc_cache
+
 
 # Function to get OHLC data using yfinance
-def OHLCHistory(symbol, interval, fdate, todate):
+def OHLCHistory(symbol, interval, fdate, todate, use_cache=True):
     try:
+        if use_cache:
+            # Served from the on-disk cache, which downloads any missing ranges first
+            return _ohlc_cache().read(symbol, interval, fdate, todate)
+
+        import yfinance as yf
+
         # Fetch the historical data from Yahoo Finance
         data = yf.download(tickers=symbol, start=fdate, end=todate, interval=interval)
         data = data.rename(columns={
@@ -18,23 +35,12 @@ def OHLCHistory(symbol, interval, fdate, todate):
         print("API call failed:", e)
         return None
 
-# Example usage of the OHLCHistory function
-symbol = 'RELIANCE.NS'  # example symbol (ensure it matches Yahoo Finance ticker format)
-interval = '1d'  # interval could be '1m', '2m', '5m', '15m', '1d', '1wk', etc.
-fdate = '2023-01-01'  # from date
-todate = '2023-07-01'  # to date
-
-# Get historical data
-historical_data = OHLCHistory(symbol, interval, fdate, todate)
-if historical_data is not None:
-    print(historical_data)
-__________________________________________________________________________________________________________________________________________________________________________________________________
-import yfinance as yf
-import pandas as pd
 
 # Function to get option chain data for a specific strike price
 def get_option_chain(symbol, expiry, strike_price):
     try:
+        import yfinance as yf
+
         # Fetch the Ticker object
         ticker = yf.Ticker(symbol)
 
@@ -58,15 +64,28 @@ def get_option_chain(symbol, expiry, strike_price):
         print("API call failed:", e)
         return None, None
 
-# Example usage of the get_option_chain function
-symbol = 'ADANIENT.NS'  # example symbol
-expiry = '2025-07-31'  # example expiry date (YYYY-MM-DD)
-strike_price = 2600  # example strike price
-
-# Get the option chain data
-calls, puts = get_option_chain(symbol, expiry, strike_price)
-if calls is not None and puts is not None:
-    print("Calls at strike price", strike_price)
-    print(calls.to_string(index=False))
-    print("\nPuts at strike price", strike_price)
-    print(puts.to_string(index=False))
+
+if __name__ == "__main__":
+    # Example usage of the OHLCHistory function
+    symbol = 'RELIANCE.NS'  # example symbol (ensure it matches Yahoo Finance ticker format)
+    interval = '1d'  # interval could be '1m', '2m', '5m', '15m', '1d', '1wk', etc.
+    fdate = '2023-01-01'  # from date
+    todate = '2023-07-01'  # to date
+
+    # Get historical data
+    historical_data = OHLCHistory(symbol, interval, fdate, todate)
+    if historical_data is not None:
+        print(historical_data)
+
+    # Example usage of the get_option_chain function
+    symbol = 'ADANIENT.NS'  # example symbol
+    expiry = '2025-07-31'  # example expiry date (YYYY-MM-DD)
+    strike_price = 2600  # example strike price
+
+    # Get the option chain data
+    calls, puts = get_option_chain(symbol, expiry, strike_price)
+    if calls is not None and puts is not None:
+        print("Calls at strike price", strike_price)
+        print(calls.to_string(index=False))
+        print("\nPuts at strike price", strike_price)
+        print(puts.to_string(index=False))
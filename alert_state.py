@@ -0,0 +1,140 @@
+# Columnar alert state for the 20% down price informer.
+# Each ticker gets an integer id and its state lives in NumPy arrays, so the whole
+# market can be checked against the drop rules in one vectorized pass per tick.
+
+import numpy as np
+
+# Alert kinds reported by AlertStateStore.evaluate()
+NO_ALERT = 0
+INITIAL_DROP = 1      # price fell to INITIAL_DROP_PERCENTAGE below the 52-week high
+SUBSEQUENT_DROP = 2   # price fell another SUBSEQUENT_DROP_PERCENTAGE from the last alert
+RECOVERY_RESET = 3    # price recovered, last notified price moved up silently
+
+
+class AlertStateStore:
+    """
+    Array-backed replacement for the per-ticker monitoring_status dicts.
+
+    Arrays are indexed by ticker id (see ticker_ids):
+    high_52_week, current_price, initial_drop_price, last_notified_price,
+    initial_drop_alerted and monitored.
+    """
+
+    def __init__(self, tickers=(), initial_drop_pct=20, subsequent_drop_pct=1, capacity=64):
+        self.initial_drop_pct = initial_drop_pct
+        self.subsequent_drop_pct = subsequent_drop_pct
+        self.tickers = []
+        self.ticker_ids = {}
+        self.size = 0
+        self._allocate(max(capacity, len(tickers)))
+        for ticker in tickers:
+            self.add_ticker(ticker)
+
+    def _allocate(self, capacity):
+        def grow(name, fill, dtype):
+            new = np.full(capacity, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+        grow('high_52_week', np.nan, float)
+        grow('current_price', np.nan, float)
+        grow('initial_drop_price', np.nan, float)
+        grow('last_notified_price', np.nan, float)
+        grow('initial_drop_alerted', False, bool)
+        grow('monitored', False, bool)
+        self.capacity = capacity
+
+    def add_ticker(self, ticker):
+        """Registers a ticker and returns its id. Existing tickers keep their id."""
+        if ticker in self.ticker_ids:
+            return self.ticker_ids[ticker]
+        if self.size == self.capacity:
+            self._allocate(self.capacity * 2)
+        ticker_id = self.size
+        self.tickers.append(ticker)
+        self.ticker_ids[ticker] = ticker_id
+        self.size += 1
+        return ticker_id
+
+    def ids(self, tickers):
+        """Maps tickers to ids, registering any that are new."""
+        return np.array([self.add_ticker(ticker) for ticker in tickers], dtype=np.intp)
+
+    def initialize(self, ids, highs, prices):
+        """Starts monitoring the given ids with fresh state, like the startup loop in main()."""
+        ids = np.asarray(ids, dtype=np.intp)
+        self.high_52_week[ids] = highs
+        self.current_price[ids] = prices
+        self.initial_drop_price[ids] = np.nan
+        self.last_notified_price[ids] = np.nan
+        self.initial_drop_alerted[ids] = False
+        self.monitored[ids] = True
+
+    def evaluate(self, ids, prices, highs=None):
+        """
+        Applies one tick of prices to the given ids (no duplicates) and updates state
+        with the same rules as check_and_notify(). NaN prices are ignored. `highs`
+        overrides the stored 52-week highs for this tick only.
+
+        Returns:
+        dict: 'ids', 'kind', 'price', 'previous_notified', 'initial_drop_price' and
+              'initial_threshold' arrays for the ids that raised an INITIAL_DROP or SUBSEQUENT_DROP alert,
+              in the order they were passed in.
+        """
+        ids = np.asarray(ids, dtype=np.intp)
+        prices = np.asarray(prices, dtype=float)
+        valid = ~np.isnan(prices) & self.monitored[ids]
+        self.current_price[ids[valid]] = prices[valid]
+
+        high = self.high_52_week[ids] if highs is None else np.asarray(highs, dtype=float)
+        alerted = self.initial_drop_alerted[ids]
+        last = self.last_notified_price[ids]
+        initial_threshold = high * (1 - self.initial_drop_pct / 100)
+
+        with np.errstate(invalid='ignore'):
+            initial = valid & ~alerted & (prices <= initial_threshold)
+            was_alerted = valid & alerted
+            falling = was_alerted & (prices < last)
+            subsequent = falling & (prices <= last * (1 - self.subsequent_drop_pct / 100))
+            reset = was_alerted & ~falling & (prices > last * (1 + self.subsequent_drop_pct / 100))
+
+        kind = np.full(ids.size, NO_ALERT, dtype=np.int8)
+        kind[initial] = INITIAL_DROP
+        kind[subsequent] = SUBSEQUENT_DROP
+        kind[reset] = RECOVERY_RESET
+
+        initial_ids = ids[initial]
+        self.initial_drop_alerted[initial_ids] = True
+        self.initial_drop_price[initial_ids] = prices[initial]
+        moved = initial | subsequent | reset
+        self.last_notified_price[ids[moved]] = prices[moved]
+
+        alert = initial | subsequent
+        return {
+            'ids': ids[alert],
+            'kind': kind[alert],
+            'price': prices[alert],
+            'previous_notified': last[alert],
+            'initial_drop_price': self.initial_drop_price[ids[alert]],
+            'initial_threshold': initial_threshold[alert],
+        }
+
+    def status(self, ticker):
+        """Returns the old-style status dict for one ticker, or None if it is not monitored."""
+        ticker_id = self.ticker_ids.get(ticker)
+        if ticker_id is None or not self.monitored[ticker_id]:
+            return None
+
+        def value(array):
+            v = array[ticker_id]
+            return None if np.isnan(v) else float(v)
+
+        return {
+            '52_week_high': value(self.high_52_week),
+            'current_price': value(self.current_price),
+            'initial_drop_price': value(self.initial_drop_price),
+            'last_notified_price': value(self.last_notified_price),
+            'initial_drop_alerted': bool(self.initial_drop_alerted[ticker_id]),
+        }
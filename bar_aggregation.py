@@ -0,0 +1,346 @@
+# Multi-timeframe OHLCV bars derived from 1-minute bars.
+# Every higher timeframe (5m, 15m, 1h, 1d) is built from the same 1-minute bars, so one
+# download or one cache read feeds them all. Batch mode reduces a whole (symbols x
+# minutes) panel per timeframe with a single ufunc.reduceat over contiguous buckets;
+# streaming mode keeps the forming bar of every timeframe and folds each new minute into
+# it in O(symbols). Buckets follow the NSE session (09:15-15:30 IST): they are anchored at
+# the 09:15 open, so the last hourly bar is 15:15-15:30, and minutes outside the session
+# are dropped.
+
+import numpy as np
+import pandas as pd
+
+SESSION_TZ = 'Asia/Kolkata'
+SESSION_OPEN_MINUTE = 9 * 60 + 15   # 09:15
+SESSION_MINUTES = 375               # 09:15 to 15:30
+TIMEFRAMES = {'5m': 5, '15m': 15, '1h': 60, '1d': SESSION_MINUTES}
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+NS_PER_MINUTE = 60 * 10**9
+NS_PER_DAY = 24 * 60 * NS_PER_MINUTE
+
+
+# --- Session buckets ---
+def _local_ns(index):
+    """Wall-clock IST nanoseconds of a DatetimeIndex (naive timestamps are taken as IST)."""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert(SESSION_TZ).tz_localize(None)
+    return index.as_unit('ns').asi8
+
+
+def session_minute(index):
+    """
+    Minute of the NSE session for every timestamp: 0 for 09:15, 374 for 15:29, and
+    negative or >= SESSION_MINUTES outside the session.
+
+    Returns:
+    tuple: (day numbers, session minutes) as int64 arrays.
+    """
+    local = _local_ns(index)
+    return local // NS_PER_DAY, (local % NS_PER_DAY) // NS_PER_MINUTE - SESSION_OPEN_MINUTE
+
+
+def bucket_starts(day, minute, minutes):
+    """Local wall-clock nanoseconds of the start of the bucket each session minute falls in."""
+    return day * NS_PER_DAY + (SESSION_OPEN_MINUTE + minute // minutes * minutes) * NS_PER_MINUTE
+
+
+def _to_index(local_ns):
+    return pd.DatetimeIndex(np.asarray(local_ns).view('datetime64[ns]'), name='Date').tz_localize(SESSION_TZ)
+
+
+# --- Batch mode ---
+def group_reduce(panel, starts):
+    """
+    Reduces contiguous groups of bars of a panel in one pass per field.
+
+    Parameters:
+    panel (dict): {field: (symbols x bars) array}, NaN where a symbol has no bar
+    starts (ndarray): Column where every group begins, ascending and starting at 0
+
+    Returns:
+    dict: {field: (symbols x groups) array}. Open is the first and close the last valid
+          value of the group; groups without any valid value are NaN.
+    """
+    high = np.fmax.reduceat(panel['high'], starts, axis=1)
+    low = np.fmin.reduceat(panel['low'], starts, axis=1)
+
+    volume = panel['volume']
+    traded = np.add.reduceat(~np.isnan(volume), starts, axis=1)
+    volume = np.where(traded > 0, np.add.reduceat(np.nan_to_num(volume), starts, axis=1), np.nan)
+
+    n_bars = panel['close'].shape[1]
+    columns = np.arange(n_bars)
+    rows = np.arange(panel['close'].shape[0])[:, None]
+    first = np.minimum.reduceat(np.where(np.isnan(panel['open']), n_bars, columns), starts, axis=1)
+    last = np.maximum.reduceat(np.where(np.isnan(panel['close']), -1, columns), starts, axis=1)
+    open_ = np.where(first < n_bars, panel['open'][rows, np.minimum(first, n_bars - 1)], np.nan)
+    close = np.where(last >= 0, panel['close'][rows, np.maximum(last, 0)], np.nan)
+    return {'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume}
+
+
+def aggregate(index, panel, timeframes=tuple(TIMEFRAMES)):
+    """
+    Aggregates 1-minute bars of many symbols to higher timeframes.
+
+    Parameters:
+    index (DatetimeIndex): Sorted minute timestamps (bar start times) of the panel columns
+    panel (dict): {field: (symbols x minutes) array} for open, high, low, close and volume
+    timeframes (iterable): Keys of TIMEFRAMES
+
+    Returns:
+    dict: {timeframe: (bucket start DatetimeIndex in IST, {field: (symbols x buckets) array})}
+    """
+    day, minute = session_minute(index)
+    in_session = (minute >= 0) & (minute < SESSION_MINUTES)
+    if not in_session.all():
+        day, minute = day[in_session], minute[in_session]
+        panel = {field: np.asarray(panel[field], dtype=float)[:, in_session] for field in FIELDS}
+    else:
+        panel = {field: np.asarray(panel[field], dtype=float) for field in FIELDS}
+
+    bars = {}
+    for timeframe in timeframes:
+        keys = bucket_starts(day, minute, TIMEFRAMES[timeframe])
+        if keys.size == 0:
+            bars[timeframe] = (_to_index(keys), {field: panel[field][:, :0] for field in FIELDS})
+            continue
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        bars[timeframe] = (_to_index(keys[starts]), group_reduce(panel, starts))
+    return bars
+
+
+def frames_to_panel(frames):
+    """
+    Aligns {symbol: OHLCHistory() frame} of 1-minute bars on the union of their timestamps.
+
+    Returns:
+    tuple: (symbols, index, {field: (symbols x minutes) array}) with NaN where a symbol has no bar.
+    """
+    symbols = list(frames)
+    aligned = pd.concat({symbol: frames[symbol][list(FIELDS)] for symbol in symbols}, axis=1, sort=True)
+    values = aligned.to_numpy(dtype=float).reshape(len(aligned), len(symbols), len(FIELDS))
+    return symbols, aligned.index, {field: values[:, :, i].T for i, field in enumerate(FIELDS)}
+
+
+def resample_frames(frames, timeframes=tuple(TIMEFRAMES)):
+    """
+    Derives higher-timeframe frames from {symbol: 1-minute OHLCHistory() frame}.
+
+    Returns:
+    dict: {timeframe: {symbol: frame}} with the same lowercase OHLCV columns. Buckets in
+          which a symbol did not trade are dropped from its frame.
+    """
+    symbols, index, panel = frames_to_panel(frames)
+    result = {}
+    for timeframe, (bar_index, bars) in aggregate(index, panel, timeframes).items():
+        result[timeframe] = {}
+        for i, symbol in enumerate(symbols):
+            frame = pd.DataFrame({field: bars[field][i] for field in FIELDS}, index=bar_index)
+            result[timeframe][symbol] = frame[~np.isnan(bars['close'][i])]
+    return result
+
+
+def resample_cached(symbols, start, end, timeframes=tuple(TIMEFRAMES), cache=None):
+    """
+    Reads 1-minute bars for [start, end) through the OHLC cache once and derives every
+    timeframe from them, instead of downloading each interval separately.
+    """
+    from ohlc_cache import OHLCCache
+
+    cache = cache or OHLCCache()
+    return resample_frames({symbol: cache.read(symbol, '1m', start, end) for symbol in symbols}, timeframes)
+
+
+def fetch_minute_panel(tickers, since=None):
+    """
+    1-minute bars for many tickers from one yf.download: today's session, or only the
+    minutes after `since` when given, so a minute loop does not re-download the day.
+
+    Returns:
+    tuple: (index, {field: (tickers x minutes) array}) with NaN where a ticker has no bar.
+    """
+    import yfinance as yf
+
+    from gainers_losers import field_matrix
+
+    if since is None:
+        data = yf.download(tickers=list(tickers), period='1d', interval='1m', group_by='ticker', threads=True)
+    else:
+        data = yf.download(tickers=list(tickers), start=pd.Timestamp(since) + pd.Timedelta(minutes=1),
+                           interval='1m', group_by='ticker', threads=True)
+    if data is None or data.empty:
+        return pd.DatetimeIndex([], tz=SESSION_TZ), {field: np.empty((len(tickers), 0)) for field in FIELDS}
+    return data.index, {field: field_matrix(data, field.capitalize(), list(tickers)).T for field in FIELDS}
+
+
+# --- Streaming mode ---
+class StreamingBars:
+    """
+    Forming bars of several timeframes for many symbols, updated one minute at a time.
+
+    update() takes one 1-minute bar per symbol (NaN for symbols without a bar that minute)
+    and returns the higher-timeframe bars that minute completed. A bar completes on its
+    last session minute, or when a later minute arrives if that one was never received.
+    """
+
+    def __init__(self, symbols, timeframes=tuple(TIMEFRAMES)):
+        self.symbols = list(symbols)
+        self.timeframes = list(timeframes)
+        self.minutes = np.array([TIMEFRAMES[t] for t in self.timeframes])
+        shape = (len(self.timeframes), len(self.symbols))
+        self.bars = {field: np.full(shape, np.nan) for field in FIELDS}
+        self.bucket = np.full(len(self.timeframes), -1, dtype=np.int64)
+        self.pending = np.zeros(len(self.timeframes), dtype=bool)
+
+    def _bar(self, row):
+        return {field: self.bars[field][row].copy() for field in FIELDS}
+
+    def _emit(self, row):
+        self.pending[row] = False
+        return self.timeframes[row], _to_index([self.bucket[row]])[0], self._bar(row)
+
+    def update(self, timestamp, open, high, low, close, volume):
+        """
+        Folds one minute of bars into every timeframe.
+
+        Parameters:
+        timestamp: Start time of the minute bar (naive values are IST)
+        open, high, low, close, volume (array-like): Values aligned with self.symbols
+
+        Returns:
+        list: (timeframe, bucket start, {field: array}) for every bar completed by this minute.
+        """
+        day, minute = session_minute([pd.Timestamp(timestamp)])
+        day, minute = day[0], minute[0]
+        if not 0 <= minute < SESSION_MINUTES:
+            return []
+
+        completed = []
+        starts = bucket_starts(day, minute, self.minutes)
+        rolled = starts != self.bucket
+        for row in np.flatnonzero(rolled & self.pending):
+            completed.append(self._emit(row))
+        if rolled.any():
+            for field in FIELDS:
+                self.bars[field][rolled] = np.nan
+            self.bucket[rolled] = starts[rolled]
+
+        values = {field: np.asarray(value, dtype=float)
+                  for field, value in zip(FIELDS, (open, high, low, close, volume))}
+        bars = self.bars
+        bars['open'] = np.where(np.isnan(bars['open']), values['open'], bars['open'])
+        bars['high'] = np.fmax(bars['high'], values['high'])
+        bars['low'] = np.fmin(bars['low'], values['low'])
+        bars['close'] = np.where(np.isnan(values['close']), bars['close'], values['close'])
+        bars['volume'] = np.where(np.isnan(values['volume']), bars['volume'],
+                                  np.nan_to_num(bars['volume']) + values['volume'])
+        self.pending[:] = True
+
+        closing = ((minute + 1) % self.minutes == 0) | (minute == SESSION_MINUTES - 1)
+        for row in np.flatnonzero(closing):
+            completed.append(self._emit(row))
+        return completed
+
+    def replay(self, index, panel):
+        """Feeds a (symbols x minutes) panel minute by minute, e.g. to resume mid-session."""
+        completed = []
+        for j, timestamp in enumerate(index):
+            completed.extend(self.update(timestamp, *(panel[field][:, j] for field in FIELDS)))
+        return completed
+
+    def current(self, timeframe):
+        """The forming bar of a timeframe: (bucket start, {field: array}), or None before the first minute."""
+        row = self.timeframes.index(timeframe)
+        if self.bucket[row] < 0:
+            return None
+        return _to_index([self.bucket[row]])[0], self._bar(row)
+
+
+# --- Checks and benchmark ---
+def pandas_resample(frame, timeframe):
+    """Reference aggregation of one symbol's 1-minute frame with pandas resample()."""
+    minutes = TIMEFRAMES[timeframe]
+    day, minute = session_minute(frame.index)
+    frame = frame[(minute >= 0) & (minute < SESSION_MINUTES)]
+    rule = '1D' if timeframe == '1d' else f'{minutes}min'
+    offset = None if timeframe == '1d' else '15min'
+    resampled = frame.resample(rule, offset=offset).agg(
+        {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'})
+    resampled = resampled[frame['close'].resample(rule, offset=offset).count() > 0]
+    if timeframe == '1d':
+        resampled.index = resampled.index + pd.Timedelta(minutes=SESSION_OPEN_MINUTE)
+    return resampled
+
+
+def parity_check(n_symbols=20, n_days=3, seed=0):
+    """
+    Largest absolute difference of batch aggregation, and of streaming aggregation,
+    against pandas resample() over every symbol, timeframe and field.
+    """
+    from synthetic_market_data import synthetic_ohlc_frames
+
+    frames = synthetic_ohlc_frames(n_symbols, SESSION_MINUTES * n_days, interval='1m', seed=seed)
+    rng = np.random.default_rng(seed)
+    for frame in frames.values():
+        # Symbols that miss some minutes
+        frame.loc[rng.random(len(frame)) < 0.05] = np.nan
+    frames = {symbol: frame.dropna() for symbol, frame in frames.items()}
+
+    batch = resample_frames(frames)
+    symbols, index, panel = frames_to_panel(frames)
+    streamed = {timeframe: [] for timeframe in TIMEFRAMES}
+    for timeframe, start, bar in StreamingBars(symbols).replay(index, panel):
+        streamed[timeframe].append((start, bar))
+
+    batch_diff = stream_diff = 0.0
+    for timeframe in TIMEFRAMES:
+        stream_index = pd.DatetimeIndex([start for start, _ in streamed[timeframe]])
+        for i, symbol in enumerate(symbols):
+            expected = pandas_resample(frames[symbol], timeframe)
+            got = batch[timeframe][symbol]
+            assert got.index.equals(expected.index), (timeframe, symbol)
+            batch_diff = max(batch_diff, float(np.abs(got.to_numpy() - expected.to_numpy()).max()))
+            rows = pd.DataFrame({field: [bar[field][i] for _, bar in streamed[timeframe]] for field in FIELDS},
+                                index=stream_index).dropna(subset=['close'])
+            assert rows.index.equals(expected.index), (timeframe, symbol)
+            stream_diff = max(stream_diff, float(np.abs(rows.to_numpy() - expected.to_numpy()).max()))
+    return batch_diff, stream_diff
+
+
+def benchmark_aggregation(n_symbols=200, n_days=5):
+    """Times batch aggregation against per-symbol pandas resample() and one streaming minute."""
+    import time
+
+    from synthetic_market_data import synthetic_ohlc_frames
+
+    frames = synthetic_ohlc_frames(n_symbols, SESSION_MINUTES * n_days, interval='1m')
+    symbols, index, panel = frames_to_panel(frames)
+
+    start = time.perf_counter()
+    aggregate(index, panel)
+    batch = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for frame in frames.values():
+        for timeframe in TIMEFRAMES:
+            pandas_resample(frame, timeframe)
+    per_symbol = time.perf_counter() - start
+
+    streaming = StreamingBars(symbols)
+    streaming.replay(index[:-1], {field: panel[field][:, :-1] for field in FIELDS})
+    start = time.perf_counter()
+    streaming.update(index[-1], *(panel[field][:, -1] for field in FIELDS))
+    minute = time.perf_counter() - start
+
+    batch_diff, stream_diff = parity_check()
+    print(f"--- Bar aggregation ({n_symbols} symbols x {len(index):,} minutes -> {', '.join(TIMEFRAMES)}) ---")
+    print(f"Per-symbol pandas resample: {per_symbol * 1000:9.1f} ms")
+    print(f"Batch reduceat:             {batch * 1000:9.1f} ms ({per_symbol / batch:.0f}x)")
+    print(f"Streaming, one new minute:  {minute * 1000:9.3f} ms")
+    print(f"Max difference vs pandas: batch {batch_diff:.3g}, streaming {stream_diff:.3g}")
+
+
+# Example usage: derive every timeframe from one set of 1-minute bars
+if __name__ == "__main__":
+    benchmark_aggregation()
@@ -0,0 +1,121 @@
+# Vectorized Black-Scholes engine for pricing whole option chains in one call.
+# Mirrors black_scholes() in Black-scholes_option_price_calculator.py term for term,
+# so a batch of contracts gives the same prices as calling the scalar function per row.
+
+import numpy as np
+from scipy.special import ndtr  # same kernel scipy.stats.norm.cdf uses
+
+
+# --- Batch Black-Scholes with Greeks ---
+def black_scholes_batch(S, K, T, r, sigma, is_call, q=0.0):
+    """
+    Prices many European options at once and returns their Greeks.
+
+    All inputs are broadcast against each other, so a single spot or rate can be
+    combined with arrays of strikes and expiries.
+
+    Parameters:
+    S (array-like): Current price of the underlying asset
+    K (array-like): Strike price of the option
+    T (array-like): Time to expiration (in years)
+    r (array-like): Risk-free interest rate (annualized)
+    sigma (array-like): Volatility of the underlying asset (annualized)
+    is_call (array-like of bool): True for calls, False for puts
+    q (array-like): Dividend yield (annualized, default is 0)
+
+    Returns:
+    dict: 'price', 'delta', 'gamma', 'vega', 'theta' and 'rho' arrays.
+          Vega and rho are per 1.00 change in sigma / r, theta is per year.
+    """
+    S, K, T, r, sigma, is_call, q = np.broadcast_arrays(
+        np.asarray(S, dtype=float),
+        np.asarray(K, dtype=float),
+        np.asarray(T, dtype=float),
+        np.asarray(r, dtype=float),
+        np.asarray(sigma, dtype=float),
+        np.asarray(is_call, dtype=bool),
+        np.asarray(q, dtype=float),
+    )
+    shape = S.shape
+    price = np.empty(shape)
+    delta = np.zeros(shape)
+    gamma = np.zeros(shape)
+    vega = np.zeros(shape)
+    theta = np.zeros(shape)
+    rho = np.zeros(shape)
+
+    # Expired contracts are worth their intrinsic value, exactly like the scalar function
+    expired = T <= 0
+    if expired.any():
+        S_e, K_e, call_e = S[expired], K[expired], is_call[expired]
+        price[expired] = np.where(call_e, np.maximum(0, S_e - K_e), np.maximum(0, K_e - S_e))
+        delta[expired] = np.where(call_e, (S_e > K_e) * 1.0, (K_e > S_e) * -1.0)
+
+    live = ~expired
+    if not live.any():
+        return {'price': price, 'delta': delta, 'gamma': gamma,
+                'vega': vega, 'theta': theta, 'rho': rho}
+
+    S, K, T, r, sigma, q, call = S[live], K[live], T[live], r[live], sigma[live], q[live], is_call[live]
+
+    # Shared terms, computed once for the whole batch
+    sqrt_T = np.sqrt(T)
+    sigma_sqrt_T = sigma * sqrt_T
+    div_disc = np.exp(-q * T)
+    rate_disc = np.exp(-r * T)
+
+    # float_power goes through libm pow() like the scalar `sigma**2`; `**` on arrays
+    # takes a multiply fast path that can differ in the last bit
+    d1 = (np.log(S / K) + (r - q + 0.5 * np.float_power(sigma, 2)) * T) / sigma_sqrt_T
+    d2 = d1 - sigma_sqrt_T
+
+    # Same expression order as black_scholes() so results match bit for bit
+    call_price = S * div_disc * ndtr(d1) - K * rate_disc * ndtr(d2)
+    put_price = K * rate_disc * ndtr(-d2) - S * div_disc * ndtr(-d1)
+
+    pdf_d1 = np.exp(-0.5 * d1**2) / np.sqrt(2 * np.pi)
+    S_disc = S * div_disc
+    K_disc = K * rate_disc
+    common_theta = -S_disc * pdf_d1 * sigma / (2 * sqrt_T)
+
+    call_delta = div_disc * ndtr(d1)
+    put_delta = call_delta - div_disc
+    call_theta = common_theta - r * K_disc * ndtr(d2) + q * S_disc * ndtr(d1)
+    put_theta = common_theta + r * K_disc * ndtr(-d2) - q * S_disc * ndtr(-d1)
+    call_rho = K_disc * T * ndtr(d2)
+    put_rho = -K_disc * T * ndtr(-d2)
+
+    price[live] = np.where(call, call_price, put_price)
+    delta[live] = np.where(call, call_delta, put_delta)
+    gamma[live] = div_disc * pdf_d1 / (S * sigma_sqrt_T)
+    vega[live] = S_disc * pdf_d1 * sqrt_T
+    theta[live] = np.where(call, call_theta, put_theta)
+    rho[live] = np.where(call, call_rho, put_rho)
+
+    return {'price': price, 'delta': delta, 'gamma': gamma,
+            'vega': vega, 'theta': theta, 'rho': rho}
+
+
+def option_type_mask(option_types):
+    """Converts a sequence of 'call'/'put' strings into the is_call mask used above."""
+    option_types = np.asarray(option_types)
+    valid = (option_types == 'call') | (option_types == 'put')
+    if not valid.all():
+        raise ValueError("option_type must be 'call' or 'put'")
+    return option_types == 'call'
+
+
+# Example usage: price a full strike ladder for two expiries in one call
+if __name__ == "__main__":
+    strikes = np.arange(2000, 3201, 50, dtype=float)
+    expiries = np.array([7 / 365.0, 35 / 365.0])
+    K_grid, T_grid = np.meshgrid(strikes, expiries)
+    K_grid = np.concatenate([K_grid.ravel(), K_grid.ravel()])
+    T_grid = np.concatenate([T_grid.ravel(), T_grid.ravel()])
+    calls = np.repeat([True, False], K_grid.size // 2)
+
+    result = black_scholes_batch(S=2600.0, K=K_grid, T=T_grid, r=0.065, sigma=0.28, is_call=calls, q=0.01)
+    for i in range(0, K_grid.size, 10):
+        kind = 'call' if calls[i] else 'put'
+        print(f"{kind:<4} K={K_grid[i]:>7.0f} T={T_grid[i]:.3f} price={result['price'][i]:>9.2f} "
+              f"delta={result['delta'][i]:>6.3f} gamma={result['gamma'][i]:.5f} vega={result['vega'][i]:>8.2f}")
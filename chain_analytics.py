@@ -0,0 +1,279 @@
+# Option-chain analytics on the columnar chain frames: max pain, put-call ratios and OI walls.
+# Chains of several symbols are stacked into one set of arrays sorted by (symbol, expiry,
+# strike), and every statistic is computed for all (symbol, expiry) groups in one pass with
+# segmented cumulative sums and ufunc.reduceat, so refreshing BANKNIFTY, FINNIFTY and NIFTY
+# every minute costs a few array operations instead of Python loops over the records.
+#
+# Max pain is the settlement strike that minimizes the total intrinsic value option writers
+# pay out. With strikes sorted, the payout at strike K_j is
+#   sum_{i<j} CE_OI_i * (K_j - K_i)  +  sum_{i>j} PE_OI_i * (K_i - K_j)
+# which prefix sums of OI and OI * strike give in O(n) per expiry.
+
+import numpy as np
+import pandas as pd
+
+from nse_option_chain_fetcher import indices, records_to_frame
+
+DEFAULT_WALLS = 3   # heaviest call / put OI strikes reported per expiry
+
+
+# --- Columnar input ---
+def chain_arrays(chains):
+    """
+    Stacks {symbol: chain} (NSE 'records' payloads or records_to_frame() frames) into
+    arrays sorted by symbol, expiry and strike.
+
+    Returns:
+    tuple: (groups DataFrame with 'symbol' and 'expiryDate' per group, dict of arrays
+           'group', 'strike', 'ce_oi', 'pe_oi', 'ce_volume', 'pe_volume', 'spot', and
+           the index where each group starts)
+    """
+    symbols = list(chains)
+    columns = {'strike': 'strikePrice', 'ce_oi': 'CE_openInterest', 'pe_oi': 'PE_openInterest',
+               'ce_volume': 'CE_totalTradedVolume', 'pe_volume': 'PE_totalTradedVolume',
+               'ce_spot': 'CE_underlyingValue', 'pe_spot': 'PE_underlyingValue'}
+    parts = {name: [] for name in columns}
+    expiry, symbol_code = [], []
+    for code, symbol in enumerate(symbols):
+        chain = chains[symbol]
+        frame = chain if isinstance(chain, pd.DataFrame) else records_to_frame(chain)
+        for name, column in columns.items():
+            parts[name].append(frame[column].to_numpy(dtype=float))
+        expiry.append(frame['expiryDate'].to_numpy(dtype='datetime64[D]').astype(np.int64))
+        symbol_code.append(np.full(len(frame), code))
+    if not symbols:
+        return (pd.DataFrame({'symbol': [], 'expiryDate': pd.to_datetime([])}),
+                {name: np.empty(0) for name in ('strike', 'ce_oi', 'pe_oi', 'ce_volume', 'pe_volume', 'spot')}
+                | {'group': np.empty(0, dtype=np.intp)}, np.empty(0, dtype=np.intp))
+
+    expiry, symbol_code = np.concatenate(expiry), np.concatenate(symbol_code)
+    stacked = {name: np.concatenate(values) for name, values in parts.items()}
+    order = np.lexsort((stacked['strike'], expiry, symbol_code))
+    expiry, symbol_code = expiry[order], symbol_code[order]
+    new_group = np.ones(order.size, dtype=bool)
+    new_group[1:] = (expiry[1:] != expiry[:-1]) | (symbol_code[1:] != symbol_code[:-1])
+    starts = np.flatnonzero(new_group)
+    arrays = {
+        'group': np.cumsum(new_group) - 1,
+        'strike': stacked['strike'][order],
+        # A missing leg has no open interest or volume
+        'ce_oi': np.nan_to_num(stacked['ce_oi'][order]),
+        'pe_oi': np.nan_to_num(stacked['pe_oi'][order]),
+        'ce_volume': np.nan_to_num(stacked['ce_volume'][order]),
+        'pe_volume': np.nan_to_num(stacked['pe_volume'][order]),
+        'spot': np.fmax(stacked['ce_spot'][order], stacked['pe_spot'][order]),
+    }
+    groups = pd.DataFrame({
+        'symbol': np.array(symbols, dtype=object)[symbol_code[starts]],
+        'expiryDate': pd.to_datetime(expiry[starts].astype('datetime64[D]')),
+    })
+    return groups, arrays, starts
+
+
+def _segment_cumsum(values, group, starts):
+    """Inclusive cumulative sum that restarts at every group start."""
+    total = np.cumsum(values)
+    before = np.concatenate([[0.0], total])[starts]
+    return total - before[group]
+
+
+# --- Max pain ---
+def writer_payout(arrays, starts):
+    """
+    Total intrinsic value paid to option holders if each group expired at each of its
+    strikes, for all groups at once (O(n) prefix sums).
+
+    Returns:
+    ndarray: Payout per row of the arrays, i.e. per (group, candidate strike).
+    """
+    group, strike, ce_oi, pe_oi = arrays['group'], arrays['strike'], arrays['ce_oi'], arrays['pe_oi']
+    cum_ce = _segment_cumsum(ce_oi, group, starts)
+    cum_ce_k = _segment_cumsum(ce_oi * strike, group, starts)
+    cum_pe = _segment_cumsum(pe_oi, group, starts)
+    cum_pe_k = _segment_cumsum(pe_oi * strike, group, starts)
+    ends = np.append(starts[1:], group.size) - 1
+    total_pe, total_pe_k = cum_pe[ends][group], cum_pe_k[ends][group]
+    # Calls below the settlement strike and puts above it finish in the money
+    calls = strike * cum_ce - cum_ce_k
+    puts = (total_pe_k - cum_pe_k) - strike * (total_pe - cum_pe)
+    return calls + puts
+
+
+def max_pain(arrays, starts):
+    """
+    Max-pain strike of every group.
+
+    Returns:
+    tuple: (max-pain strikes, writer payout at those strikes), one per group. Ties go
+           to the lowest strike.
+    """
+    if starts.size == 0:
+        return np.empty(0), np.empty(0)
+    payout = writer_payout(arrays, starts)
+    order = np.lexsort((payout, arrays['group']))
+    best = order[np.searchsorted(arrays['group'][order], np.arange(starts.size))]
+    return arrays['strike'][best], payout[best]
+
+
+def max_pain_broadcast(strikes, ce_oi, pe_oi):
+    """
+    Max pain of a single expiry from the full (settlement x strike) payoff matrix.
+    O(n^2) memory; kept as the reference for the prefix-sum version.
+    """
+    strikes = np.asarray(strikes, dtype=float)
+    settle = strikes[:, None]
+    payout = (np.maximum(settle - strikes, 0) * np.nan_to_num(ce_oi)
+              + np.maximum(strikes - settle, 0) * np.nan_to_num(pe_oi)).sum(axis=1)
+    best = int(np.argmin(payout))
+    return strikes[best], payout[best]
+
+
+def max_pain_loop(records, expiry):
+    """The record-list loop the prefix-sum version replaces, kept for comparison."""
+    rows = [row for row in records['data'] if row['expiryDate'] == expiry]
+    best_strike, best_payout = None, None
+    for settle_row in rows:
+        settle = settle_row['strikePrice']
+        payout = 0.0
+        for row in rows:
+            if 'CE' in row and settle > row['strikePrice']:
+                payout += (settle - row['strikePrice']) * row['CE']['openInterest']
+            if 'PE' in row and settle < row['strikePrice']:
+                payout += (row['strikePrice'] - settle) * row['PE']['openInterest']
+        if best_payout is None or payout < best_payout:
+            best_strike, best_payout = settle, payout
+    return best_strike, best_payout
+
+
+# --- Ratios and walls ---
+def put_call_ratios(arrays, starts):
+    """
+    Put-call ratios of every group by open interest and by traded volume (NaN when the
+    group has no call OI or call volume).
+
+    Returns:
+    dict: 'pcr_oi', 'pcr_volume', 'ce_oi', 'pe_oi', 'ce_volume' and 'pe_volume' per group.
+    """
+    totals = {name: np.add.reduceat(arrays[name], starts) if starts.size else np.empty(0)
+              for name in ('ce_oi', 'pe_oi', 'ce_volume', 'pe_volume')}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        totals['pcr_oi'] = np.where(totals['ce_oi'] > 0, totals['pe_oi'] / totals['ce_oi'], np.nan)
+        totals['pcr_volume'] = np.where(totals['ce_volume'] > 0, totals['pe_volume'] / totals['ce_volume'], np.nan)
+    return totals
+
+
+def oi_walls(arrays, starts, n=DEFAULT_WALLS):
+    """
+    The n strikes with the heaviest call OI and put OI in every group.
+
+    Returns:
+    dict: {'CE': (group, rank, strike, oi), 'PE': (...)} arrays, rank 0 being the heaviest.
+    """
+    walls = {}
+    for side, oi in (('CE', arrays['ce_oi']), ('PE', arrays['pe_oi'])):
+        order = np.lexsort((-oi, arrays['group']))
+        group = arrays['group'][order]
+        rank = np.arange(order.size) - starts[group]
+        keep = rank < n
+        walls[side] = (group[keep], rank[keep], arrays['strike'][order][keep], oi[order][keep])
+    return walls
+
+
+# --- Summary ---
+def chain_summary(chains, walls=DEFAULT_WALLS):
+    """
+    Max pain, put-call ratios and OI walls for every (symbol, expiry) of several chains.
+
+    Parameters:
+    chains (dict): {symbol: NSE 'records' payload or records_to_frame() frame}
+    walls (int): Heaviest call and put OI strikes to list per expiry
+
+    Returns:
+    tuple: (summary DataFrame with one row per symbol and expiry, walls DataFrame with
+           one row per symbol, expiry, side and rank)
+    """
+    groups, arrays, starts = chain_arrays(chains)
+    pain_strike, pain_payout = max_pain(arrays, starts)
+    ratios = put_call_ratios(arrays, starts)
+    wall_arrays = oi_walls(arrays, starts, walls)
+
+    columns = {
+        'symbol': groups['symbol'].to_numpy(),
+        'expiryDate': groups['expiryDate'].to_numpy(),
+        'spot': np.fmax.reduceat(arrays['spot'], starts) if starts.size else np.empty(0),
+        'max_pain': pain_strike,
+        'max_pain_payout': pain_payout,
+        **{name: ratios[name] for name in ('pcr_oi', 'pcr_volume', 'ce_oi', 'pe_oi', 'ce_volume', 'pe_volume')},
+    }
+    for side, label in (('CE', 'call_wall'), ('PE', 'put_wall')):
+        group, rank, strike, _ = wall_arrays[side]
+        columns[label] = np.full(len(groups), np.nan)
+        columns[label][group[rank == 0]] = strike[rank == 0]
+    summary = pd.DataFrame(columns)
+
+    group, rank, strike, oi = (np.concatenate(values) for values in zip(*wall_arrays.values()))
+    side = np.repeat(list(wall_arrays), [wall_arrays[s][0].size for s in wall_arrays])
+    order = np.lexsort((rank, side, group))
+    wall_frame = pd.DataFrame({
+        'symbol': groups['symbol'].to_numpy()[group[order]],
+        'expiryDate': groups['expiryDate'].to_numpy()[group[order]],
+        'side': side[order], 'rank': rank[order], 'strikePrice': strike[order], 'openInterest': oi[order],
+    })
+    return summary, wall_frame
+
+
+def index_analytics(fetcher=None, symbols=indices, walls=DEFAULT_WALLS):
+    """Fetches the index chains concurrently and summarizes all their expiries in one pass."""
+    from nse_option_chain_fetcher import NSEOptionChainFetcher
+
+    own = fetcher is None
+    fetcher = fetcher or NSEOptionChainFetcher()
+    try:
+        frames = fetcher.fetch_frames(symbols)
+    finally:
+        if own:
+            fetcher.close()
+    return chain_summary(frames, walls)
+
+
+# --- Benchmark ---
+def benchmark_analytics(n_strikes=200, repeats=20):
+    """Times the one-pass summary of the three index chains against the record loop."""
+    import time
+
+    from nse_option_chain_fetcher import synthetic_option_chain
+
+    chains = {symbol: synthetic_option_chain(symbol, n_strikes=n_strikes, seed=i)['records']
+              for i, symbol in enumerate(indices)}
+    frames = {symbol: records_to_frame(records) for symbol, records in chains.items()}
+
+    start = time.perf_counter()
+    loop = {(symbol, expiry): max_pain_loop(records, expiry)
+            for symbol, records in chains.items() for expiry in records['expiryDates']}
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        summary, _ = chain_summary(frames)
+    vectorized = (time.perf_counter() - start) / repeats
+
+    groups, arrays, starts = chain_arrays(frames)
+    mismatches = 0
+    for g, (symbol, expiry) in enumerate(zip(groups['symbol'], groups['expiryDate'])):
+        rows = slice(starts[g], starts[g + 1] if g + 1 < starts.size else None)
+        reference = max_pain_broadcast(arrays['strike'][rows], arrays['ce_oi'][rows], arrays['pe_oi'][rows])
+        expected = loop[(symbol, f"{expiry:%d-%b-%Y}")]
+        mismatches += summary['max_pain'][g] != reference[0] or summary['max_pain'][g] != expected[0]
+
+    print(f"--- Chain analytics ({len(indices)} indices x {len(summary) // len(indices)} expiries "
+          f"x {n_strikes} strikes) ---")
+    print(f"Record loop (max pain only): {loop_time * 1000:9.1f} ms")
+    print(f"One-pass summary:            {vectorized * 1000:9.2f} ms ({loop_time / vectorized:.0f}x)")
+    print(f"Max-pain mismatches vs loop and broadcast: {mismatches}")
+    print(summary[['symbol', 'expiryDate', 'spot', 'max_pain', 'pcr_oi', 'pcr_volume',
+                   'call_wall', 'put_wall']].to_string(index=False))
+
+
+# Example usage: analytics of synthetic BANKNIFTY, FINNIFTY and NIFTY chains
+if __name__ == "__main__":
+    benchmark_analytics()
@@ -0,0 +1,276 @@
+# Historical backtester for the 20%-drop alert rule of 20%_down_price_informer.py.
+# Rolling 52-week highs are sliding-window maxima over the bar history, and the alert
+# state machine of check_and_notify() is replayed over a (symbols x bars) matrix with
+# every symbol and every (initial %, subsequent %) pair of a parameter grid advanced
+# together in one array operation per bar. Symbol blocks can be spread over processes.
+# Each alert is scored with forward returns over a few horizons.
+
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from alert_state import AlertStateStore, INITIAL_DROP, SUBSEQUENT_DROP
+
+DEFAULT_HORIZONS = (1, 5, 20, 60)   # bars after the alert
+KIND_LABELS = {INITIAL_DROP: 'initial', SUBSEQUENT_DROP: 'subsequent'}
+
+
+# --- Data ---
+def frames_from_cache(symbols, interval, fdate, todate, cache=None):
+    """
+    Loads {symbol: frame} through the same OHLCCache that OHLCHistory() reads from,
+    so backtests and the scripts share one local copy of the history.
+    """
+    from ohlc_cache import OHLCCache
+
+    cache = cache or OHLCCache()
+    return {symbol: cache.read(symbol, interval, fdate, todate) for symbol in symbols}
+
+
+def frames_to_arrays(frames):
+    """
+    Aligns OHLCHistory() frames on the union of their timestamps.
+
+    Returns:
+    tuple: (symbols, index, close, high) with (symbols x bars) matrices, NaN where a
+           symbol has no bar.
+    """
+    symbols = list(frames)
+    close = pd.concat({s: frames[s]['close'] for s in symbols}, axis=1).sort_index()
+    high = pd.concat({s: frames[s]['high'] for s in symbols}, axis=1).reindex(close.index)
+    return symbols, close.index, close.to_numpy(dtype=float).T, high.to_numpy(dtype=float).T
+
+
+def rolling_52_week_high(high, index, window='365D'):
+    """
+    Trailing 52-week high at every bar, including the bar itself, as a (symbols x bars)
+    matrix. A time window ('365D') works for daily and intraday bars alike; an int
+    counts bars instead. pandas computes rolling maxima with a monotonic deque, so each
+    column costs O(bars) whatever the window length.
+    """
+    frame = pd.DataFrame(np.asarray(high, dtype=float).T, index=index)
+    return frame.rolling(window, min_periods=1).max().to_numpy().T
+
+
+# --- Replay ---
+def simulate_alerts(close, high_52_week, initial_pcts, subsequent_pcts):
+    """
+    Replays the check_and_notify() rules over every bar for every parameter pair.
+
+    State is held in (parameter pairs x symbols) arrays and updated with the same
+    expressions as AlertStateStore.evaluate(), so a single pair gives exactly the alerts
+    the live informer would have raised. Bars before the first possible initial alert
+    are skipped.
+
+    Parameters:
+    close, high_52_week (ndarray): (symbols x bars) matrices
+    initial_pcts, subsequent_pcts (array-like): One entry per parameter pair
+
+    Returns:
+    dict: 'param', 'symbol', 'bar', 'kind' and 'price' arrays, one entry per alert,
+          ordered by bar.
+    """
+    initial_pcts = np.asarray(initial_pcts, dtype=float)[:, np.newaxis]
+    subsequent_pcts = np.asarray(subsequent_pcts, dtype=float)[:, np.newaxis]
+    prices_by_bar = np.ascontiguousarray(np.asarray(close, dtype=float).T)
+    highs_by_bar = np.ascontiguousarray(np.asarray(high_52_week, dtype=float).T)
+    n_params, n_symbols = initial_pcts.shape[0], prices_by_bar.shape[1]
+
+    initial_factor = 1 - initial_pcts / 100
+    down_factor = 1 - subsequent_pcts / 100
+    up_factor = 1 + subsequent_pcts / 100
+
+    # Nothing can happen until some close reaches the loosest initial threshold (the largest
+    # factor), so skipping the bars before it leaves every parameter pair's alerts unchanged
+    with np.errstate(invalid='ignore'):
+        reachable = (prices_by_bar <= highs_by_bar * initial_factor.max()).any(axis=1)
+    events = {name: [] for name in ('param', 'symbol', 'bar', 'kind', 'price')}
+    if not reachable.any():
+        return {name: np.array([], dtype=float if name == 'price' else np.intp) for name in events}
+    first_bar = int(np.argmax(reachable))
+
+    alerted = np.zeros((n_params, n_symbols), dtype=bool)
+    last = np.full((n_params, n_symbols), np.nan)
+    for bar in range(first_bar, prices_by_bar.shape[0]):
+        prices = prices_by_bar[bar]
+        valid = ~np.isnan(prices)
+        with np.errstate(invalid='ignore'):
+            initial = valid & ~alerted & (prices <= highs_by_bar[bar] * initial_factor)
+            was_alerted = valid & alerted
+            falling = was_alerted & (prices < last)
+            subsequent = falling & (prices <= last * down_factor)
+            reset = was_alerted & ~falling & (prices > last * up_factor)
+
+        alerted |= initial
+        moved = initial | subsequent | reset
+        np.copyto(last, prices, where=moved)
+
+        alert = initial | subsequent
+        if alert.any():
+            params, symbols = np.nonzero(alert)
+            events['param'].append(params)
+            events['symbol'].append(symbols)
+            events['bar'].append(np.full(params.size, bar))
+            events['kind'].append(np.where(initial[params, symbols], INITIAL_DROP, SUBSEQUENT_DROP))
+            events['price'].append(prices[symbols])
+
+    return {name: np.concatenate(parts) if parts else np.array([], dtype=float if name == 'price' else np.intp)
+            for name, parts in events.items()}
+
+
+def forward_returns(close, symbols, bars, prices, horizons=DEFAULT_HORIZONS):
+    """
+    Return from each alert price to the close `h` bars later, for every horizon.
+    NaN when the horizon runs past the end of the history or lands on a missing bar.
+    """
+    close = np.asarray(close, dtype=float)
+    n_bars = close.shape[1]
+    out = {}
+    for h in horizons:
+        target = bars + h
+        inside = target < n_bars
+        future = np.full(bars.size, np.nan)
+        future[inside] = close[symbols[inside], target[inside]]
+        out[f'fwd_{h}'] = future / prices - 1
+    return out
+
+
+# --- Parameter sweeps ---
+def parameter_grid(initial_pcts, subsequent_pcts):
+    """Every (initial %, subsequent %) combination as a DataFrame with one row per pair."""
+    pairs = list(itertools.product(initial_pcts, subsequent_pcts))
+    return pd.DataFrame(pairs, columns=['initial_pct', 'subsequent_pct'])
+
+
+def _backtest_block(close, high_52_week, grid, horizons, symbol_offset):
+    events = simulate_alerts(close, high_52_week, grid['initial_pct'], grid['subsequent_pct'])
+    returns = forward_returns(close, events['symbol'], events['bar'], events['price'], horizons)
+    events['symbol'] = events['symbol'] + symbol_offset
+    return {**events, **returns}
+
+
+def _backtest_block_star(args):
+    return _backtest_block(*args)
+
+
+def run_backtest(frames, initial_pcts=(20,), subsequent_pcts=(1,), horizons=DEFAULT_HORIZONS,
+                 window='365D', processes=None, symbols_per_block=None):
+    """
+    Backtests the drop alerts on OHLCHistory() frames for a grid of parameters.
+
+    Parameters:
+    frames (dict): {symbol: OHLCHistory() frame}
+    initial_pcts, subsequent_pcts (iterable): Values of INITIAL_DROP_PERCENTAGE and
+        SUBSEQUENT_DROP_PERCENTAGE to sweep; every combination is tested
+    horizons (tuple): Forward-return horizons in bars
+    window: 52-week window, a pandas offset ('365D') or a number of bars
+    processes (int): Spread symbol blocks over this many processes (None runs in-process)
+
+    Returns:
+    tuple: (alerts DataFrame with one row per alert and its forward returns,
+            summary DataFrame from summarize())
+    """
+    symbols, index, close, high = frames_to_arrays(frames)
+    high_52_week = rolling_52_week_high(high, index, window)
+    grid = parameter_grid(initial_pcts, subsequent_pcts)
+
+    n_blocks = processes or 1
+    symbols_per_block = symbols_per_block or -(-len(symbols) // n_blocks)
+    blocks = [(close[start:start + symbols_per_block], high_52_week[start:start + symbols_per_block],
+               grid, horizons, start)
+              for start in range(0, len(symbols), symbols_per_block)]
+    if processes and len(blocks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            parts = list(executor.map(_backtest_block_star, blocks))
+    else:
+        parts = [_backtest_block(*block) for block in blocks]
+
+    columns = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+    alerts = pd.DataFrame({
+        'initial_pct': grid['initial_pct'].to_numpy()[columns['param']],
+        'subsequent_pct': grid['subsequent_pct'].to_numpy()[columns['param']],
+        'symbol': np.asarray(symbols)[columns['symbol']],
+        'timestamp': index[columns['bar']],
+        'kind': pd.Categorical.from_codes(columns['kind'] - INITIAL_DROP, categories=list(KIND_LABELS.values())),
+        'price': columns['price'],
+        **{f'fwd_{h}': columns[f'fwd_{h}'] for h in horizons},
+    })
+    alerts = alerts.sort_values(['initial_pct', 'subsequent_pct', 'timestamp', 'symbol'], ignore_index=True)
+    return alerts, summarize(alerts, horizons)
+
+
+def summarize(alerts, horizons=DEFAULT_HORIZONS):
+    """
+    Per (initial %, subsequent %, kind): number of alerts and symbols alerted, mean and
+    median forward return and the share of positive forward returns for each horizon.
+    """
+    keys = ['initial_pct', 'subsequent_pct', 'kind']
+    # 1.0 / 0.0 for a positive / non-positive return, NaN where there is none, so the
+    # group mean is the hit rate over alerts that have a forward return
+    hits = pd.DataFrame({f'fwd_{h}': (alerts[f'fwd_{h}'] > 0).where(alerts[f'fwd_{h}'].notna()).astype(float)
+                         for h in horizons})
+    grouped = alerts.groupby(keys, observed=True)
+    hit_rates = hits.groupby([alerts[key] for key in keys], observed=True).mean()
+    summary = grouped.agg(alerts=('symbol', 'size'), symbols=('symbol', 'nunique'))
+    for h in horizons:
+        column = f'fwd_{h}'
+        summary[f'mean_{column}'] = grouped[column].mean()
+        summary[f'median_{column}'] = grouped[column].median()
+        summary[f'hit_rate_{column}'] = hit_rates[column]
+    return summary
+
+
+# --- Reference replay ---
+def replay_with_store(close, high_52_week, initial_pct=20, subsequent_pct=1):
+    """
+    Replays the history through AlertStateStore.evaluate(), one tick per bar, exactly as
+    the informer's loop would. Slower; kept to check simulate_alerts() against.
+
+    Returns:
+    list: (symbol index, bar, kind, price) per alert.
+    """
+    n_symbols, n_bars = close.shape
+    store = AlertStateStore(range(n_symbols), initial_pct, subsequent_pct)
+    ids = np.arange(n_symbols)
+    store.initialize(ids, high_52_week[:, 0], close[:, 0])
+    events = []
+    for bar in range(n_bars):
+        alerts = store.evaluate(ids, close[:, bar], highs=high_52_week[:, bar])
+        events.extend((int(i), bar, int(k), float(p)) for i, k, p in zip(alerts['ids'], alerts['kind'], alerts['price']))
+    return events
+
+
+# Example usage: ten years of synthetic daily bars for 50 symbols, swept over a grid
+if __name__ == "__main__":
+    from synthetic_market_data import synthetic_ohlc_frames
+
+    frames = synthetic_ohlc_frames(n_symbols=50, n_bars=2500, interval='1d')
+    symbols, index, close, high = frames_to_arrays(frames)
+    high_52_week = rolling_52_week_high(high, index)
+
+    start = time.perf_counter()
+    reference = replay_with_store(close, high_52_week)
+    store_time = time.perf_counter() - start
+    start = time.perf_counter()
+    events = simulate_alerts(close, high_52_week, [20], [1])
+    batch_time = time.perf_counter() - start
+    batch = list(zip(events['symbol'].tolist(), events['bar'].tolist(), events['kind'].tolist(), events['price'].tolist()))
+    print(f"Matches AlertStateStore replay: {sorted(batch) == sorted(reference)} ({len(batch)} alerts) | "
+          f"store {store_time * 1000:.0f} ms vs matrix {batch_time * 1000:.0f} ms")
+
+    initial_pcts = [10, 15, 20, 25, 30]
+    subsequent_pcts = [0.5, 1, 2, 5]
+    start = time.perf_counter()
+    alerts, summary = run_backtest(frames, initial_pcts, subsequent_pcts, processes=2)
+    print(f"Swept {len(initial_pcts) * len(subsequent_pcts)} parameter pairs over {len(frames)} symbols x "
+          f"{len(index)} bars in {time.perf_counter() - start:.2f}s: {len(alerts):,} alerts")
+    # Every pair of a sweep must give the same alerts as replaying that pair on its own
+    sweep = simulate_alerts(close, high_52_week, [10, 40], [1, 1])
+    single = simulate_alerts(close, high_52_week, [10], [1])
+    print(f"10% alerts in a [10, 40] sweep: {(sweep['param'] == 0).sum()} | on their own: {len(single['bar'])}")
+    pd.set_option('display.width', 200)
+    print(summary[['alerts', 'symbols', 'mean_fwd_20', 'hit_rate_fwd_20', 'mean_fwd_60', 'hit_rate_fwd_60']]
+          .round(4).to_string())
@@ -0,0 +1,386 @@
+# Rolling 52-week high / low index maintained locally from daily OHLC bars.
+# Every symbol keeps two monotonic deques (one for the high, one for the low) in NumPy
+# ring buffers: the front of the high deque is always the highest high of the trailing
+# window, entries that leave the window drop off the front and entries a new bar
+# dominates drop off the back. Both ends are located with a binary search run for all
+# symbols at once, so one new bar (or live price) for thousands of tickers is a handful
+# of array operations, and bulk queries are a single gather.
+
+import datetime
+import time
+
+import numpy as np
+import pandas as pd
+
+WINDOW_DAYS = 365          # same trailing window as drop_alert_backtest.rolling_52_week_high('365D')
+INITIAL_CAPACITY = 16      # deque slots per symbol; doubled when any symbol needs more
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def day_number(day=None):
+    """Days since 1970-01-01 for a date, timestamp or array of them (today if None)."""
+    if day is None:
+        day = datetime.date.today()
+    if isinstance(day, (pd.DatetimeIndex, pd.Series)):
+        day = day.tz_localize(None) if getattr(day, 'tz', None) is not None else day
+        return (np.asarray(day, dtype='datetime64[D]') - EPOCH).astype(np.int64)
+    if isinstance(day, (int, np.integer)):
+        return int(day)
+    if isinstance(day, np.ndarray) and day.dtype.kind in 'iu':
+        return day.astype(np.int64)
+    if isinstance(day, pd.Timestamp) and day.tz is not None:
+        day = day.tz_localize(None)
+    return (np.asarray(day, dtype='datetime64[D]') - EPOCH).astype(np.int64)
+
+
+# --- Monotonic deques in ring buffers ---
+class _MonotonicDeques:
+    """
+    One non-increasing deque per row, for a trailing-window maximum. Row r's live entries
+    are values[r, (head[r] + k) % capacity] for k in [0, length[r]), oldest first, and
+    their days strictly increase, so a row never holds more than window_days entries.
+    """
+
+    def __init__(self, rows, capacity=INITIAL_CAPACITY):
+        self.capacity = capacity
+        self.values = np.full((rows, capacity), np.nan)
+        self.days = np.zeros((rows, capacity), dtype=np.int32)
+        self.head = np.zeros(rows, dtype=np.intp)
+        self.length = np.zeros(rows, dtype=np.intp)
+
+    def add_rows(self, rows):
+        extra = rows - self.values.shape[0]
+        if extra > 0:
+            self.values = np.vstack([self.values, np.full((extra, self.capacity), np.nan)])
+            self.days = np.vstack([self.days, np.zeros((extra, self.capacity), dtype=np.int32)])
+            self.head = np.concatenate([self.head, np.zeros(extra, dtype=np.intp)])
+            self.length = np.concatenate([self.length, np.zeros(extra, dtype=np.intp)])
+
+    def _grow(self):
+        """Doubles the ring size, unrolling every row so its deque starts at slot 0."""
+        slots = (self.head[:, None] + np.arange(self.capacity)[None, :]) % self.capacity
+        rows = np.arange(self.values.shape[0])[:, None]
+        values = np.full((len(self.head), self.capacity * 2), np.nan)
+        days = np.zeros((len(self.head), self.capacity * 2), dtype=np.int32)
+        values[:, :self.capacity] = self.values[rows, slots]
+        days[:, :self.capacity] = self.days[rows, slots]
+        self.values, self.days = values, days
+        self.head[:] = 0
+        self.capacity *= 2
+
+    def _prefix_length(self, rows, predicate):
+        """
+        For each row, the number of leading entries for which predicate(slots) holds.
+        The predicate must be true on a prefix of the deque; the search is a binary
+        search over all rows at once.
+        """
+        lo = np.zeros(rows.size, dtype=np.intp)
+        hi = self.length[rows].copy()
+        head = self.head[rows]
+        active = lo < hi
+        while active.any():
+            mid = (lo + hi) // 2
+            slots = (head + mid) % self.capacity
+            holds = predicate(slots)
+            lo = np.where(active & holds, mid + 1, lo)
+            hi = np.where(active & ~holds, mid, hi)
+            active = lo < hi
+        return lo
+
+    def expire(self, rows, cutoff):
+        """Drops entries dated on or before `cutoff` (scalar or per row) from the front."""
+        cutoff = np.broadcast_to(cutoff, rows.shape)
+        expired = self._prefix_length(rows, lambda slots: self.days[rows, slots] <= cutoff)
+        self.head[rows] = (self.head[rows] + expired) % self.capacity
+        self.length[rows] -= expired
+
+    def push(self, rows, days, values):
+        """Appends one (day, value) per row (rows unique, days not before the row's last entry)."""
+        dominated = self._prefix_length(rows, lambda slots: self.values[rows, slots] > values)
+        self.length[rows] = dominated
+        # A larger value already recorded for the same day makes the new one redundant
+        back = (self.head[rows] + dominated - 1) % self.capacity
+        append = (dominated == 0) | (self.days[rows, back] != days)
+        rows, days, values = rows[append], days[append], values[append]
+        if rows.size and (self.length[rows] == self.capacity).any():
+            self._grow()
+        slots = (self.head[rows] + self.length[rows]) % self.capacity
+        self.values[rows, slots] = values
+        self.days[rows, slots] = days
+        self.length[rows] += 1
+
+    def fill(self, rows, days, values, cutoff):
+        """
+        Builds the deques of empty rows straight from (bars x rows) history instead of
+        pushing bar by bar: an entry survives if it is dated after the row's `cutoff`
+        and strictly above every later value.
+        """
+        masked = np.where(np.isnan(values), -np.inf, values)
+        later_max = np.full_like(masked, -np.inf)
+        later_max[:-1] = np.maximum.accumulate(masked[::-1], axis=0)[::-1][1:]
+        keep = (masked > later_max) & (days[:, None] > cutoff[None, :])
+        counts = keep.sum(axis=0)
+        while counts.size and counts.max() > self.capacity:
+            self._grow()
+        bar, column = np.nonzero(keep)
+        position = np.cumsum(keep, axis=0)[bar, column] - 1
+        self.values[rows[column], position] = values[bar, column]
+        self.days[rows[column], position] = days[bar]
+        self.head[rows] = 0
+        self.length[rows] = counts
+
+    def front(self, rows):
+        values = self.values[rows, self.head[rows]]
+        return np.where(self.length[rows] > 0, values, np.nan)
+
+    def entries(self, row):
+        slots = (self.head[row] + np.arange(self.length[row])) % self.capacity
+        return self.days[row, slots], self.values[row, slots]
+
+
+# --- Index ---
+class ExtremesIndex:
+    """
+    Trailing 52-week high and low for many tickers, updated one bar at a time.
+
+    Tickers get integer ids like AlertStateStore. update() takes one daily bar (or an
+    intraday price, which counts as part of that day's bar) per id; high() and low()
+    return the extremes over the WINDOW_DAYS days ending on the given day, that day
+    included, matching a pandas rolling('365D') max / min over the daily bars.
+    """
+
+    def __init__(self, tickers=(), window_days=WINDOW_DAYS):
+        self.window_days = window_days
+        self.tickers = []
+        self.ticker_ids = {}
+        self.size = 0
+        self._highs = _MonotonicDeques(0)
+        self._lows = _MonotonicDeques(0)   # holds negated lows, so its max is the lowest low
+        self.last_day = np.zeros(0, dtype=np.int64)
+        self.ids(tickers)
+
+    def add_ticker(self, ticker):
+        """Registers a ticker and returns its id. Existing tickers keep their id."""
+        return int(self.ids([ticker])[0])
+
+    def ids(self, tickers):
+        """Maps tickers to ids, registering any that are new (storage grows once per call)."""
+        tickers = list(tickers)
+        for ticker in tickers:
+            if ticker not in self.ticker_ids:
+                self.ticker_ids[ticker] = len(self.tickers)
+                self.tickers.append(ticker)
+        if len(self.tickers) > self.size:
+            self.size = len(self.tickers)
+            self._highs.add_rows(self.size)
+            self._lows.add_rows(self.size)
+            no_bars = np.full(self.size - self.last_day.size, np.iinfo(np.int64).min)
+            self.last_day = np.concatenate([self.last_day, no_bars])
+        return np.array([self.ticker_ids[ticker] for ticker in tickers], dtype=np.intp)
+
+    def update(self, ids, day, highs, lows=None):
+        """
+        Adds one bar per id (ids unique). NaN values are skipped.
+
+        Parameters:
+        ids (array-like): Ticker ids
+        day: Date of the bars (date, timestamp or day number), scalar or one per id; must
+             not be earlier than the previous bar of each ticker
+        highs, lows (array-like): Bar highs and lows; lows default to highs, so a live
+             price can be passed as both
+        """
+        ids = np.asarray(ids, dtype=np.intp)
+        days = np.broadcast_to(day_number(day), ids.shape).astype(np.int64)
+        highs = np.broadcast_to(np.asarray(highs, dtype=float), ids.shape)
+        lows = highs if lows is None else np.broadcast_to(np.asarray(lows, dtype=float), ids.shape)
+        if (days < self.last_day[ids]).any():
+            raise ValueError("bars must be added in date order for each ticker")
+        self.last_day[ids] = days
+
+        cutoff = days - self.window_days
+        for deques, values in ((self._highs, highs), (self._lows, -lows)):
+            valid = ~np.isnan(values)
+            rows = ids[valid]
+            deques.expire(rows, cutoff[valid])
+            deques.push(rows, days[valid].astype(np.int32), values[valid])
+
+    def observe(self, ids, prices, day=None):
+        """Folds live prices into today's bar (or `day`'s), so a new high shows up at once."""
+        self.update(ids, day_number(day), prices)
+
+    def _query(self, deques, ids, day):
+        ids = np.arange(self.size) if ids is None else np.asarray(ids, dtype=np.intp)
+        if day is not None:
+            deques.expire(ids, day_number(day) - self.window_days)
+        return deques.front(ids)
+
+    def high(self, ids=None, day=None):
+        """52-week highs for the ids (all tickers if None), as of `day` if given, else the last update."""
+        return self._query(self._highs, ids, day)
+
+    def low(self, ids=None, day=None):
+        """52-week lows for the ids (all tickers if None), as of `day` if given, else the last update."""
+        return -self._query(self._lows, ids, day)
+
+    # --- Bulk loading ---
+    def load_arrays(self, tickers, days, highs, lows):
+        """
+        Replays aligned daily bars into the index.
+
+        Parameters:
+        tickers (list): Column order of the matrices
+        days: Dates of the rows (DatetimeIndex or day numbers), increasing
+        highs, lows (ndarray): (days x tickers) matrices, NaN where a ticker has no bar
+        """
+        ids = self.ids(tickers)
+        days = np.asarray(day_number(days), dtype=np.int64)
+        highs = np.asarray(highs, dtype=float)
+        lows = np.asarray(lows, dtype=float)
+
+        # Tickers with no bars yet get their deques built directly from the whole history
+        fresh = self.last_day[ids] == np.iinfo(np.int64).min
+        if fresh.any() and days.size:
+            present = ~np.isnan(highs[:, fresh])
+            last_row = days.size - 1 - np.argmax(present[::-1], axis=0)
+            last_day = np.where(present.any(axis=0), days[last_row], np.iinfo(np.int64).min)
+            rows = ids[fresh]
+            self._highs.fill(rows, days, highs[:, fresh], last_day - self.window_days)
+            self._lows.fill(rows, days, -lows[:, fresh], last_day - self.window_days)
+            self.last_day[rows] = last_day
+
+        # Tickers that already have bars are replayed one bar at a time
+        for i, day in enumerate(days):
+            present = ~fresh & ~np.isnan(highs[i])
+            if present.any():
+                self.update(ids[present], day, highs[i, present], lows[i, present])
+
+    def load_frames(self, frames):
+        """Loads {ticker: OHLCHistory-shaped daily frame} (lowercase 'high' / 'low' columns)."""
+        tickers = list(frames)
+        highs = pd.concat({t: frames[t]['high'] for t in tickers}, axis=1).sort_index()
+        lows = pd.concat({t: frames[t]['low'] for t in tickers}, axis=1).reindex(highs.index)
+        self.load_arrays(tickers, highs.index, highs.to_numpy(dtype=float), lows.to_numpy(dtype=float))
+
+    def load_cache(self, cache, tickers, end=None, lookback_days=None):
+        """
+        Loads the trailing window of daily bars for the tickers from an OHLCCache,
+        downloading only what the cache does not already hold.
+
+        Returns:
+        list: Tickers no daily bars could be loaded for.
+        """
+        end = pd.Timestamp(end or datetime.date.today()).normalize() + pd.Timedelta(days=1)
+        start = end - pd.Timedelta(days=(lookback_days or self.window_days) + 1)
+        frames = {}
+        for ticker in tickers:
+            try:
+                frame = cache.read(ticker, '1d', start, end)
+            except Exception as e:
+                print(f"Error loading daily bars for {ticker}: {e}")
+                continue
+            if len(frame):
+                frames[ticker] = frame
+        if frames:
+            self.load_frames(frames)
+        return sorted(set(tickers) - set(frames))
+
+    # --- Storage ---
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for d in (self._highs, self._lows) for a in (d.values, d.days, d.head, d.length))
+
+    def save(self, path):
+        """Writes the live deque entries only (no empty ring slots) to a compressed .npz file."""
+        arrays = {'tickers': np.array(self.tickers, dtype=str), 'window_days': self.window_days,
+                  'last_day': self.last_day}
+        for name, deques in (('high', self._highs), ('low', self._lows)):
+            entries = [deques.entries(row) for row in range(self.size)]
+            arrays[f'{name}_length'] = deques.length
+            arrays[f'{name}_days'] = np.concatenate([d for d, _ in entries] or [np.zeros(0, np.int32)])
+            arrays[f'{name}_values'] = np.concatenate([v for _, v in entries] or [np.zeros(0)])
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        index = cls(data['tickers'].tolist(), int(data['window_days']))
+        index.last_day = data['last_day'].astype(np.int64)
+        for name, deques in (('high', index._highs), ('low', index._lows)):
+            length = data[f'{name}_length']
+            while deques.capacity < max(int(length.max(initial=0)), 1):
+                deques._grow()
+            starts = np.concatenate([[0], np.cumsum(length)])
+            for row in range(index.size):
+                n = int(length[row])
+                deques.values[row, :n] = data[f'{name}_values'][starts[row]:starts[row] + n]
+                deques.days[row, :n] = data[f'{name}_days'][starts[row]:starts[row] + n]
+            deques.length[:] = length
+        return index
+
+
+# --- Parity and benchmark ---
+def parity_check(n_symbols=50, n_bars=600, seed=0):
+    """
+    Replays synthetic daily bars one at a time and compares the index after every bar
+    with a pandas rolling('365D') max / min. Returns the largest absolute difference.
+    """
+    from synthetic_market_data import synthetic_ohlc_frames
+
+    frames = synthetic_ohlc_frames(n_symbols, n_bars, seed=seed)
+    tickers = list(frames)
+    highs = pd.concat({t: frames[t]['high'] for t in tickers}, axis=1)
+    lows = pd.concat({t: frames[t]['low'] for t in tickers}, axis=1)
+    # Knock out some bars so tickers have gaps
+    holes = np.random.default_rng(seed).random(highs.shape) < 0.05
+    highs = highs.mask(holes)
+    lows = lows.mask(holes)
+    expected_high = highs.rolling(f'{WINDOW_DAYS}D', min_periods=1).max().to_numpy()
+    expected_low = lows.rolling(f'{WINDOW_DAYS}D', min_periods=1).min().to_numpy()
+
+    index = ExtremesIndex(tickers)
+    ids = index.ids(tickers)
+    days = day_number(highs.index)
+    h, l = highs.to_numpy(), lows.to_numpy()
+    worst = 0.0
+    for i, day in enumerate(days):
+        index.update(ids, day, h[i], l[i])
+        got_high, got_low = index.high(ids, day), index.low(ids, day)
+        known = ~np.isnan(expected_high[i])
+        worst = max(worst, np.abs(got_high[known] - expected_high[i, known]).max(initial=0),
+                    np.abs(got_low[known] - expected_low[i, known]).max(initial=0))
+        if np.isnan(got_high[known]).any():
+            return float('inf')
+    return worst
+
+
+def benchmark_extremes(n_symbols=(1_000, 5_000), n_bars=260):
+    """Prints bulk-load, one-bar update and bulk query times."""
+    from synthetic_market_data import synthetic_ohlc_frames
+
+    print(f"--- 52-week extremes index ({n_bars} daily bars) ---")
+    for n in n_symbols:
+        frames = synthetic_ohlc_frames(n, n_bars + 1)
+        tickers = list(frames)
+        highs = np.column_stack([frames[t]['high'].to_numpy() for t in tickers])
+        lows = np.column_stack([frames[t]['low'].to_numpy() for t in tickers])
+        days = day_number(frames[tickers[0]].index)
+
+        index = ExtremesIndex()
+        start = time.perf_counter()
+        index.load_arrays(tickers, days[:-1], highs[:-1], lows[:-1])
+        loaded = time.perf_counter() - start
+        ids = index.ids(tickers)
+        start = time.perf_counter()
+        index.update(ids, days[-1], highs[-1], lows[-1])
+        updated = time.perf_counter() - start
+        start = time.perf_counter()
+        index.high(ids)
+        queried = time.perf_counter() - start
+        print(f"{n:>6,} symbols: load {loaded * 1000:>8.1f} ms | one bar {updated * 1000:>6.2f} ms | "
+              f"query {queried * 1000:>6.3f} ms | {index.nbytes / n:>6,.0f} bytes/symbol")
+
+
+# Example usage: parity with pandas, then throughput
+if __name__ == "__main__":
+    print(f"Largest difference from pandas rolling('{WINDOW_DAYS}D'): {parity_check():.3g}")
+    benchmark_extremes()
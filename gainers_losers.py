@@ -0,0 +1,226 @@
+# Vectorized top gainers / losers ranking for the F&O list.
+# Open and last close for every ticker come straight out of the yf.download MultiIndex
+# frame as NumPy arrays (or, minute after minute, from OpenLastFeed's incremental bars),
+# the top and bottom N are picked with argpartition, and the IncrementalRanker only
+# re-ranks the tickers whose last price changed since the last tick.
+
+import numpy as np
+import pandas as pd
+
+
+# --- Extraction ---
+def field_matrix(data, field, tickers):
+    """
+    Returns a (bars x tickers) array of one price field from a yf.download frame,
+    whichever level of the column MultiIndex the field names are on. Tickers missing
+    from the download come back as all-NaN columns.
+    """
+    level = 0 if field in data.columns.get_level_values(0) else 1
+    return data.xs(field, axis=1, level=level).reindex(columns=tickers).to_numpy(dtype=float)
+
+
+def first_valid(matrix):
+    """First non-NaN value of every column (NaN if the column is empty)."""
+    valid = ~np.isnan(matrix)
+    rows = np.argmax(valid, axis=0)
+    values = matrix[rows, np.arange(matrix.shape[1])]
+    return np.where(valid.any(axis=0), values, np.nan)
+
+
+def last_valid(matrix):
+    """Last non-NaN value of every column (NaN if the column is empty)."""
+    return first_valid(matrix[::-1])
+
+
+def extract_open_last(data, tickers):
+    """
+    Pulls the session open and the latest close for every ticker in one step.
+
+    Partial data is handled per ticker: the open is the first bar with an Open and the
+    last price is the latest bar with a Close.
+
+    Returns:
+    tuple: (open_prices, last_prices) arrays aligned with tickers.
+    """
+    return first_valid(field_matrix(data, 'Open', tickers)), last_valid(field_matrix(data, 'Close', tickers))
+
+
+def fetch_open_last(tickers):
+    """
+    Session open and latest price for every ticker: read from the shared quote snapshot
+    when quote_snapshot.py is running, otherwise from one 1-minute yf.download.
+
+    Returns:
+    tuple: (open_prices, last_prices) arrays aligned with tickers.
+    """
+    from quote_snapshot import SnapshotReader, snapshot_available
+
+    if snapshot_available():
+        reader = SnapshotReader()
+        snapshot = reader.read(tickers)
+        reader.close()
+        return snapshot['open'], snapshot['last']
+
+    import yfinance as yf
+
+    data = yf.download(tickers=list(tickers), period='1d', interval='1m', group_by='ticker', threads=True)
+    if data is None or data.empty:
+        missing = np.full(len(tickers), np.nan)
+        return missing, missing.copy()
+    return extract_open_last(data, tickers)
+
+
+class OpenLastFeed:
+    """
+    Session open and latest price for every ticker, refreshed once per call.
+
+    Reads the shared quote snapshot when quote_snapshot.py is running. Otherwise the
+    first call downloads today's 1-minute bars and later calls only download the minutes
+    from the newest complete one on, folding complete minutes into a running daily bar
+    (bar_aggregation.StreamingBars) instead of re-downloading the whole session. The
+    newest minute is still forming, so it is held aside and downloaded again next call
+    rather than folded with values that will still change.
+    """
+
+    def __init__(self, tickers):
+        from bar_aggregation import StreamingBars
+
+        self.tickers = list(tickers)
+        self.bars = StreamingBars(self.tickers, ('1d',))
+        self.last_minute = None   # newest minute folded into self.bars
+        self.forming = None       # (timestamp, {field: array}) of the newest, still-forming minute
+
+    def fetch(self):
+        """
+        Returns:
+        tuple: (open_prices, last_prices) arrays aligned with tickers.
+        """
+        from bar_aggregation import FIELDS, SESSION_TZ, fetch_minute_panel
+        from quote_snapshot import snapshot_available
+
+        if snapshot_available():
+            return fetch_open_last(self.tickers)
+
+        index, panel = fetch_minute_panel(self.tickers, since=self.last_minute)
+        if self.last_minute is not None and len(index):
+            new = index > self.last_minute
+            index, panel = index[new], {field: panel[field][:, new] for field in FIELDS}
+        if len(index):
+            self.bars.replay(index[:-1], {field: panel[field][:, :-1] for field in FIELDS})
+            if len(index) > 1:
+                self.last_minute = index[-2]
+            self.forming = index[-1], {field: panel[field][:, -1] for field in FIELDS}
+
+        missing = np.full(len(self.tickers), np.nan)
+        current = self.bars.current('1d')
+        day_open, day_close = (current[1]['open'], current[1]['close']) if current else (missing, missing)
+        if self.forming is None:
+            return day_open.copy(), day_close.copy()
+        minute = self.forming[1]
+        stamp = pd.Timestamp(self.forming[0])
+        stamp = stamp.tz_convert(SESSION_TZ) if stamp.tzinfo else stamp.tz_localize(SESSION_TZ)
+        if current is not None and stamp.date() != current[0].date():
+            day_open, day_close = missing, missing   # the forming minute opened a new session
+        return (np.where(np.isnan(day_open), minute['open'], day_open),
+                np.where(np.isnan(minute['close']), day_close, minute['close']))
+
+
+def change_percentage(open_prices, last_prices):
+    """Percentage change from open; NaN where either price is missing or the open is not positive."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = (last_prices - open_prices) / open_prices * 100
+    return np.where(open_prices > 0, change, np.nan)
+
+
+# --- Ranking ---
+def top_bottom_indices(values, n):
+    """
+    Indices of the n largest and n smallest finite values, each sorted from the
+    extreme inwards, without sorting the whole array.
+    """
+    finite = np.flatnonzero(np.isfinite(values))
+    n = min(n, finite.size)
+    if n == 0:
+        return finite, finite
+    finite_values = values[finite]
+    if n < finite.size:
+        top = finite[np.argpartition(-finite_values, n - 1)[:n]]
+        bottom = finite[np.argpartition(finite_values, n - 1)[:n]]
+    else:
+        top = bottom = finite
+    top = top[np.argsort(-values[top], kind='stable')]
+    bottom = bottom[np.argsort(values[bottom], kind='stable')]
+    return top, bottom
+
+
+def ranking_frame(tickers, open_prices, last_prices, change, indices):
+    """Builds the printed table: symbol without the .NS suffix, open, last price and change %."""
+    tickers = np.asarray(tickers)
+    return pd.DataFrame({
+        'symbol': [str(ticker).replace('.NS', '') for ticker in tickers[indices]],
+        'open': np.round(open_prices[indices], 2),
+        'last_price': np.round(last_prices[indices], 2),
+        'change_pct': np.round(change[indices], 2),
+    })
+
+
+def top_gainers_losers(tickers, open_prices, last_prices, n=10):
+    """Returns (top_gainers, top_losers) DataFrames for aligned open/last price arrays."""
+    change = change_percentage(open_prices, last_prices)
+    top, bottom = top_bottom_indices(change, n)
+    return (ranking_frame(tickers, open_prices, last_prices, change, top),
+            ranking_frame(tickers, open_prices, last_prices, change, bottom))
+
+
+# --- Incremental mode ---
+class IncrementalRanker:
+    """
+    Keeps every ticker ordered by change % across ticks.
+
+    update() only recomputes the change for tickers whose last price moved and slots
+    them back into the existing order with a binary search, instead of re-sorting the
+    whole list every minute.
+    """
+
+    def __init__(self, tickers, open_prices, last_prices):
+        self.tickers = np.asarray(tickers)
+        self.open_prices = np.array(open_prices, dtype=float)
+        self.last_prices = np.array(last_prices, dtype=float)
+        self.change = change_percentage(self.open_prices, self.last_prices)
+        ranked = np.flatnonzero(np.isfinite(self.change))
+        # Ascending by change %, so losers sit at the front and gainers at the back
+        self.order = ranked[np.argsort(self.change[ranked], kind='stable')]
+
+    def update(self, last_prices, open_prices=None):
+        """
+        Applies a new tick. NaN prices mean "no new data" and leave a ticker unchanged.
+
+        Returns:
+        ndarray: indices of the tickers that were re-ranked.
+        """
+        last_prices = np.asarray(last_prices, dtype=float)
+        changed = ~np.isnan(last_prices) & (last_prices != self.last_prices)
+        if open_prices is not None:
+            open_prices = np.asarray(open_prices, dtype=float)
+            changed |= ~np.isnan(open_prices) & (open_prices != self.open_prices)
+            self.open_prices = np.where(np.isnan(open_prices), self.open_prices, open_prices)
+        ids = np.flatnonzero(changed)
+        if ids.size == 0:
+            return ids
+
+        self.last_prices[ids] = np.where(np.isnan(last_prices[ids]), self.last_prices[ids], last_prices[ids])
+        self.change[ids] = change_percentage(self.open_prices[ids], self.last_prices[ids])
+
+        keep = self.order[~changed[self.order]]
+        reinsert = ids[np.isfinite(self.change[ids])]
+        reinsert = reinsert[np.argsort(self.change[reinsert], kind='stable')]
+        positions = np.searchsorted(self.change[keep], self.change[reinsert], side='right')
+        self.order = np.insert(keep, positions, reinsert)
+        return ids
+
+    def top(self, n=10):
+        """Returns (top_gainers, top_losers) DataFrames from the maintained order."""
+        gainers = self.order[::-1][:n]
+        losers = self.order[:n]
+        return (ranking_frame(self.tickers, self.open_prices, self.last_prices, self.change, gainers),
+                ranking_frame(self.tickers, self.open_prices, self.last_prices, self.change, losers))
@@ -0,0 +1,351 @@
+# Asyncio scheduler for the periodic jobs (price checks, gainers/losers, RSS polling).
+# Runs are aligned to wall-clock boundaries (every 60 s means on the minute) and computed
+# from the schedule itself, so they never drift. A run that is still going when its next
+# boundary arrives either drops that tick (SKIP) or folds every missed tick into one
+# follow-up run (COALESCE), per job. Blocking callables (yfinance, feedparser, requests)
+# run on a bounded thread pool so one slow fetch never stalls the other jobs, and every
+# run reports its lag (start time minus scheduled time) and duration through metrics.py.
+# VirtualClock replaces the wall clock in tests: time only moves when advance() is called.
+
+import asyncio
+import functools
+import heapq
+import itertools
+import math
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+from metrics import JOB_LAG_SECONDS, JOB_RUNS_DROPPED, record_cycle
+
+SKIP = 'skip'          # drop ticks that arrive while the previous run is still going
+COALESCE = 'coalesce'  # run once more right after it finishes, however many ticks were missed
+POLICIES = (SKIP, COALESCE)
+DEFAULT_MAX_WORKERS = 4
+
+
+# --- Clocks ---
+class SystemClock:
+    """Wall clock (epoch seconds) with an asyncio sleep until an absolute time."""
+
+    def time(self):
+        return time.time()
+
+    async def sleep_until(self, when):
+        # asyncio sleeps on the monotonic clock and can wake a hair early; re-check the wall clock
+        while (remaining := when - self.time()) > 0:
+            await asyncio.sleep(remaining)
+
+    async def sleep(self, seconds):
+        await self.sleep_until(self.time() + seconds)
+
+
+class VirtualClock:
+    """
+    Manually advanced clock for tests and simulations.
+
+    Sleepers wake in time order as advance() moves the clock past their deadlines; those
+    due at the same instant wake together and get a few event-loop iterations to run
+    before time moves on.
+    Async jobs simulate work with `await clock.sleep(seconds)`.
+    """
+
+    SETTLE_ITERATIONS = 20
+
+    def __init__(self, start=0.0):
+        self.now = float(start)
+        self.sleepers = []
+        self.counter = itertools.count()
+
+    def time(self):
+        return self.now
+
+    async def sleep_until(self, when):
+        if when <= self.now:
+            await asyncio.sleep(0)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.sleepers, (when, next(self.counter), future))
+        await future
+
+    async def sleep(self, seconds):
+        await self.sleep_until(self.now + seconds)
+
+    async def _settle(self):
+        for _ in range(self.SETTLE_ITERATIONS):
+            await asyncio.sleep(0)
+
+    async def advance(self, seconds):
+        """Moves the clock forward, waking every sleeper whose deadline is passed on the way."""
+        target = self.now + seconds
+        await self._settle()
+        while self.sleepers and self.sleepers[0][0] <= target:
+            # Wake every sleeper due at the same instant together, then settle once
+            when = self.sleepers[0][0]
+            self.now = max(self.now, when)
+            while self.sleepers and self.sleepers[0][0] == when:
+                future = heapq.heappop(self.sleepers)[2]
+                if not future.done():  # skip cancelled sleepers
+                    future.set_result(None)
+            await self._settle()
+        self.now = target
+
+
+class InlineExecutor(Executor):
+    """Runs submitted callables immediately in the calling thread (deterministic tests)."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+# --- Jobs ---
+class Job:
+    """
+    One periodic job and its run statistics.
+
+    Parameters:
+    name (str): Label used in logs and metrics
+    func (callable): Coroutine function or blocking callable, called with `args`
+    interval (float): Seconds between runs
+    offset (float): Seconds after each interval boundary to run at (e.g. 5 for hh:mm:05)
+    policy (str): SKIP or COALESCE, for ticks that arrive while a run is still going
+    blocking (bool): Run `func` on the scheduler's thread pool (default: not a coroutine function)
+    """
+
+    def __init__(self, name, func, interval, args=(), offset=0.0, policy=SKIP, blocking=None, run_immediately=False):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, got {policy!r}")
+        if interval <= 0:
+            raise ValueError(f"interval must be positive, got {interval}")
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.interval = float(interval)
+        self.offset = float(offset)
+        self.policy = policy
+        self.blocking = not asyncio.iscoroutinefunction(func) if blocking is None else blocking
+        self.run_immediately = run_immediately
+
+        self.running = False
+        self.pending_since = None   # scheduled time of the first coalesced tick
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.coalesced = 0
+        self.last_lag = None
+        self.max_lag = 0.0
+        self.last_duration = None
+        self.total_duration = 0.0
+
+        self.lag_timer = JOB_LAG_SECONDS.labels(job=name)
+
+    def next_boundary(self, now):
+        """First aligned time at or after `now`."""
+        return math.ceil((now - self.offset) / self.interval) * self.interval + self.offset
+
+    def boundary_after(self, when):
+        """First aligned time strictly after `when`."""
+        return (math.floor((when - self.offset) / self.interval) + 1) * self.interval + self.offset
+
+    def stats(self):
+        return {
+            'job': self.name,
+            'runs': self.runs,
+            'failures': self.failures,
+            'skipped': self.skipped,
+            'coalesced': self.coalesced,
+            'last_lag': self.last_lag,
+            'max_lag': self.max_lag,
+            'last_duration': self.last_duration,
+            'mean_duration': self.total_duration / self.runs if self.runs else None,
+        }
+
+
+class Scheduler:
+    """
+    Runs periodic jobs on an asyncio event loop.
+
+    Parameters:
+    clock: SystemClock (default) or VirtualClock
+    max_workers (int): Threads in the pool that blocking jobs run on
+    executor (Executor): Use this pool instead of creating one (e.g. InlineExecutor in tests)
+    """
+
+    def __init__(self, clock=None, max_workers=DEFAULT_MAX_WORKERS, executor=None):
+        self.clock = clock or SystemClock()
+        self.owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self.jobs = []
+        self.drivers = []
+        self.active_runs = set()
+        self.stopped = None
+
+    def every(self, interval, func, *args, name=None, offset=0.0, policy=SKIP, blocking=None, run_immediately=False):
+        """
+        Adds a job that runs on every `interval`-second wall-clock boundary.
+
+        Returns:
+        Job: The job, whose stats() are updated after every run.
+        """
+        job = Job(name or getattr(func, '__name__', 'job'), func, interval, args, offset, policy, blocking,
+                  run_immediately)
+        self.jobs.append(job)
+        return job
+
+    # --- Running ---
+    async def _drive(self, job):
+        now = self.clock.time()
+        scheduled = now if job.run_immediately else job.next_boundary(now)
+        while True:
+            await self.clock.sleep_until(scheduled)
+            if not job.running:
+                self._start(job, scheduled)
+            elif job.policy == SKIP:
+                job.skipped += 1
+                JOB_RUNS_DROPPED.inc(job=job.name, policy=SKIP)
+            else:
+                if job.pending_since is None:
+                    job.pending_since = scheduled
+                else:
+                    job.coalesced += 1
+                    JOB_RUNS_DROPPED.inc(job=job.name, policy=COALESCE)
+            # Next boundary strictly after now (and after an unaligned run_immediately tick),
+            # computed from the grid rather than the wake-up time so it never drifts
+            scheduled = job.boundary_after(max(scheduled, self.clock.time()))
+
+    def _start(self, job, scheduled):
+        job.running = True
+        task = asyncio.ensure_future(self._run(job, scheduled))
+        self.active_runs.add(task)
+        task.add_done_callback(self.active_runs.discard)
+
+    async def _run(self, job, scheduled):
+        start = self.clock.time()
+        job.last_lag = start - scheduled
+        job.max_lag = max(job.max_lag, job.last_lag)
+        job.lag_timer.observe(job.last_lag)
+        try:
+            if job.blocking:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(self.executor, functools.partial(job.func, *job.args))
+            else:
+                await job.func(*job.args)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.failures += 1
+            print(f"Job {job.name} failed: {e!r}")
+        finally:
+            duration = self.clock.time() - start
+            job.runs += 1
+            job.last_duration = duration
+            job.total_duration += duration
+            record_cycle(job.name, duration, job.interval)
+            job.running = False
+
+        if job.pending_since is not None:
+            pending_since, job.pending_since = job.pending_since, None
+            self._start(job, pending_since)
+
+    async def run(self, duration=None):
+        """
+        Runs every job until stop() is called (or for `duration` seconds of clock time).
+        In a notebook, `await scheduler.run()`; in a script, `asyncio.run(scheduler.run())`.
+        """
+        self.stopped = asyncio.Event()
+        self.drivers = [asyncio.ensure_future(self._drive(job)) for job in self.jobs]
+        try:
+            if duration is None:
+                await self.stopped.wait()
+            else:
+                stop = asyncio.ensure_future(self.stopped.wait())
+                await asyncio.wait([stop, asyncio.ensure_future(self.clock.sleep(duration))],
+                                   return_when=asyncio.FIRST_COMPLETED)
+                stop.cancel()
+        finally:
+            for driver in self.drivers:
+                driver.cancel()
+            await asyncio.gather(*self.drivers, return_exceptions=True)
+            # Let in-flight runs finish; blocking calls cannot be interrupted anyway
+            if self.active_runs:
+                await asyncio.gather(*list(self.active_runs), return_exceptions=True)
+
+    def stop(self):
+        if self.stopped is not None:
+            self.stopped.set()
+
+    def close(self):
+        if self.owns_executor:
+            self.executor.shutdown(wait=False)
+
+    def report(self):
+        """One formatted line of run statistics per job."""
+        lines = [f"{'job':<24} {'runs':>5} {'fail':>5} {'skip':>5} {'coal':>5} {'lag last/max (s)':>18} {'duration mean (s)':>18}"]
+        for stats in (job.stats() for job in self.jobs):
+            last_lag = f"{stats['last_lag']:.3f}" if stats['last_lag'] is not None else '-'
+            mean = f"{stats['mean_duration']:.3f}" if stats['mean_duration'] is not None else '-'
+            lines.append(f"{stats['job']:<24} {stats['runs']:>5} {stats['failures']:>5} {stats['skipped']:>5} "
+                         f"{stats['coalesced']:>5} {last_lag + ' / ' + format(stats['max_lag'], '.3f'):>18} {mean:>18}")
+        return '\n'.join(lines)
+
+
+def run_forever(scheduler):
+    """Runs a scheduler from a script until Ctrl+C, then prints its job statistics."""
+    try:
+        asyncio.run(scheduler.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.close()
+        print(scheduler.report())
+
+
+# --- Simulation ---
+def simulate(minutes=30):
+    """
+    Replays `minutes` of virtual time: a fast minute job, a 5-minute job that sometimes
+    overruns (SKIP), and a minute job that sometimes overruns (COALESCE). Returns the
+    scheduler so its job statistics and start times can be inspected.
+    """
+    clock = VirtualClock(start=1_700_000_017.0)   # 37 s past a minute boundary
+    scheduler = Scheduler(clock, executor=InlineExecutor())
+    starts = {'quotes': [], 'news': [], 'chain': []}
+
+    def quotes():   # blocking job: runs on the (inline) executor
+        starts['quotes'].append(clock.time())
+
+    async def news():
+        starts['news'].append(clock.time())
+        await clock.sleep(420 if len(starts['news']) == 2 else 30)   # second run overruns a boundary
+
+    async def chain():
+        starts['chain'].append(clock.time())
+        await clock.sleep(150 if len(starts['chain']) == 3 else 10)  # third run spans two more ticks
+
+    scheduler.every(60, quotes, name='quotes')
+    scheduler.every(300, news, name='news', policy=SKIP)
+    scheduler.every(60, chain, name='chain', policy=COALESCE)
+
+    async def main():
+        runner = asyncio.ensure_future(scheduler.run())
+        await clock.advance(minutes * 60)
+        scheduler.stop()
+        await runner
+
+    asyncio.run(main())
+    scheduler.starts = starts
+    return scheduler
+
+
+# Example usage: 30 virtual minutes of jobs, showing alignment, skipping and coalescing
+if __name__ == "__main__":
+    sim = simulate()
+    offsets = sorted({round(t % 60, 6) for t in sim.starts['quotes']})
+    print(f"quotes ran {len(sim.starts['quotes'])} times, seconds past the minute: {offsets}")
+    print(f"news start minutes: {[int(t // 60) % 60 for t in sim.starts['news']]}")
+    print(f"chain start times (s past the first): {[round(t - sim.starts['chain'][0]) for t in sim.starts['chain'][:6]]}")
+    print(sim.report())
@@ -0,0 +1,258 @@
+# Vectorized binomial / trinomial lattice pricer for American (and European) options.
+# black_scholes() only handles European exercise, but listed US equity options are
+# American. Here the backward induction runs over a whole chain at once: contracts lie
+# along one axis and each time step is a single array operation across all of them, with
+# the early-exercise check applied to the full slice of nodes.
+
+import time
+
+import numpy as np
+
+BINOMIAL = 'binomial'
+TRINOMIAL = 'trinomial'
+DEFAULT_STEPS = 200
+
+
+# --- Lattice construction and backward induction ---
+def _lattice_parameters(T, r, sigma, q, steps, method):
+    """Per-contract step size, up-move factor, branch probabilities and one-step discount."""
+    dt = T / steps
+    disc = np.exp(-r * dt)
+    if method == BINOMIAL:
+        # Cox-Ross-Rubinstein: u = 1/d, recombining every two levels
+        u = np.exp(sigma * np.sqrt(dt))
+        p_up = (np.exp((r - q) * dt) - 1 / u) / (u - 1 / u)
+        return dt, u, disc, (p_up, 1 - p_up)
+    # Boyle / Kamrad-Ritchken with u = exp(sigma * sqrt(2 dt)), middle branch unchanged
+    u = np.exp(sigma * np.sqrt(2 * dt))
+    half_up = np.exp(sigma * np.sqrt(dt / 2))
+    half_drift = np.exp((r - q) * dt / 2)
+    p_up = ((half_drift - 1 / half_up) / (half_up - 1 / half_up)) ** 2
+    p_down = ((half_up - half_drift) / (half_up - 1 / half_up)) ** 2
+    return dt, u, disc, (p_up, 1 - p_up - p_down, p_down)
+
+
+def _check_probabilities(T, r, sigma, q, steps, method):
+    """
+    Raises ValueError when a branch probability falls outside [0, 1], which happens when
+    the drift per step outweighs the volatility per step (e.g. tiny sigma with a large
+    r - q). The lattice would still run but return meaningless prices.
+    """
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        probs = _lattice_parameters(T, r, sigma, q, steps, method)[3]
+        bad = np.zeros(T.shape, dtype=bool)
+        for p in probs:
+            bad |= ~((p >= 0) & (p <= 1))
+    if not bad.any():
+        return
+    # Binomial needs sigma * sqrt(dt) > |r - q| * dt; the trinomial bound is twice as loose
+    with np.errstate(divide='ignore'):
+        needed = T[bad] * (r[bad] - q[bad]) ** 2 / sigma[bad] ** 2 / (1 if method == BINOMIAL else 2)
+    raise ValueError(f"{bad.sum()} contract(s) have branch probabilities outside [0, 1] with {steps} "
+                     f"{method} steps; use at least {int(np.floor(np.max(needed))) + 1} steps")
+
+
+def _induct(S, K, T, r, sigma, q, call, steps, method, american):
+    """
+    Backward induction for one chunk of live contracts.
+
+    Spot at node level k is S * u**k for k in [-steps, steps]; the binomial tree at step i
+    uses every other level from -i to i and the trinomial tree uses all of them, so both
+    read their node prices and exercise values as slices of one precomputed grid.
+
+    Returns:
+    tuple: (price, delta, gamma, theta)
+    """
+    dt, u, disc, probs = _lattice_parameters(T, r, sigma, q, steps, method)
+    # Nodes run down axis 0 and contracts along axis 1, so every slice of a level is one
+    # contiguous run over the chunk; the discount is folded into the branch probabilities
+    levels = np.arange(-steps, steps + 1)[:, np.newaxis]
+    spots = S * np.exp(np.log(u) * levels)
+    exercise = np.maximum(np.where(call, spots - K, K - spots), 0.0)
+    weights = [disc * p for p in probs]
+
+    def nodes(grid, i):
+        if method == BINOMIAL:
+            return grid[steps - i:steps + i + 1:2]
+        return grid[steps - i:steps + i + 1]
+
+    values = nodes(exercise, steps).copy()
+    scratch = np.empty_like(values)
+    saved = {}
+    for i in range(steps - 1, -1, -1):
+        width = len(nodes(levels, i))
+        current, tmp = values[:width], scratch[:width]
+        if method == BINOMIAL:
+            w_up, w_down = weights
+            np.multiply(w_up, values[1:width + 1], out=tmp)
+            current *= w_down
+            current += tmp
+        else:
+            w_up, w_mid, w_down = weights
+            np.multiply(w_up, values[2:width + 2], out=tmp)
+            tmp += w_mid * values[1:width + 1]
+            current *= w_down
+            current += tmp
+        if american:
+            np.maximum(current, nodes(exercise, i), out=current)
+        if i <= 2:
+            saved[i] = current.copy()
+
+    price = saved[0][0]
+    if method == BINOMIAL:
+        # Delta from step 1, gamma from step 2, theta from the centre node two steps on
+        v1, v2 = saved[1], saved[2]
+        s1, s2 = nodes(spots, 1), nodes(spots, 2)
+        delta = (v1[1] - v1[0]) / (s1[1] - s1[0])
+        up = (v2[2] - v2[1]) / (s2[2] - s2[1])
+        down = (v2[1] - v2[0]) / (s2[1] - s2[0])
+        gamma = (up - down) / (0.5 * (s2[2] - s2[0]))
+        theta = (v2[1] - price) / (2 * dt)
+    else:
+        v1, s1 = saved[1], nodes(spots, 1)
+        delta = (v1[2] - v1[0]) / (s1[2] - s1[0])
+        up = (v1[2] - v1[1]) / (s1[2] - s1[1])
+        down = (v1[1] - v1[0]) / (s1[1] - s1[0])
+        gamma = (up - down) / (0.5 * (s1[2] - s1[0]))
+        theta = (v1[1] - price) / dt
+    return price, delta, gamma, theta
+
+
+# --- Batch lattice pricing with Greeks ---
+def lattice_price_batch(S, K, T, r, sigma, is_call, q=0.0, steps=DEFAULT_STEPS, method=BINOMIAL,
+                        american=True, bump_greeks=True, chunk_size=256):
+    """
+    Prices many options on a binomial or trinomial lattice and returns their Greeks.
+
+    Inputs are broadcast against each other exactly like black_scholes_batch(). Contracts
+    are processed in chunks of `chunk_size` so the lattice of a chunk stays in cache.
+
+    Parameters:
+    S, K, T, r, sigma, q (array-like): As in black_scholes()
+    is_call (array-like of bool): True for calls, False for puts
+    steps (int): Time steps in the lattice (at least 2, and enough to keep every branch
+                 probability in [0, 1]; ValueError otherwise)
+    method (str): 'binomial' (Cox-Ross-Rubinstein) or 'trinomial'
+    american (bool): Allow early exercise at every node; False prices the European payoff
+    bump_greeks (bool): Also compute vega and rho by central differences (four extra lattices)
+
+    Returns:
+    dict: 'price', 'delta', 'gamma', 'theta' (read off the lattice) and, with bump_greeks,
+          'vega' and 'rho'. Vega and rho are per 1.00 change in sigma / r, theta is per year.
+    """
+    if method not in (BINOMIAL, TRINOMIAL):
+        raise ValueError("method must be 'binomial' or 'trinomial'")
+    if steps < 2:
+        raise ValueError("steps must be at least 2")
+
+    S, K, T, r, sigma, is_call, q = np.broadcast_arrays(
+        np.asarray(S, dtype=float),
+        np.asarray(K, dtype=float),
+        np.asarray(T, dtype=float),
+        np.asarray(r, dtype=float),
+        np.asarray(sigma, dtype=float),
+        np.asarray(is_call, dtype=bool),
+        np.asarray(q, dtype=float),
+    )
+    shape = S.shape
+    names = ['price', 'delta', 'gamma', 'theta'] + (['vega', 'rho'] if bump_greeks else [])
+    result = {name: np.zeros(shape) for name in names}
+
+    # Expired contracts are worth their intrinsic value, like black_scholes()
+    expired = T <= 0
+    if expired.any():
+        S_e, K_e, call_e = S[expired], K[expired], is_call[expired]
+        result['price'][expired] = np.where(call_e, np.maximum(0, S_e - K_e), np.maximum(0, K_e - S_e))
+        result['delta'][expired] = np.where(call_e, (S_e > K_e) * 1.0, (K_e > S_e) * -1.0)
+
+    live = np.flatnonzero(~expired.ravel())
+    flat = [a.ravel() for a in (S, K, T, r, sigma, q, is_call)]
+    _check_probabilities(*(a[live] for a in flat[2:6]), steps, method)
+    out = {name: result[name].reshape(-1) for name in names}
+    sigma_bump, rate_bump = 1e-3, 1e-4
+    for start in range(0, live.size, chunk_size):
+        idx = live[start:start + chunk_size]
+        s, k, t, rate, vol, div, call = (a[idx] for a in flat)
+        price, delta, gamma, theta = _induct(s, k, t, rate, vol, div, call, steps, method, american)
+        out['price'][idx], out['delta'][idx], out['gamma'][idx], out['theta'][idx] = price, delta, gamma, theta
+        if bump_greeks:
+            run = lambda rate_, vol_: _induct(s, k, t, rate_, vol_, div, call, steps, method, american)[0]
+            out['vega'][idx] = (run(rate, vol + sigma_bump) - run(rate, vol - sigma_bump)) / (2 * sigma_bump)
+            out['rho'][idx] = (run(rate + rate_bump, vol) - run(rate - rate_bump, vol)) / (2 * rate_bump)
+    return result
+
+
+def american_option_price(S, K, T, r, sigma, option_type, q=0, steps=DEFAULT_STEPS, method=BINOMIAL):
+    """
+    Scalar counterpart of black_scholes() for American options: same arguments, same
+    'call'/'put' option_type, returns the lattice price as a float.
+    """
+    if option_type not in ('call', 'put'):
+        raise ValueError("option_type must be 'call' or 'put'")
+    result = lattice_price_batch(S, K, T, r, sigma, option_type == 'call', q,
+                                 steps=steps, method=method, bump_greeks=False)
+    return float(result['price'])
+
+
+# --- Convergence and benchmark ---
+def convergence_check(steps_list=(25, 50, 100, 200, 400, 800), n=500, seed=0):
+    """
+    Prints the largest gap between European lattice prices / deltas and
+    black_scholes_batch() as the number of steps grows, for both lattice types.
+    """
+    from black_scholes_vectorized import black_scholes_batch
+
+    rng = np.random.default_rng(seed)
+    S = 100.0
+    K = rng.uniform(70, 130, n)
+    T = rng.uniform(0.05, 2.0, n)
+    sigma = rng.uniform(0.1, 0.6, n)
+    is_call = rng.random(n) < 0.5
+    exact = black_scholes_batch(S, K, T, 0.05, sigma, is_call, q=0.02)
+
+    print(f"--- European lattice vs Black-Scholes ({n} contracts) ---")
+    print(f"{'steps':>6} {'binomial price':>15} {'trinomial price':>16} {'binomial delta':>15} {'trinomial delta':>16}")
+    for steps in steps_list:
+        row = []
+        for method in (BINOMIAL, TRINOMIAL):
+            lattice = lattice_price_batch(S, K, T, 0.05, sigma, is_call, q=0.02, steps=steps,
+                                          method=method, american=False, bump_greeks=False)
+            row.append((np.abs(lattice['price'] - exact['price']).max(),
+                        np.abs(lattice['delta'] - exact['delta']).max()))
+        (bp, bd), (tp, td) = row
+        print(f"{steps:>6} {bp:>15.2e} {tp:>16.2e} {bd:>15.2e} {td:>16.2e}")
+
+
+def benchmark_lattice(n_contracts=(100, 1_000, 10_000), steps=DEFAULT_STEPS, seed=0):
+    """Prints American contracts priced per second for each lattice type and chain size."""
+    print(f"--- American lattice throughput ({steps} steps, price + delta/gamma/theta) ---")
+    rng = np.random.default_rng(seed)
+    for n in n_contracts:
+        K = np.round(2600 * rng.uniform(0.7, 1.3, n) / 10) * 10
+        T = rng.choice([7, 14, 28, 56, 91, 182, 364], n) / 365.0
+        sigma = rng.uniform(0.1, 0.6, n)
+        is_call = rng.random(n) < 0.5
+        for method in (BINOMIAL, TRINOMIAL):
+            start = time.perf_counter()
+            lattice_price_batch(2600.0, K, T, 0.065, sigma, is_call, q=0.01, steps=steps,
+                                method=method, bump_greeks=False)
+            elapsed = time.perf_counter() - start
+            print(f"{method:<10} {n:>7,} contracts: {elapsed * 1000:>9.1f} ms | {n / elapsed:>10,.0f} contracts/sec")
+
+
+# Example usage: early-exercise premium on a put ladder, convergence, throughput
+if __name__ == "__main__":
+    from black_scholes_vectorized import black_scholes_batch
+
+    strikes = np.arange(150, 251, 10, dtype=float)
+    american = lattice_price_batch(200.0, strikes, 0.5, 0.05, 0.3, False, q=0.005)
+    european = black_scholes_batch(200.0, strikes, 0.5, 0.05, 0.3, False, q=0.005)
+    print("--- American vs European puts (S=200, T=0.5, r=5%, sigma=30%, q=0.5%) ---")
+    for i, K in enumerate(strikes):
+        print(f"K={K:>5.0f} american={american['price'][i]:>7.3f} european={european['price'][i]:>7.3f} "
+              f"premium={american['price'][i] - european['price'][i]:>6.3f} delta={american['delta'][i]:>6.3f} "
+              f"gamma={american['gamma'][i]:.4f} vega={american['vega'][i]:>6.2f}")
+    print()
+    convergence_check()
+    print()
+    benchmark_lattice()
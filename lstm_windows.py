@@ -0,0 +1,241 @@
+# Windowed dataset pipeline for the LSTM stock price predictor.
+# Replaces the notebook's loop that appends 60-value slices to lists and copies them into
+# new arrays: the scaled series is written once to a memory-mapped .npy file, training
+# windows are zero-copy strided views over it, and shuffled mini-batches are gathered one
+# batch at a time. The scaler is fitted on the training split only, so the test period no
+# longer leaks into the scaling.
+
+import json
+import math
+import os
+import time
+import tracemalloc
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+WINDOW = 60          # bars of history per sample, as in the notebook
+TRAIN_FRACTION = 0.8
+
+
+# --- Scaling ---
+class TrainSplitScaler:
+    """
+    Min-max scaler fitted on the training split only. Same transform as
+    MinMaxScaler(feature_range=(0, 1)) but with no look-ahead into the test period.
+    """
+
+    def __init__(self, feature_range=(0, 1)):
+        self.feature_range = feature_range
+        self.data_min = None
+        self.data_max = None
+
+    def fit(self, train_values):
+        self.data_min = float(np.nanmin(train_values))
+        self.data_max = float(np.nanmax(train_values))
+        return self
+
+    @property
+    def scale(self):
+        low, high = self.feature_range
+        span = self.data_max - self.data_min
+        return (high - low) / span if span else 1.0
+
+    def transform(self, values):
+        return (np.asarray(values, dtype=np.float32) - self.data_min) * self.scale + self.feature_range[0]
+
+    def inverse_transform(self, values):
+        return (np.asarray(values, dtype=float) - self.feature_range[0]) / self.scale + self.data_min
+
+    def to_dict(self):
+        return {'feature_range': list(self.feature_range), 'data_min': self.data_min, 'data_max': self.data_max}
+
+    @classmethod
+    def from_dict(cls, params):
+        scaler = cls(tuple(params['feature_range']))
+        scaler.data_min = params['data_min']
+        scaler.data_max = params['data_max']
+        return scaler
+
+
+def training_length(n_rows, train_fraction=TRAIN_FRACTION):
+    """Number of rows in the training split, rounded up like the notebook."""
+    return math.ceil(n_rows * train_fraction)
+
+
+def write_scaled_series(values, path, train_fraction=TRAIN_FRACTION, chunk_size=1_000_000):
+    """
+    Scales a price series with a scaler fitted on its training split and writes it to
+    a float32 .npy file in chunks, so the full scaled series never has to sit in memory.
+
+    Returns:
+    tuple: (read-only memmap of the scaled series, fitted TrainSplitScaler, training length)
+    """
+    values = np.asarray(values).reshape(-1)
+    train_len = training_length(values.size, train_fraction)
+    scaler = TrainSplitScaler().fit(values[:train_len])
+
+    scaled = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(values.size,))
+    for start in range(0, values.size, chunk_size):
+        scaled[start:start + chunk_size] = scaler.transform(values[start:start + chunk_size])
+    scaled.flush()
+    del scaled
+
+    with open(path + '.json', 'w') as f:
+        json.dump({'scaler': scaler.to_dict(), 'train_len': train_len}, f)
+    return np.load(path, mmap_mode='r'), scaler, train_len
+
+
+def load_scaled_series(path):
+    """Re-opens a series written by write_scaled_series()."""
+    with open(path + '.json') as f:
+        meta = json.load(f)
+    return np.load(path, mmap_mode='r'), TrainSplitScaler.from_dict(meta['scaler']), meta['train_len']
+
+
+# --- Windows ---
+def window_views(scaled, window=WINDOW):
+    """
+    Zero-copy (samples x window) inputs and matching next-value targets over a 1-D series.
+    Sample i covers scaled[i:i + window] and predicts scaled[i + window].
+    """
+    scaled = np.asarray(scaled).reshape(-1)  # a view, even for memory maps
+    x = sliding_window_view(scaled, window)[:-1]
+    y = scaled[window:]
+    return x, y
+
+
+def train_test_windows(scaled, train_len, window=WINDOW):
+    """
+    Splits the windows the way the notebook does: training targets are rows
+    [window, train_len) and test targets are rows [train_len, end), whose inputs
+    reach back `window` rows into the training period. All four arrays are views.
+    """
+    x, y = window_views(scaled, window)
+    split = train_len - window
+    return x[:split], y[:split], x[split:], y[split:]
+
+
+class MultiSeriesWindows:
+    """
+    Windows over several memory-mapped series (e.g. one per ticker) addressed by one
+    global sample index, without concatenating the series.
+    """
+
+    def __init__(self, series, window=WINDOW):
+        self.views = [window_views(s, window) for s in series]
+        counts = np.array([len(y) for _, y in self.views])
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.window = window
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def gather(self, indices):
+        """Copies the requested samples into a (batch x window x 1) input and a target array."""
+        indices = np.asarray(indices)
+        series_ids = np.searchsorted(self.offsets, indices, side='right') - 1
+        x = np.empty((indices.size, self.window, 1), dtype=np.float32)
+        y = np.empty(indices.size, dtype=np.float32)
+        for series_id in np.unique(series_ids):
+            mask = series_ids == series_id
+            local = indices[mask] - self.offsets[series_id]
+            xs, ys = self.views[series_id]
+            x[mask, :, 0] = xs[local]
+            y[mask] = ys[local]
+        return x, y
+
+
+# --- Batching ---
+def batch_generator(x, y=None, batch_size=64, shuffle=True, seed=None, epochs=1):
+    """
+    Yields (inputs, targets) mini-batches shaped for the LSTM: (batch x window x 1).
+    `x` is either a windows view from window_views() (with `y`) or a MultiSeriesWindows.
+    Only one batch is materialized at a time.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(x)
+    for _ in range(epochs):
+        order = rng.permutation(n) if shuffle else np.arange(n)
+        for start in range(0, n, batch_size):
+            # Sorted indices inside a batch keep reads from the memory map mostly sequential
+            indices = np.sort(order[start:start + batch_size])
+            if isinstance(x, MultiSeriesWindows):
+                yield x.gather(indices)
+            else:
+                yield x[indices][..., np.newaxis], y[indices]
+
+
+def make_tf_dataset(x, y=None, batch_size=64, shuffle=True, seed=None):
+    """Wraps batch_generator() in a tf.data.Dataset for model.fit(), prefetching one batch ahead."""
+    import tensorflow as tf
+
+    window = x.window if isinstance(x, MultiSeriesWindows) else x.shape[1]
+    # tf.data calls the generator function again every epoch; drawing its seed from one
+    # outer RNG gives each epoch a different shuffle while staying reproducible from `seed`
+    epoch_seeds = np.random.default_rng(seed)
+    dataset = tf.data.Dataset.from_generator(
+        lambda: batch_generator(x, y, batch_size, shuffle, int(epoch_seeds.integers(2**63))),
+        output_signature=(
+            tf.TensorSpec(shape=(None, window, 1), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.float32),
+        ),
+    )
+    return dataset.prefetch(1)
+
+
+# --- Comparison with the notebook loop ---
+def notebook_loop_windows(train_data, window=WINDOW):
+    """The notebook's original construction, kept for comparison."""
+    x_train = []
+    y_train = []
+    for i in range(window, len(train_data)):
+        x_train.append(train_data[i-window:i, 0])
+        y_train.append(train_data[i, 0])
+    x_train, y_train = np.array(x_train), np.array(y_train)
+    x_train = np.reshape(x_train, (x_train.shape[0], x_train.shape[1], 1))
+    return x_train, y_train
+
+
+def compare_with_loop(n_rows=500_000, window=WINDOW, batch_size=256, path=None):
+    """Prints peak memory and time of the notebook loop vs memory-mapped strided windows."""
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    prices = 100 + np.cumsum(rng.normal(0, 0.1, n_rows))
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    train_len = training_length(n_rows)
+    low, high = prices[:train_len].min(), prices[:train_len].max()
+    scaled = ((prices - low) / (high - low)).reshape(-1, 1)
+    x_loop, y_loop = notebook_loop_windows(scaled[:train_len], window)
+    loop_time = time.perf_counter() - start
+    loop_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del x_loop, y_loop, scaled
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tracemalloc.start()
+        start = time.perf_counter()
+        series, _, train_len = write_scaled_series(prices, path or os.path.join(tmp, 'series.npy'))
+        x_train, y_train, _, _ = train_test_windows(series, train_len, window)
+        build_time = time.perf_counter() - start
+        batches = 0
+        for xb, yb in batch_generator(x_train, y_train, batch_size, seed=0):
+            batches += 1
+        epoch_time = time.perf_counter() - start - build_time
+        view_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        samples = len(y_train)
+        del series, x_train, y_train
+
+    print(f"--- LSTM windowing ({n_rows:,} rows, window {window}) ---")
+    print(f"Notebook loop:     {loop_time:>7.2f}s build | peak {loop_peak / 2**20:>8.1f} MiB")
+    print(f"Strided memmap:    {build_time:>7.2f}s build | peak {view_peak / 2**20:>8.1f} MiB "
+          f"(includes one shuffled epoch of {batches} batches in {epoch_time:.2f}s, "
+          f"{samples / epoch_time:,.0f} samples/sec)")
+
+
+if __name__ == "__main__":
+    compare_with_loop()
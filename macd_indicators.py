@@ -0,0 +1,196 @@
+# EMA / MACD indicator engine for the frames OHLCHistory() returns.
+# Batch mode runs the EMA recursion for a whole (symbols x bars) matrix at once through
+# scipy's lfilter; streaming mode keeps a few floats of state per symbol and updates them
+# in O(1) as each new bar arrives. Both use pandas' ewm(span=n, adjust=False) convention,
+# so a streaming engine seeded from batch output continues exactly where it left off.
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+BULLISH = 1   # MACD line crossed above the signal line
+BEARISH = -1  # MACD line crossed below the signal line
+
+
+def ema_alpha(span):
+    return 2.0 / (span + 1)
+
+
+# --- Batch mode ---
+def ema_batch(values, span):
+    """
+    Exponential moving average along the last axis of a (symbols x bars) matrix.
+
+    NaN marks a bar the symbol did not trade. Leading NaNs stay NaN and the EMA starts
+    at the first valid bar; interior gaps are skipped and the previous EMA is carried
+    through them, exactly as StreamingMACD does when a symbol has no new bar.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    n_bars = values.shape[1]
+    alpha = ema_alpha(span)
+    b, a = [alpha], [1, -(1 - alpha)]
+
+    out = np.full(values.shape, np.nan)
+    valid = ~np.isnan(values)
+    first_valid = np.argmax(valid, axis=1)
+    has_data = valid.any(axis=1)
+    # Rows that trade on every bar after their first one go through a single filter call
+    dense = has_data & (valid.sum(axis=1) == n_bars - first_valid)
+
+    if dense.any():
+        rows = values[dense]
+        seed = rows[np.arange(rows.shape[0]), first_valid[dense]]
+        leading = np.isnan(rows)
+        # Before the first valid bar the input equals the seed, so the EMA sits at the seed
+        rows = np.where(leading, seed[:, None], rows)
+        filtered, _ = lfilter(b, a, rows, axis=1, zi=((1 - alpha) * seed)[:, None])
+        filtered[leading] = np.nan
+        out[dense] = filtered
+
+    for i in np.flatnonzero(has_data & ~dense):
+        row_valid = valid[i]
+        compact = values[i, row_valid]
+        filtered, _ = lfilter(b, a, compact, zi=[(1 - alpha) * compact[0]])
+        out[i, row_valid] = filtered
+        out[i] = pd.Series(out[i]).ffill().to_numpy()
+
+    return out
+
+
+def macd_batch(close, fast=12, slow=26, signal=9):
+    """
+    Computes MACD for a (symbols x bars) matrix of closing prices.
+
+    Returns:
+    dict: 'ema_fast', 'ema_slow', 'macd', 'signal' and 'histogram' matrices.
+    """
+    close = np.atleast_2d(np.asarray(close, dtype=float))
+    ema_fast = ema_batch(close, fast)
+    ema_slow = ema_batch(close, slow)
+    macd_line = ema_fast - ema_slow
+    # The signal EMA only advances on bars where the symbol actually traded
+    signal_line = ema_batch(np.where(np.isnan(close), np.nan, macd_line), signal)
+    return {
+        'ema_fast': ema_fast,
+        'ema_slow': ema_slow,
+        'macd': macd_line,
+        'signal': signal_line,
+        'histogram': macd_line - signal_line,
+    }
+
+
+def frames_to_matrix(frames, column='close'):
+    """
+    Aligns {symbol: OHLCHistory() frame} on the union of their timestamps.
+
+    Returns:
+    tuple: (symbols, index, matrix) with one row per symbol and NaN where a symbol has no bar.
+    """
+    symbols = list(frames)
+    aligned = pd.concat({symbol: frames[symbol][column] for symbol in symbols}, axis=1).sort_index()
+    return symbols, aligned.index, aligned.to_numpy(dtype=float).T
+
+
+def crossover_events(histogram, symbols, index):
+    """
+    Finds MACD/signal crossovers in a histogram matrix.
+
+    Returns:
+    DataFrame: one row per crossover with 'symbol', 'timestamp' and 'direction'
+               (BULLISH or BEARISH).
+    """
+    sign = np.nan_to_num(np.sign(histogram))  # bars before a symbol's first trade count as 0
+    previous = sign[:, :-1]
+    current = sign[:, 1:]
+    crossed = (previous != 0) & (current != 0) & (previous != current)
+    rows, cols = np.nonzero(crossed)
+    return pd.DataFrame({
+        'symbol': np.asarray(symbols)[rows],
+        'timestamp': np.asarray(index)[cols + 1],
+        'direction': current[rows, cols].astype(np.int8),
+    })
+
+
+def macd_from_frames(frames, fast=12, slow=26, signal=9):
+    """Runs macd_batch() on a dict of OHLCHistory() frames and returns one frame per symbol."""
+    symbols, index, close = frames_to_matrix(frames)
+    result = macd_batch(close, fast, slow, signal)
+    return {
+        symbol: pd.DataFrame({name: matrix[i] for name, matrix in result.items()}, index=index)
+        for i, symbol in enumerate(symbols)
+    }
+
+
+# --- Streaming mode ---
+class StreamingMACD:
+    """
+    Incremental MACD with O(1) state per symbol.
+
+    update() takes one new close per symbol (NaN for symbols without a new bar) and
+    returns the crossovers that bar produced.
+    """
+
+    def __init__(self, symbols, fast=12, slow=26, signal=9):
+        self.symbols = list(symbols)
+        self.alpha_fast = ema_alpha(fast)
+        self.alpha_slow = ema_alpha(slow)
+        self.alpha_signal = ema_alpha(signal)
+        n = len(self.symbols)
+        self.ema_fast = np.full(n, np.nan)
+        self.ema_slow = np.full(n, np.nan)
+        self.signal = np.full(n, np.nan)
+        self.histogram = np.full(n, np.nan)
+
+    @classmethod
+    def from_history(cls, symbols, close, fast=12, slow=26, signal=9):
+        """Seeds the state from a (symbols x bars) close matrix using macd_batch()."""
+        engine = cls(symbols, fast, slow, signal)
+        result = macd_batch(close, fast, slow, signal)
+        # Gaps are already carried forward, so the last column is the current state
+        for name in ('ema_fast', 'ema_slow', 'signal', 'histogram'):
+            setattr(engine, name, result[name][:, -1].copy())
+        return engine
+
+    @property
+    def macd(self):
+        return self.ema_fast - self.ema_slow
+
+    def update(self, close):
+        """
+        Applies one bar of closes aligned with self.symbols.
+
+        Returns:
+        list: (symbol, direction) tuples for every crossover on this bar.
+        """
+        close = np.asarray(close, dtype=float)
+        has_bar = ~np.isnan(close)
+        new = has_bar & np.isnan(self.ema_fast)
+
+        # First bar of a symbol seeds every EMA, like ema_batch()
+        self.ema_fast = np.where(new, close, self.ema_fast)
+        self.ema_slow = np.where(new, close, self.ema_slow)
+        self.signal = np.where(new, 0.0, self.signal)
+
+        step = has_bar & ~new
+        self.ema_fast = np.where(step, self.alpha_fast * close + (1 - self.alpha_fast) * self.ema_fast, self.ema_fast)
+        self.ema_slow = np.where(step, self.alpha_slow * close + (1 - self.alpha_slow) * self.ema_slow, self.ema_slow)
+        macd_line = self.ema_fast - self.ema_slow
+        self.signal = np.where(step, self.alpha_signal * macd_line + (1 - self.alpha_signal) * self.signal, self.signal)
+
+        previous = np.sign(self.histogram)
+        self.histogram = np.where(has_bar, macd_line - self.signal, self.histogram)
+        current = np.sign(self.histogram)
+        crossed = has_bar & (previous != 0) & (current != 0) & (previous != current) & ~np.isnan(previous)
+        return [(self.symbols[i], int(current[i])) for i in np.flatnonzero(crossed)]
+
+
+# Example usage: MACD and crossovers for a few symbols from OHLCHistory()-style frames
+if __name__ == "__main__":
+    from ohlc_cache import FakeDownloader
+
+    downloader = FakeDownloader()
+    frames = {symbol: downloader(symbol, '1d', '2023-01-01', '2023-07-01')
+              for symbol in ['RELIANCE.NS', 'TCS.NS', 'INFY.NS']}
+    symbols, index, close = frames_to_matrix(frames)
+    result = macd_batch(close)
+    print(crossover_events(result['histogram'], symbols, index).tail(10).to_string(index=False))
@@ -0,0 +1,569 @@
+# Benchmark suite for the hot paths, driven entirely by synthetic data.
+# Each case is run at several scales and records throughput, p50/p99 latency and peak
+# memory to a JSON baseline. Compare mode re-runs the suite against a saved baseline and
+# fails when a case got slower than the tolerance allows, so every optimization can be
+# shown against the code it replaced.
+#
+#   python market_benchmarks.py --output baseline.json
+#   python market_benchmarks.py --compare baseline.json --tolerance 0.15
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import synthetic_market_data as synth
+
+DEFAULT_SCALES = [10, 100, 1_000, 10_000, 100_000]
+TIME_BUDGET_SECONDS = 1.0   # per case and scale, after the first run
+MAX_REPEATS = 50
+
+
+# --- Cases ---
+# Each case maps a scale n to a zero-argument callable that processes n items.
+# Legacy cases reproduce the original per-item code and stop at a smaller scale.
+
+def case_black_scholes_scalar(n):
+    black_scholes = load_script('black_scholes_calculator').black_scholes
+    c = synth.synthetic_option_contracts(n)
+    rows = list(zip(c['S'], c['K'], c['T'], c['r'], c['sigma'], np.where(c['is_call'], 'call', 'put'), c['q']))
+    return lambda: [black_scholes(S, K, T, r, sigma, kind, q) for S, K, T, r, sigma, kind, q in rows]
+
+
+def case_black_scholes_batch(n):
+    from black_scholes_vectorized import black_scholes_batch
+
+    c = synth.synthetic_option_contracts(n)
+    return lambda: black_scholes_batch(**c)
+
+
+def case_lattice_american(n):
+    from lattice_pricer import lattice_price_batch
+
+    c = synth.synthetic_option_contracts(n)
+    return lambda: lattice_price_batch(**c, bump_greeks=False)
+
+
+def case_scenario_grid(n):
+    from scenario_grid import ScenarioGrid, scenario_report
+
+    book = synth.synthetic_book(n)
+    grid = ScenarioGrid.linear(spot_points=11, vol_points=5, days=(0, 1, 5))
+    return lambda: scenario_report(book, grid)
+
+
+def case_drop_alert_backtest(n):
+    from drop_alert_backtest import frames_to_arrays, rolling_52_week_high, simulate_alerts
+
+    _, index, close, high = frames_to_arrays(synth.synthetic_ohlc_frames(n, n_bars=1000))
+    high_52_week = rolling_52_week_high(high, index)
+    return lambda: simulate_alerts(close, high_52_week, [15, 20, 25], [1, 1, 1])
+
+
+def _fresh_informer(tickers, prices, highs):
+    from alert_state import AlertStateStore
+    from extremes_index import ExtremesIndex
+
+    informer = load_script('price_informer')
+    informer.alert_store = AlertStateStore(tickers, informer.INITIAL_DROP_PERCENTAGE,
+                                           informer.SUBSEQUENT_DROP_PERCENTAGE)
+    informer.alert_store.initialize(np.arange(len(tickers)), highs, highs)
+    informer.extremes = ExtremesIndex(tickers)
+    informer.extremes.update(np.arange(len(tickers)), None, highs)
+    informer.TICKER_NAMES = {ticker: ticker for ticker in tickers}
+    return informer
+
+
+def _baseline_check_and_notify(monitoring_status, stock_name, ticker, current_price, fifty_two_week_high,
+                               initial_drop_percentage=20, subsequent_drop_percentage=1):
+    """The price informer's original per-ticker check on its monitoring_status dict, kept as the reference."""
+    if ticker not in monitoring_status:
+        monitoring_status[ticker] = {
+            '52_week_high': fifty_two_week_high,
+            'current_price': current_price,
+            'initial_drop_price': None,
+            'last_notified_price': None,
+            'initial_drop_alerted': False
+        }
+    else:
+        monitoring_status[ticker]['current_price'] = current_price
+
+    status = monitoring_status[ticker]
+    initial_drop_threshold = fifty_two_week_high * (1 - initial_drop_percentage / 100)
+
+    if not status['initial_drop_alerted'] and current_price <= initial_drop_threshold:
+        print(f"\n--- ALERT! {stock_name} ({ticker}) ---")
+        print(f"Current Price: ₹{current_price:.2f}")
+        print(f"52-Week High: ₹{fifty_two_week_high:.2f}")
+        print(f"Price is {initial_drop_percentage:.0f}% down from its 52-week high (₹{initial_drop_threshold:.2f}).")
+        status['initial_drop_alerted'] = True
+        status['initial_drop_price'] = current_price
+        status['last_notified_price'] = current_price
+        print("Monitoring for further 1% drops...")
+        return
+
+    if status['initial_drop_alerted'] and current_price < status['last_notified_price']:
+        next_drop_threshold = status['last_notified_price'] * (1 - subsequent_drop_percentage / 100)
+        if current_price <= next_drop_threshold:
+            percentage_fall_from_initial = ((status['initial_drop_price'] - current_price) / status['initial_drop_price']) * 100
+            print(f"\n--- UPDATE! {stock_name} ({ticker}) ---")
+            print(f"Current Price: ₹{current_price:.2f}")
+            print(f"Price has fallen another {subsequent_drop_percentage:.0f}% from ₹{status['last_notified_price']:.2f}.")
+            print(f"Total fall from 20% down level: {percentage_fall_from_initial:.2f}%")
+            status['last_notified_price'] = current_price
+            return
+    elif status['initial_drop_alerted'] and current_price > status['last_notified_price'] * (1 + subsequent_drop_percentage / 100):
+        status['last_notified_price'] = current_price
+
+
+def case_check_and_notify_loop(n):
+    tickers, prices, highs = synth.synthetic_quotes(n)
+    # The original dict-per-ticker loop, primed with every 52-week high like its main() did
+    monitoring_status = {ticker: {'52_week_high': high, 'current_price': high, 'initial_drop_price': None,
+                                  'last_notified_price': None, 'initial_drop_alerted': False}
+                         for ticker, high in zip(tickers, highs)}
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for ticker, price, high in zip(tickers, prices, highs):
+                _baseline_check_and_notify(monitoring_status, ticker, ticker, price, high)
+    return run
+
+
+def case_check_and_notify_vectorized(n):
+    tickers, prices, highs = synth.synthetic_quotes(n)
+    informer = _fresh_informer(tickers, prices, highs)
+    ids = np.arange(n)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            informer.check_and_notify_all(ids, prices)
+    return run
+
+
+def case_gainers_losers_loop(n):
+    tickers = synth.synthetic_tickers(n)
+    data = synth.synthetic_download_frame(tickers, n_bars=60)
+
+    def run():
+        # The notebook's original per-ticker loop and two full sorts
+        result = []
+        for stock in tickers:
+            try:
+                df = data[stock].copy()
+                last_row = df.iloc[-1]
+                open_price = df.iloc[0]['Open']
+                close_price = last_row['Close']
+                change_pct = ((close_price - open_price) / open_price) * 100
+                result.append({"symbol": stock.replace(".NS", ""), "open": round(open_price, 2),
+                               "last_price": round(close_price, 2), "change_pct": round(change_pct, 2)})
+            except Exception:
+                continue
+        df_result = pd.DataFrame(result).dropna()
+        return (df_result.sort_values(by="change_pct", ascending=False).head(10),
+                df_result.sort_values(by="change_pct", ascending=True).head(10))
+    return run
+
+
+def case_gainers_losers_vectorized(n):
+    from gainers_losers import extract_open_last, top_gainers_losers
+
+    tickers = synth.synthetic_tickers(n)
+    data = synth.synthetic_download_frame(tickers, n_bars=60)
+
+    def run():
+        open_prices, last_prices = extract_open_last(data, tickers)
+        return top_gainers_losers(tickers, open_prices, last_prices, n=10)
+    return run
+
+
+def _chain_records(n):
+    expiries = ('25-Jul-2025', '31-Jul-2025', '28-Aug-2025')
+    per_expiry = max(1, n // len(expiries))
+    return synth.synthetic_option_chain('NIFTY', n_strikes=per_expiry, expiries=expiries)['records']
+
+
+def case_option_chain_apply_series(n):
+    records = _chain_records(n)
+
+    def run():
+        # The extractor's original flattening: one pd.Series per CE / PE dict
+        df = pd.DataFrame(records['data'])
+        ce = pd.concat([df.drop(['CE'], axis=1), df['CE'].apply(pd.Series)], axis=1)
+        pe = pd.concat([df.drop(['PE'], axis=1), df['PE'].apply(pd.Series)], axis=1)
+        return ce, pe
+    return run
+
+
+def case_option_chain_columnar(n):
+    from nse_option_chain_fetcher import records_to_frame
+
+    records = _chain_records(n)
+    return lambda: records_to_frame(records)
+
+
+def case_sentiment_analyze(n):
+    from news_sentiment_analysis import analyze_sentiment
+
+    articles = synth.synthetic_headlines(n, unique=max(1, n // 10))
+    return lambda: analyze_sentiment(articles)
+
+
+def case_sentiment_batch(n):
+    from sentiment_batch import BatchSentimentScorer
+
+    articles = synth.synthetic_headlines(n, unique=max(1, n // 10))
+    scorer = BatchSentimentScorer(cache=None, processes=1)
+    return lambda: scorer.score_by_ticker(articles)
+
+
+def case_lstm_windows_loop(n):
+    from lstm_windows import notebook_loop_windows
+
+    series = np.random.default_rng(0).random((n + 60, 1))
+    return lambda: notebook_loop_windows(series)
+
+
+def case_lstm_windows_strided(n):
+    from lstm_windows import train_test_windows
+
+    series = np.random.default_rng(0).random(n + 60).astype(np.float32)
+
+    def run():
+        x_train, y_train, _, _ = train_test_windows(series, len(series))
+        return x_train[::max(1, n // 1000)].sum()  # touch the windows so the view is used
+    return run
+
+
+def case_quote_snapshot_read(n):
+    import atexit
+
+    from quote_snapshot import SnapshotReader, SnapshotWriter
+
+    tickers = [f"SNAP{i:06d}.NS" for i in range(n)]
+    name = f'market_benchmarks_snapshot_{n}'
+    writer = SnapshotWriter(tickers, name=name)
+    atexit.register(writer.close)
+    prices = np.random.default_rng(0).uniform(100, 5000, n)
+    writer.publish(np.arange(n), last=prices, open=prices, high_52_week=prices * 1.2)
+    reader = SnapshotReader(name)
+    ids = reader.ids(tickers)
+
+    def run():
+        while True:
+            seq = reader.begin()
+            drawdown = 1 - reader.last[ids] / reader.high_52_week[ids]
+            if not reader.retry(seq):
+                return drawdown
+    return run
+
+
+def case_cli_import(n):
+    from market_cli import _run_python, heavy_modules_loaded
+
+    # Startup only stays fast while importing the CLI loads none of the engines
+    loaded = heavy_modules_loaded()
+    if loaded:
+        raise AssertionError(f"import market_cli loaded {', '.join(loaded)}")
+
+    def run():
+        for _ in range(n):
+            _run_python('import market_cli; market_cli.build_parser()')
+    return run
+
+
+def case_cli_price_startup(n):
+    from market_cli import _run_python
+
+    code = ("import market_cli; market_cli.main(['price', '--spot', '100', '--strike', '105', "
+            "'--days', '30', '--vol', '0.2'])")
+
+    def run():
+        for _ in range(n):
+            _run_python(code)
+    return run
+
+
+def case_extremes_index_update(n):
+    from extremes_index import ExtremesIndex
+
+    frames = synth.synthetic_ohlc_frames(n, 261)
+    tickers = list(frames)
+    highs = np.column_stack([frames[t]['high'].to_numpy() for t in tickers])
+    lows = np.column_stack([frames[t]['low'].to_numpy() for t in tickers])
+    index = ExtremesIndex()
+    index.load_arrays(tickers, frames[tickers[0]].index[:-1], highs[:-1], lows[:-1])
+    ids = index.ids(tickers)
+    day = frames[tickers[0]].index[-1]
+
+    def run():
+        # Re-applying the same bar is idempotent, so every repeat does the same work
+        index.update(ids, day, highs[-1], lows[-1])
+        return index.high(ids)
+    return run
+
+
+def case_option_chain_store_oi_change(n):
+    import atexit
+    import shutil
+    import tempfile
+
+    from option_chain_store import OptionChainStore, synthetic_chain_session
+
+    # n strikes in each of the three expiries, one snapshot a minute from 09:15 to 11:15
+    root = tempfile.mkdtemp(prefix='market_benchmarks_chain_')
+    atexit.register(shutil.rmtree, root, True)
+    store = OptionChainStore(root)
+    for when, frame in synthetic_chain_session(n_snapshots=121, n_strikes=n):
+        store.record('NIFTY', frame, when)
+    reader = OptionChainStore(root)
+
+    def run():
+        return reader.oi_change('NIFTY', '09:30', '11:00', day='2025-07-24')
+    return run
+
+
+def case_bar_aggregation_batch(n):
+    from bar_aggregation import SESSION_MINUTES, aggregate, frames_to_panel
+
+    # n symbols, one session of 1-minute bars, reduced to every timeframe
+    _, index, panel = frames_to_panel(synth.synthetic_ohlc_frames(n, SESSION_MINUTES, interval='1m'))
+
+    def run():
+        return aggregate(index, panel)
+    return run
+
+
+def case_bar_aggregation_streaming(n):
+    from bar_aggregation import FIELDS, SESSION_MINUTES, StreamingBars, frames_to_panel
+
+    symbols, index, panel = frames_to_panel(synth.synthetic_ohlc_frames(n, SESSION_MINUTES, interval='1m'))
+    bars = StreamingBars(symbols)
+    bars.replay(index[:-1], {field: panel[field][:, :-1] for field in FIELDS})
+    last = [panel[field][:, -1] for field in FIELDS]
+
+    def run():
+        # The session's last minute: folds into and completes every timeframe
+        return bars.update(index[-1], *last)
+    return run
+
+
+def case_price_models_inference(n):
+    import atexit
+    import shutil
+    import tempfile
+
+    from price_models import DEFAULT_PARAMS, InferenceService, ModelCache, untrained_trainer
+
+    # n tickers with cached models; one cycle predicts all of them
+    root = tempfile.mkdtemp(prefix='market_benchmarks_models_')
+    atexit.register(shutil.rmtree, root, True)
+    cache = ModelCache(root)
+    tickers = synth.synthetic_tickers(n)
+    _, paths = synth.synthetic_price_paths(n, 200)
+    result = untrained_trainer(paths[:, 0], DEFAULT_PARAMS)
+    for ticker in tickers:
+        cache.save(ticker, 'benchmark', result, DEFAULT_PARAMS)
+    service = InferenceService(tickers, cache)
+    closes = paths.T
+
+    def run():
+        return service.predict(closes)
+    return run
+
+
+def case_chain_analytics_summary(n):
+    from chain_analytics import chain_summary
+    from nse_option_chain_fetcher import indices, records_to_frame
+
+    # n strikes per expiry for each of the three indices
+    frames = {symbol: records_to_frame(synth.synthetic_option_chain(symbol, n_strikes=n, seed=i)['records'])
+              for i, symbol in enumerate(indices)}
+
+    def run():
+        return chain_summary(frames)
+    return run
+
+
+def case_job_scheduler_virtual(n):
+    import asyncio
+    from job_scheduler import COALESCE, SKIP, InlineExecutor, Scheduler, VirtualClock
+
+    # n minute jobs (alternating SKIP / COALESCE) driven through one virtual hour
+    def run():
+        clock = VirtualClock(start=1_700_000_017.0)
+        scheduler = Scheduler(clock, executor=InlineExecutor())
+        for i in range(n):
+            scheduler.every(60, lambda: None, name=f'bench_{i}', policy=COALESCE if i % 2 else SKIP)
+
+        async def drive():
+            runner = asyncio.ensure_future(scheduler.run())
+            await clock.advance(3600)
+            scheduler.stop()
+            await runner
+        asyncio.run(drive())
+        return scheduler
+    return run
+
+
+# name: (factory, largest scale worth running)
+CASES = {
+    'black_scholes.scalar': (case_black_scholes_scalar, 10_000),
+    'black_scholes.batch': (case_black_scholes_batch, 100_000),
+    'lattice.american': (case_lattice_american, 10_000),
+    'scenario_grid.positions': (case_scenario_grid, 10_000),
+    'check_and_notify.loop': (case_check_and_notify_loop, 10_000),
+    'check_and_notify.vectorized': (case_check_and_notify_vectorized, 100_000),
+    'drop_alert_backtest.symbols': (case_drop_alert_backtest, 1_000),
+    'gainers_losers.loop': (case_gainers_losers_loop, 1_000),
+    'gainers_losers.vectorized': (case_gainers_losers_vectorized, 10_000),
+    'option_chain.apply_series': (case_option_chain_apply_series, 10_000),
+    'option_chain.columnar': (case_option_chain_columnar, 100_000),
+    'sentiment.analyze_sentiment': (case_sentiment_analyze, 10_000),
+    'sentiment.batch': (case_sentiment_batch, 100_000),
+    'lstm_windows.loop': (case_lstm_windows_loop, 100_000),
+    'lstm_windows.strided': (case_lstm_windows_strided, 100_000),
+    'quote_snapshot.read': (case_quote_snapshot_read, 100_000),
+    'extremes_index.update': (case_extremes_index_update, 10_000),
+    'option_chain_store.oi_change': (case_option_chain_store_oi_change, 1_000),
+    'chain_analytics.summary': (case_chain_analytics_summary, 10_000),
+    'job_scheduler.virtual': (case_job_scheduler_virtual, 100),
+    'bar_aggregation.batch': (case_bar_aggregation_batch, 1_000),
+    'bar_aggregation.streaming': (case_bar_aggregation_streaming, 10_000),
+    'price_models.inference': (case_price_models_inference, 1_000),
+    'cli.import': (case_cli_import, 10),        # items are fresh interpreters
+    'cli.price_startup': (case_cli_price_startup, 10),
+}
+
+
+def load_script(name):
+    from script_loader import load_script as _load_script
+
+    return _load_script(name)
+
+
+# --- Measurement ---
+def measure(run, n):
+    """Times repeated runs of one case at one scale and measures its peak traced memory."""
+    start = time.perf_counter()
+    run()  # warm-up, also sizes the number of repeats
+    first = time.perf_counter() - start
+    repeats = int(min(MAX_REPEATS, max(3, TIME_BUDGET_SECONDS / max(first, 1e-9))))
+
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies)
+
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    p50 = float(np.percentile(latencies, 50))
+    return {
+        'items': n,
+        'repeats': repeats,
+        'throughput_per_sec': n / p50,
+        'p50_ms': p50 * 1000,
+        'p99_ms': float(np.percentile(latencies, 99)) * 1000,
+        'peak_mem_bytes': int(peak),
+    }
+
+
+def run_suite(scales=DEFAULT_SCALES, only=None):
+    """Runs every case (optionally filtered by substring) at every scale it supports."""
+    results = {}
+    for name, (factory, max_scale) in CASES.items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+        for n in scales:
+            if n > max_scale:
+                continue
+            key = f"{name}@{n}"
+            try:
+                results[key] = measure(factory(n), n)
+            except ImportError as e:
+                print(f"Skipping {key}: {e}")
+                break
+            r = results[key]
+            print(f"{key:<40} {r['throughput_per_sec']:>14,.0f} items/s | p50 {r['p50_ms']:>10.3f} ms "
+                  f"| p99 {r['p99_ms']:>10.3f} ms | peak {r['peak_mem_bytes'] / 2**20:>9.2f} MiB")
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, tolerance=0.10):
+    """
+    Prints throughput and memory ratios against a baseline.
+
+    Returns:
+    list: keys whose throughput dropped by more than `tolerance`.
+    """
+    regressions = []
+    print(f"\n{'case':<40} {'baseline/s':>14} {'current/s':>14} {'speed':>8} {'memory':>8}")
+    for key, now in current['results'].items():
+        before = baseline['results'].get(key)
+        if before is None:
+            print(f"{key:<40} {'-':>14} {now['throughput_per_sec']:>14,.0f} {'new':>8}")
+            continue
+        speed = now['throughput_per_sec'] / before['throughput_per_sec']
+        memory = now['peak_mem_bytes'] / max(before['peak_mem_bytes'], 1)
+        flag = ''
+        if speed < 1 - tolerance:
+            regressions.append(key)
+            flag = '  REGRESSION'
+        print(f"{key:<40} {before['throughput_per_sec']:>14,.0f} {now['throughput_per_sec']:>14,.0f} "
+              f"{speed:>7.2f}x {memory:>7.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths on synthetic market data.")
+    parser.add_argument('--scales', default=','.join(str(s) for s in DEFAULT_SCALES),
+                        help="comma-separated item counts (default: %(default)s)")
+    parser.add_argument('--only', action='append', help="run only cases whose name contains this text")
+    parser.add_argument('--output', help="write the results to this JSON baseline file")
+    parser.add_argument('--compare', help="compare against this JSON baseline file")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="allowed fractional throughput drop before a case counts as a regression")
+    args = parser.parse_args(argv)
+
+    scales = [int(s) for s in args.scales.split(',') if s]
+    current = run_suite(scales, args.only)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"\nBaseline written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+# One command-line entry point for the scripts: price, alert, gainers, chain, news, predict, train.
+# Importing this module loads only the standard library. Each subcommand imports the
+# engines it needs (NumPy/SciPy, yfinance, requests, TextBlob, TensorFlow) when it runs,
+# so a one-off price check with a known spot never pays for yfinance or Keras.
+#
+#   pip install -e .            # installs the `market` command
+#   market price --spot 2900 --strike 3000 --days 30 --vol 0.25
+#   market price AAPL --strike 200 --expiry 2026-12-18 --vol 0.3
+#   market chain NIFTY BANKNIFTY --strikes 10
+#   python market_cli.py gainers --top 5
+#   market train --workers 4 --threads 2     # nightly LSTM models for the F&O list
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# Modules that must not be loaded by `import market_cli`
+HEAVY_MODULES = ('numpy', 'pandas', 'scipy', 'yfinance', 'requests', 'bs4', 'textblob',
+                 'tensorflow', 'keras', 'feedparser')
+
+
+# --- Subcommands ---
+def cmd_price(args):
+    from script_loader import load_script
+
+    calculator = load_script('black_scholes_calculator')
+    spot, dividend_yield = args.spot, args.dividend_yield
+    if spot is None:
+        if not args.ticker:
+            print("Give a ticker or --spot.", file=sys.stderr)
+            return 2
+        spot, fetched_yield = calculator.get_stock_data(args.ticker.upper())
+        if spot is None:
+            print(f"Could not retrieve the current price of {args.ticker}.", file=sys.stderr)
+            return 1
+        if dividend_yield is None:
+            dividend_yield = fetched_yield or 0.0
+    dividend_yield = dividend_yield or 0.0
+
+    if args.expiry:
+        T = calculator.days_to_years(args.expiry)
+        if T is None:
+            return 2
+    else:
+        T = args.days / 365.0
+
+    print(f"Spot {spot:.2f} | strike {args.strike:.2f} | T {T:.4f}y | r {args.rate:.2%} | "
+          f"vol {args.vol:.2%} | dividend yield {dividend_yield:.2%}")
+    for option_type in ('call', 'put'):
+        european = calculator.black_scholes(spot, args.strike, T, args.rate, args.vol, option_type, dividend_yield)
+        line = f"{option_type.capitalize():<5} European {european:>10.2f}"
+        if args.american:
+            american = calculator.american_option_price(spot, args.strike, T, args.rate, args.vol, option_type,
+                                                        dividend_yield, steps=args.steps)
+            line += f" | American {american:>10.2f}"
+        print(line)
+    return 0
+
+
+def cmd_alert(args):
+    from script_loader import load_script
+
+    informer = load_script('price_informer')
+    if args.interval is not None:
+        informer.CHECK_INTERVAL_SECONDS = args.interval
+    if args.no_metrics:
+        informer.METRICS_PORT = None
+    try:
+        informer.main()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cmd_gainers(args):
+    from gainers_losers import fetch_open_last, top_gainers_losers
+    from universes import FO_STOCKS
+
+    tickers = list(dict.fromkeys(args.tickers or FO_STOCKS))
+    open_prices, last_prices = fetch_open_last(tickers)
+    if all(price != price for price in last_prices):
+        print("No prices could be fetched.", file=sys.stderr)
+        return 1
+    top_gainers, top_losers = top_gainers_losers(tickers, open_prices, last_prices, n=args.top)
+    print(f"\n📈 Top {args.top} Gainers")
+    print(top_gainers.to_string(index=False))
+    print(f"\n📉 Top {args.top} Losers")
+    print(top_losers.to_string(index=False))
+    return 0
+
+
+def cmd_chain(args):
+    import pandas as pd
+
+    from chain_analytics import chain_summary
+    from nse_option_chain_fetcher import NSEOptionChainFetcher
+
+    fetcher = NSEOptionChainFetcher(base_url=args.base_url) if args.base_url else NSEOptionChainFetcher()
+    try:
+        frames = fetcher.fetch_frames([s.upper() for s in args.symbols])
+    finally:
+        fetcher.close()
+    columns = ['CE_openInterest', 'CE_impliedVolatility', 'CE_lastPrice', 'strikePrice',
+               'PE_lastPrice', 'PE_impliedVolatility', 'PE_openInterest']
+    summary = chain_summary(frames)[0].set_index(['symbol', 'expiryDate']) if frames else None
+    for symbol, frame in frames.items():
+        expiry = pd.Timestamp(args.expiry) if args.expiry else frame['expiryDate'].min()
+        rows = frame[frame['expiryDate'] == expiry].sort_values('strikePrice')
+        spot = rows[['CE_underlyingValue', 'PE_underlyingValue']].max(axis=1).max()
+        if args.strikes and spot == spot:
+            nearest = (rows['strikePrice'] - spot).abs().nsmallest(2 * args.strikes).index
+            rows = rows.loc[rows.index.isin(nearest)]
+        print(f"\n{symbol} | expiry {expiry:%d-%b-%Y} | underlying {spot:,.2f}")
+        print(rows[columns].to_string(index=False))
+        if (symbol, expiry) in summary.index:
+            stats = summary.loc[(symbol, expiry)]
+            print(f"Max pain {stats['max_pain']:,.2f} | PCR (OI) {stats['pcr_oi']:.2f} | "
+                  f"PCR (volume) {stats['pcr_volume']:.2f} | call wall {stats['call_wall']:,.2f} | "
+                  f"put wall {stats['put_wall']:,.2f}")
+    return 0 if frames else 1
+
+
+def cmd_news(args):
+    import news_sentiment_analysis as news_sentiment
+
+    news = news_sentiment.get_news(args.ticker)
+    if not news:
+        print("No news data found for the entered ticker symbol.")
+        return 1
+    print(f"\nFetching news for: {args.ticker}")
+    stock_data = news_sentiment.get_stock_data(args.ticker)
+    sentiment = news_sentiment.analyze_sentiment(news)
+    news_sentiment.news_indicator(stock_data, sentiment, news)
+    return 0
+
+
+def cmd_predict(args):
+    import datetime
+
+    from ohlc_cache import OHLCCache
+    from price_predictor import train_and_predict
+
+    end = args.end or (datetime.date.today() + datetime.timedelta(days=1)).isoformat()
+    _, columns, _ = OHLCCache().read_arrays(args.ticker, '1d', args.start, end)
+    close = columns['close']
+    print(f"Training on {len(close):,} daily closes of {args.ticker} ({args.epochs} epoch(s))...")
+    result = train_and_predict(close, epochs=args.epochs, batch_size=args.batch_size)
+    print(f"Test RMSE: {result['rmse']:.2f}")
+    print(f"Last close: {close[-1]:.2f} | predicted next close: {result['next_close']:.2f}")
+    return 0
+
+
+def cmd_train(args):
+    import datetime
+
+    from price_models import ModelCache, load_closes, train_many
+    from universes import FO_STOCKS
+
+    tickers = list(dict.fromkeys(args.tickers or FO_STOCKS))
+    end = args.end or (datetime.date.today() + datetime.timedelta(days=1)).isoformat()
+    closes = load_closes(tickers, args.start, end)
+    if not closes:
+        print("No closing prices could be loaded; nothing to train.")
+        return 1
+    cache = ModelCache(args.model_dir) if args.model_dir else ModelCache()
+    report = train_many(closes, params={'epochs': args.epochs, 'batch_size': args.batch_size}, cache=cache,
+                        max_workers=args.workers, threads_per_worker=args.threads)
+    print(report.drop(columns='key').to_string(index=False))
+    return 0 if not report['status'].str.startswith('failed').any() else 1
+
+
+# --- Parser ---
+def build_parser():
+    parser = argparse.ArgumentParser(prog='market', description="Financial analysis and stock market tools.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    price = subparsers.add_parser('price', help="Black-Scholes and American lattice option prices")
+    price.add_argument('ticker', nargs='?', help="ticker to fetch the spot and dividend yield for")
+    price.add_argument('--spot', type=float, help="underlying price (skips the quote lookup)")
+    price.add_argument('--strike', type=float, required=True)
+    expiry = price.add_mutually_exclusive_group(required=True)
+    expiry.add_argument('--expiry', help="expiration date, YYYY-MM-DD")
+    expiry.add_argument('--days', type=float, help="calendar days to expiration")
+    price.add_argument('--rate', type=float, default=0.02, help="risk-free rate (default: %(default)s)")
+    price.add_argument('--vol', type=float, required=True, help="annualized volatility, e.g. 0.2")
+    price.add_argument('--dividend-yield', type=float, help="overrides the fetched dividend yield")
+    price.add_argument('--no-american', dest='american', action='store_false', help="skip the lattice prices")
+    price.add_argument('--steps', type=int, default=200, help="lattice steps (default: %(default)s)")
+    price.set_defaults(handler=cmd_price)
+
+    alert = subparsers.add_parser('alert', help="run the 20%%-drop price informer")
+    alert.add_argument('--interval', type=float, help="seconds between checks")
+    alert.add_argument('--no-metrics', action='store_true', help="do not start the /metrics endpoint")
+    alert.set_defaults(handler=cmd_alert)
+
+    gainers = subparsers.add_parser('gainers', help="top gainers and losers of the F&O list since the open")
+    gainers.add_argument('--top', type=int, default=10)
+    gainers.add_argument('--tickers', nargs='*', help="rank these tickers instead of the F&O list")
+    gainers.set_defaults(handler=cmd_gainers)
+
+    chain = subparsers.add_parser('chain', help="NSE option chain around the money")
+    chain.add_argument('symbols', nargs='+', help="e.g. NIFTY BANKNIFTY TCS")
+    chain.add_argument('--expiry', help="expiry date (default: the nearest)")
+    chain.add_argument('--strikes', type=int, default=10, help="strikes each side of the spot; 0 for all")
+    chain.add_argument('--base-url', help="NSE site root, e.g. a LocalNSEServer (default: nseindia.com)")
+    chain.set_defaults(handler=cmd_chain)
+
+    news = subparsers.add_parser('news', help="headline sentiment indicator for a ticker")
+    news.add_argument('ticker')
+    news.set_defaults(handler=cmd_news)
+
+    predict = subparsers.add_parser('predict', help="train the LSTM on daily closes and predict the next one")
+    predict.add_argument('ticker')
+    predict.add_argument('--start', default='2012-01-01')
+    predict.add_argument('--end', help="exclusive end date (default: today)")
+    predict.add_argument('--epochs', type=int, default=1)
+    predict.add_argument('--batch-size', type=int, default=64)
+    predict.set_defaults(handler=cmd_predict)
+
+    train = subparsers.add_parser('train', help="train and cache one LSTM per ticker of the F&O list in parallel")
+    train.add_argument('--tickers', nargs='*', help="train these tickers instead of the F&O list")
+    train.add_argument('--start', default='2012-01-01')
+    train.add_argument('--end', help="exclusive end date (default: today)")
+    train.add_argument('--epochs', type=int, default=1)
+    train.add_argument('--batch-size', type=int, default=64)
+    train.add_argument('--workers', type=int, help="worker processes (default: CPUs / threads)")
+    train.add_argument('--threads', type=int, default=1, help="CPU threads per worker (default: %(default)s)")
+    train.add_argument('--model-dir', help="model cache directory")
+    train.set_defaults(handler=cmd_train)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+# --- Startup cost ---
+def _run_python(code):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                   stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def heavy_modules_loaded():
+    """Heavy modules a fresh interpreter has loaded after `import market_cli` (should be none)."""
+    code = ("import sys, market_cli; "
+            "print(','.join(m for m in market_cli.HEAVY_MODULES if m in sys.modules))")
+    out = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    return out.split(',') if out else []
+
+
+def benchmark_startup(repeats=5):
+    """Prints the median wall time of a fresh interpreter importing the CLI and pricing one option."""
+    cases = {
+        'python (empty)': 'pass',
+        'import market_cli': 'import market_cli',
+        'market price --spot': "import market_cli; market_cli.main(['price', '--spot', '100', '--strike', '105', "
+                               "'--days', '30', '--vol', '0.2'])",
+        'legacy calculator import': "from script_loader import load_script; import scipy.stats, yfinance; "
+                                    "load_script('black_scholes_calculator')",
+    }
+    print(f"--- CLI startup (median of {repeats} fresh interpreters) ---")
+    for name, code in cases.items():
+        times = sorted(_run_python(code) for _ in range(repeats))
+        print(f"{name:<28} {times[len(times) // 2] * 1000:>8.0f} ms")
+    loaded = heavy_modules_loaded()
+    print(f"Heavy modules loaded by `import market_cli`: {', '.join(loaded) or 'none'}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
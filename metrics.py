@@ -0,0 +1,375 @@
+# Lightweight instrumentation for the polling loops and fetchers.
+# Counters and fixed-bucket histograms with labels, a timing context for hot-path stages,
+# and a local HTTP endpoint serving everything in Prometheus text format (/metrics) and
+# as JSON (/metrics.json). Recording a sample is a dict lookup, a bisect and a short
+# locked update, so the instrumentation can stay on in production.
+
+import bisect
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency buckets in seconds: from sub-millisecond evaluation steps to minute-long cycles
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+DEFAULT_METRICS_PORT = 9108
+
+
+# --- Metric types ---
+class _CounterValue:
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self.lock:
+            self.value += amount
+
+
+class _HistogramValue:
+    __slots__ = ('bounds', 'counts', 'sum', 'count', 'lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.counts), self.sum, self.count
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    """Context manager that observes the elapsed wall time into a histogram child."""
+    __slots__ = ('child', 'start', 'elapsed')
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        self.child.observe(self.elapsed)
+        return False
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        self.lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **labels):
+        """
+        Returns the child for one combination of label values, creating it on first use.
+        Hot loops can keep the child and call inc() / observe() / time() on it directly.
+        """
+        if not values:
+            if len(labels) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            values = map(labels.__getitem__, self.labelnames)
+        # Children are keyed by string values, so inc(port=8080) and inc(port='8080') agree
+        try:
+            values = tuple(map(str, values))
+        except KeyError:
+            raise ValueError(f"{self.name} expects labels {self.labelnames}") from None
+        try:
+            return self.children[values]
+        except KeyError:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}") from None
+            with self.lock:
+                return self.children.setdefault(values, self._new_child())
+
+    def items(self):
+        with self.lock:
+            return list(self.children.items())
+
+
+class Counter(_Metric):
+    """Monotonic counter, one value per label combination."""
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount=1.0, **labels):
+        self.labels(**labels).inc(amount)
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram, one set of buckets per label combination."""
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.bounds)
+
+    def observe(self, value, **labels):
+        self.labels(**labels).observe(value)
+
+    def time(self, **labels):
+        """`with histogram.time(stage='fetch'):` records how long the block took."""
+        return _Timer(self.labels(**labels))
+
+
+# --- Registry and exposition ---
+class MetricsRegistry:
+    """Holds every metric of a process and renders them for the HTTP endpoint."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _register(self, metric):
+        with self.lock:
+            existing = self.metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self.metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render_prometheus(self):
+        """Prometheus text exposition format, version 0.0.4."""
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for key, child in sorted(metric.items()):
+                labels = list(zip(metric.labelnames, key))
+                if metric.kind == 'counter':
+                    lines.append(f"{metric.name}{_format_labels(labels)} {_format_value(child.value)}")
+                    continue
+                counts, total, count = child.snapshot()
+                cumulative = 0
+                for bound, bucket_count in zip(metric.bounds + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else _format_value(bound)
+                    lines.append(f"{metric.name}_bucket{_format_labels(labels + [('le', le)])} {cumulative}")
+                lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{metric.name}_count{_format_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def to_dict(self):
+        """Every metric as plain data; histograms also carry p50/p90/p99 bucket estimates."""
+        out = {}
+        for metric in list(self.metrics.values()):
+            samples = []
+            for key, child in sorted(metric.items()):
+                sample = {'labels': dict(zip(metric.labelnames, key))}
+                if metric.kind == 'counter':
+                    sample['value'] = child.value
+                else:
+                    counts, total, count = child.snapshot()
+                    sample.update({
+                        'count': count,
+                        'sum': total,
+                        # Per-bucket (not cumulative) counts keyed by upper bound
+                        'buckets': {('+Inf' if b == float('inf') else _format_value(b)): c
+                                    for b, c in zip(metric.bounds + (float('inf'),), counts)},
+                        **{f'p{int(q * 100)}': _bucket_quantile(metric.bounds, counts, count, q)
+                           for q in (0.5, 0.9, 0.99)},
+                    })
+                samples.append(sample)
+            out[metric.name] = {'type': metric.kind, 'help': metric.help, 'samples': samples}
+        return out
+
+    def render_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_value(value):
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value) if value != int(value) else str(int(value))
+
+
+def _bucket_quantile(bounds, counts, count, q):
+    """Upper bound of the bucket that holds quantile q (None when empty or past the last bound)."""
+    if not count:
+        return None
+    target = q * count
+    cumulative = 0
+    for bound, bucket_count in zip(bounds, counts):
+        cumulative += bucket_count
+        if cumulative >= target:
+            return bound
+    return None
+
+
+# --- HTTP endpoint ---
+class MetricsServer:
+    """
+    Serves a registry on http://host:port/metrics (Prometheus) and /metrics.json.
+    Use it as a context manager, or call start() / close() around a long-running loop.
+    """
+
+    def __init__(self, registry=None, host='127.0.0.1', port=DEFAULT_METRICS_PORT):
+        self.registry = registry or REGISTRY
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _handler(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/metrics':
+                    body, content_type = registry.render_prometheus(), 'text/plain; version=0.0.4; charset=utf-8'
+                elif path == '/metrics.json':
+                    body, content_type = registry.render_json(), 'application/json'
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                payload = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- Shared metrics used by the loops and fetchers ---
+REGISTRY = MetricsRegistry()
+STAGE_SECONDS = REGISTRY.histogram(
+    'stage_duration_seconds', 'Wall time of each stage of a polling loop', ['loop', 'stage'])
+CYCLE_SECONDS = REGISTRY.histogram(
+    'cycle_duration_seconds', 'Wall time of a full polling cycle, before any sleep', ['loop'])
+CYCLE_OVERRUNS = REGISTRY.counter(
+    'cycle_overruns_total', 'Polling cycles that took longer than their interval', ['loop'])
+FETCH_FAILURES = REGISTRY.counter(
+    'fetch_failures_total', 'Tickers or scrips a fetch returned no data for', ['source', 'ticker'])
+RATE_LIMIT_WAITS = REGISTRY.counter(
+    'rate_limit_waits_total', 'Requests that had to wait for a rate-limiter token', ['source'])
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.counter(
+    'rate_limit_wait_seconds_total', 'Seconds spent waiting for rate-limiter tokens', ['source'])
+JOB_LAG_SECONDS = REGISTRY.histogram(
+    'job_lag_seconds', 'Delay between the scheduled time of a job run and its start', ['job'])
+JOB_RUNS_DROPPED = REGISTRY.counter(
+    'job_runs_dropped_total', 'Scheduled job runs skipped or coalesced because the previous run was still going',
+    ['job', 'policy'])
+
+
+def record_cycle(loop, elapsed, interval):
+    """Observes one cycle's duration and counts it as an overrun if it exceeded `interval`."""
+    CYCLE_SECONDS.observe(elapsed, loop=loop)
+    if elapsed > interval:
+        CYCLE_OVERRUNS.inc(loop=loop)
+
+
+def measure_overhead(n=200_000):
+    """Prints the cost of one timed stage and one counter increment, in nanoseconds."""
+    registry = MetricsRegistry()
+    histogram = registry.histogram('overhead_seconds', 'overhead', ['stage'])
+    counter = registry.counter('overhead_total', 'overhead', ['ticker'])
+
+    start = time.perf_counter()
+    for _ in range(n):
+        pass
+    empty = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(n):
+        with histogram.time(stage='evaluate'):
+            pass
+    timed = time.perf_counter() - start
+    child = histogram.labels(stage='evaluate')
+    start = time.perf_counter()
+    for _ in range(n):
+        with child.time():
+            pass
+    bound = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(n):
+        counter.inc(ticker='RELIANCE.NS')
+    counted = time.perf_counter() - start
+
+    print(f"--- Instrumentation overhead ({n:,} operations) ---")
+    print(f"Timed stage:            {(timed - empty) / n * 1e9:>7.0f} ns")
+    print(f"Timed stage, pre-bound: {(bound - empty) / n * 1e9:>7.0f} ns")
+    print(f"Counter increment:      {(counted - empty) / n * 1e9:>7.0f} ns")
+
+
+# Example usage: record a few stages and print both exposition formats
+if __name__ == "__main__":
+    import urllib.request
+
+    for i in range(20):
+        with STAGE_SECONDS.time(loop='example', stage='fetch'):
+            time.sleep(0.001 * (i % 5))
+    FETCH_FAILURES.inc(source='example', ticker='BAD.NS')
+    record_cycle('example', 75.0, 60)
+    with MetricsServer(port=0) as server:
+        print(urllib.request.urlopen(server.url + '/metrics').read().decode()[:1200])
+        stages = json.loads(urllib.request.urlopen(server.url + '/metrics.json').read())
+        print(json.dumps(stages['stage_duration_seconds']['samples'][0], indent=2)[:400])
+    measure_overhead()
@@ -1,9 +1,15 @@
-import yfinance as yf
-from textblob import TextBlob
-import requests
-from bs4 import BeautifulSoup
+# yfinance, requests, BeautifulSoup and TextBlob are imported inside the functions that
+# use them, so importing this module (e.g. from market_cli.py) stays fast
+import pandas as pd
+
+from quote_snapshot import read_quote
+
+SNAPSHOT_MAX_AGE_SECONDS = 180  # Older snapshot quotes are refetched from Yahoo Finance
 
 def get_news(ticker):
+    import requests
+    from bs4 import BeautifulSoup
+
     try:
         url = f"https://finance.yahoo.com/quote/{ticker}/news?p={ticker}"
         response = requests.get(url)
@@ -32,12 +38,20 @@ def get_news(ticker):
 
 # Step 1: Get stock data from Yahoo Finance
 def get_stock_data(ticker):
+    # news_indicator() only needs the latest close, which the shared quote snapshot has
+    quote = read_quote(ticker, max_age=SNAPSHOT_MAX_AGE_SECONDS)
+    if quote is not None and quote['last'] == quote['last']:
+        return pd.DataFrame({'Close': [quote['last']]}, index=pd.to_datetime([quote['timestamp']], unit='s'))
+    import yfinance as yf
+
     stock = yf.Ticker(ticker)
     stock_data = stock.history(period='5d')  # Last 5 days of data
     return stock_data
 
 # Step 2: Get news for the company from Yahoo Finance
 def get_news(ticker):
+    import yfinance as yf
+
     stock = yf.Ticker(ticker)
     news = stock.news  # Get the latest news related to the ticker
     print(news)  # Print the news data to inspect its structure
@@ -45,6 +59,8 @@ def get_news(ticker):
 
 # Step 3: Analyze sentiment of news headlines
 def analyze_sentiment(news_headlines):
+    from textblob import TextBlob
+
     sentiment = {'Positive': 0, 'Neutral': 0, 'Negative': 0}
 
     for article in news_headlines:
@@ -83,19 +99,20 @@ def news_indicator(stock_data, sentiment, news):
         print("Indicator: Hold")
 
 # Main: Get user input for company name or ticker symbol
-query = input("Enter the company name or ticker symbol for which you want news: ")
+if __name__ == "__main__":
+    query = input("Enter the company name or ticker symbol for which you want news: ")
 
-# Try to fetch the news and stock data for the entered query
-news = get_news(query)
+    # Try to fetch the news and stock data for the entered query
+    news = get_news(query)
 
-# If the query is valid, get stock data
-if news:
-    print(f"\nFetching news for: {query}")
+    # If the query is valid, get stock data
+    if news:
+        print(f"\nFetching news for: {query}")
 
-    # Get stock data for the entered ticker
-    stock_data = get_stock_data(query)  # Stock data for the company
+        # Get stock data for the entered ticker
+        stock_data = get_stock_data(query)  # Stock data for the company
 
-    sentiment = analyze_sentiment(news)
-    news_indicator(stock_data, sentiment, news)
-else:
-    print("No news data found for the entered ticker symbol.")
+        sentiment = analyze_sentiment(news)
+        news_indicator(stock_data, sentiment, news)
+    else:
+        print("No news data found for the entered ticker symbol.")
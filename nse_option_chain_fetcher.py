@@ -0,0 +1,298 @@
+# Pooled, concurrent NSE option-chain fetcher.
+# One requests.Session with a sized connection pool is shared by a worker pool, the NSE
+# cookies are refreshed automatically when they age out or a request is rejected, and
+# the CE/PE records are flattened straight into typed columns instead of going through
+# .apply(pd.Series) row by row. LocalNSEServer stands in for nseindia.com in tests.
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import FETCH_FAILURES, STAGE_SECONDS
+
+NSE_BASE_URL = "https://www.nseindia.com"
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36'
+indices = ['BANKNIFTY', 'FINNIFTY', 'NIFTY']
+
+# Numeric fields of the CE / PE legs of each NSE option-chain record
+LEG_FIELDS = [
+    'openInterest', 'changeinOpenInterest', 'pchangeinOpenInterest', 'totalTradedVolume',
+    'impliedVolatility', 'lastPrice', 'change', 'pChange', 'totalBuyQuantity',
+    'totalSellQuantity', 'bidQty', 'bidprice', 'askQty', 'askPrice', 'underlyingValue',
+]
+
+
+def option_chain_path(scrip):
+    """API path for a scrip, using the same index/equity split as FetchOptionChainfromNSE()."""
+    if scrip in indices:
+        return f"/api/option-chain-indices?symbol={scrip}"
+    symbol4NSE = scrip.replace('&', '%26')
+    return f"/api/option-chain-equities?symbol={symbol4NSE}"
+
+
+# --- Fetcher ---
+class NSEOptionChainFetcher:
+    """
+    Fetches NSE option chains over a pooled session.
+
+    Parameters:
+    base_url (str): NSE site root (point it at a LocalNSEServer for tests)
+    max_workers (int): Concurrent requests in fetch_many()
+    retries (int): Retries for connection errors, 429/5xx and rejected cookies
+    cookie_ttl (float): Seconds before the homepage is hit again for fresh cookies
+    """
+
+    def __init__(self, base_url=NSE_BASE_URL, max_workers=4, retries=3, cookie_ttl=300, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.retries = retries
+        self.cookie_ttl = cookie_ttl
+        self.timeout = timeout
+        self.cookies_primed_at = None
+        self.cookie_lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers['user-agent'] = USER_AGENT
+        adapter = HTTPAdapter(
+            pool_connections=max_workers,
+            pool_maxsize=max_workers,
+            max_retries=Retry(total=retries, backoff_factor=0.5,
+                              status_forcelist=(429, 500, 502, 503, 504), allowed_methods=('GET',)),
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def refresh_cookies(self, force=False):
+        """Hits the homepage for session cookies if they are missing, stale or forced."""
+        with self.cookie_lock:
+            fresh = self.cookies_primed_at is not None and time.monotonic() - self.cookies_primed_at < self.cookie_ttl
+            if fresh and not force:
+                return
+            self.session.get(self.base_url + '/', timeout=self.timeout)
+            self.cookies_primed_at = time.monotonic()
+
+    def fetch(self, scrip):
+        """Returns the 'records' part of one scrip's option chain."""
+        self.refresh_cookies()
+        url = self.base_url + option_chain_path(scrip)
+        with STAGE_SECONDS.time(loop='nse_option_chain', stage='fetch'):
+            return self._fetch_records(url, scrip)
+
+    def _fetch_records(self, url, scrip):
+        for attempt in range(self.retries + 1):
+            response = self.session.get(url, timeout=self.timeout)
+            if response.status_code in (401, 403):
+                # NSE rejects requests once the cookies expire; prime again and retry
+                self.refresh_cookies(force=True)
+                continue
+            response.raise_for_status()
+            try:
+                return response.json()['records']
+            except (ValueError, KeyError):
+                # An empty or HTML body is another symptom of stale cookies
+                self.refresh_cookies(force=True)
+        raise RuntimeError(f"Could not fetch option chain for {scrip} after {self.retries + 1} attempts")
+
+    def fetch_many(self, scrips):
+        """
+        Fetches several scrips concurrently.
+
+        Returns:
+        dict: {scrip: records}. Scrips that failed are reported and left out.
+        """
+        self.refresh_cookies()
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {scrip: executor.submit(self.fetch, scrip) for scrip in scrips}
+            for scrip, future in futures.items():
+                try:
+                    results[scrip] = future.result()
+                except Exception as e:
+                    FETCH_FAILURES.inc(source='nse_option_chain', ticker=scrip)
+                    print(f"Error fetching option chain for {scrip}: {e}")
+        return results
+
+    def fetch_frames(self, scrips):
+        """fetch_many() followed by records_to_frame() for every scrip."""
+        return {scrip: records_to_frame(records) for scrip, records in self.fetch_many(scrips).items()}
+
+    def close(self):
+        self.session.close()
+
+
+# --- Columnar parsing ---
+def _as_float(value):
+    """float(value), or NaN for None and non-numeric placeholders such as '-'."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def records_to_frame(records, fields=LEG_FIELDS):
+    """
+    Flattens NSE option-chain records into one typed DataFrame.
+
+    Each row is one (expiryDate, strikePrice) with CE_<field> and PE_<field> float
+    columns; a missing leg or field and a null or non-numeric value all give NaN.
+    Columns are built directly from the record list, without creating a pd.Series per row.
+    """
+    data = records['data'] if isinstance(records, dict) else records
+    n = len(data)
+    columns = {
+        'expiryDate': pd.to_datetime([row['expiryDate'] for row in data], format='%d-%b-%Y'),
+        'strikePrice': np.fromiter((_as_float(row['strikePrice']) for row in data), dtype=float, count=n),
+    }
+    for leg in ('CE', 'PE'):
+        legs = [row.get(leg) for row in data]
+        columns[f'{leg}_present'] = np.fromiter((l is not None for l in legs), dtype=bool, count=n)
+        for field in fields:
+            columns[f'{leg}_{field}'] = np.fromiter(
+                (_as_float(l.get(field)) if l is not None else np.nan for l in legs), dtype=float, count=n)
+    return pd.DataFrame(columns)
+
+
+# --- Synthetic chains and local stand-in server ---
+def synthetic_option_chain(symbol, spot=20000.0, n_strikes=100, strike_step=50.0,
+                           expiries=('25-Jul-2025', '31-Jul-2025', '28-Aug-2025'), seed=0):
+    """Builds an NSE-shaped {'records': {...}} payload with deterministic values."""
+    rng = np.random.default_rng(seed)
+    first_strike = round(spot / strike_step) * strike_step - strike_step * (n_strikes // 2)
+    data = []
+    for expiry in expiries:
+        for i in range(n_strikes):
+            strike = first_strike + i * strike_step
+            row = {'strikePrice': strike, 'expiryDate': expiry}
+            for leg, moneyness in (('CE', spot - strike), ('PE', strike - spot)):
+                # Deep in-the-money legs are often not listed, as on the real site
+                if moneyness > strike_step * n_strikes * 0.4 and rng.random() < 0.5:
+                    continue
+                row[leg] = {
+                    'strikePrice': strike,
+                    'expiryDate': expiry,
+                    'underlying': symbol,
+                    'identifier': f"OPTIDX{symbol}{expiry}{leg}{strike:.2f}",
+                    'openInterest': float(rng.integers(0, 200_000)),
+                    'changeinOpenInterest': float(rng.integers(-20_000, 20_000)),
+                    'pchangeinOpenInterest': float(rng.normal(0, 5)),
+                    'totalTradedVolume': float(rng.integers(0, 1_000_000)),
+                    'impliedVolatility': float(rng.uniform(8, 30)),
+                    'lastPrice': float(max(moneyness, 0) + rng.uniform(1, 200)),
+                    'change': float(rng.normal(0, 10)),
+                    'pChange': float(rng.normal(0, 5)),
+                    'totalBuyQuantity': float(rng.integers(0, 500_000)),
+                    'totalSellQuantity': float(rng.integers(0, 500_000)),
+                    'bidQty': float(rng.integers(0, 5_000)),
+                    'bidprice': float(rng.uniform(1, 500)),
+                    'askQty': float(rng.integers(0, 5_000)),
+                    'askPrice': float(rng.uniform(1, 500)),
+                    'underlyingValue': spot,
+                }
+            data.append(row)
+    return {'records': {'expiryDates': list(expiries), 'data': data, 'underlyingValue': spot}}
+
+
+class LocalNSEServer:
+    """
+    Minimal local stand-in for nseindia.com. The homepage sets a session cookie, the
+    option-chain APIs answer 401 without it, and cookies expire after `cookie_ttl`
+    seconds. fail_next() injects error responses. Use as a context manager; `url` is the base URL to give the fetcher.
+    """
+
+    def __init__(self, chains=None, cookie_ttl=60.0, latency=0.0):
+        self.chains = chains or {}
+        self.cookie_ttl = cookie_ttl
+        self.latency = latency
+        self.issued = {}
+        self.requests = []
+        self.failures = []
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b'', headers=()):
+                self.send_response(status)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                with stand_in.lock:
+                    stand_in.requests.append(parsed.path)
+                if stand_in.latency:
+                    time.sleep(stand_in.latency)
+                with stand_in.lock:
+                    status = stand_in.failures.pop(0) if stand_in.failures and parsed.path != '/' else None
+                if status is not None:
+                    return self._send(status, b'{}')
+
+                if parsed.path == '/':
+                    token = f"{time.monotonic_ns()}"
+                    with stand_in.lock:
+                        stand_in.issued[token] = time.monotonic()
+                    return self._send(200, b'<html></html>', [('Set-Cookie', f'nsit={token}; Path=/')])
+
+                cookie = self.headers.get('Cookie', '')
+                token = dict(part.strip().split('=', 1) for part in cookie.split(';') if '=' in part).get('nsit')
+                with stand_in.lock:
+                    issued_at = stand_in.issued.get(token)
+                if issued_at is None or time.monotonic() - issued_at > stand_in.cookie_ttl:
+                    return self._send(401, b'{}')
+
+                symbol = parse_qs(parsed.query).get('symbol', [''])[0]
+                if symbol not in stand_in.chains:
+                    stand_in.chains[symbol] = synthetic_option_chain(symbol)
+                body = json.dumps(stand_in.chains[symbol]).encode()
+                return self._send(200, body, [('Content-Type', 'application/json')])
+
+        return Handler
+
+    def fail_next(self, count, status=503):
+        """Answers the next `count` option-chain requests with `status`."""
+        with self.lock:
+            self.failures.extend([status] * count)
+
+    def expire_cookies(self):
+        """Invalidates every cookie handed out so far."""
+        with self.lock:
+            self.issued.clear()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# Example usage: fetch all indices concurrently from the local stand-in and flatten them
+if __name__ == "__main__":
+    with LocalNSEServer(latency=0.05) as server:
+        fetcher = NSEOptionChainFetcher(base_url=server.url, max_workers=8)
+        start = time.perf_counter()
+        frames = fetcher.fetch_frames(indices + ['TCS', 'ITC', 'M&M'])
+        elapsed = time.perf_counter() - start
+        for scrip, frame in frames.items():
+            print(f"{scrip:<10} {len(frame):>5} rows")
+        print(f"Fetched and flattened {len(frames)} chains in {elapsed:.3f}s")
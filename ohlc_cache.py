@@ -0,0 +1,312 @@
+# Local columnar OHLC cache used by OHLCHistory().
+# Bars are stored per symbol and interval as one .npy file per column, read back through
+# memory maps, and only the date ranges that were never downloaded are fetched. A small
+# manifest tracks size and last access of every entry so the least recently used ones
+# are evicted once the cache grows past its disk budget.
+
+import atexit
+import json
+import os
+import shutil
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ohlc_cache')
+DEFAULT_DISK_BUDGET_BYTES = 512 * 1024 * 1024
+# Reads only bump last-access times in memory; the manifest is rewritten at most this often
+MANIFEST_TOUCH_INTERVAL_SECONDS = 60
+
+
+# --- Downloaders ---
+def yfinance_downloader(symbol, interval, start, end):
+    """
+    Downloads bars from yfinance with the column names OHLCHistory() returns. Raises
+    RuntimeError when yfinance reports the download as failed, so that an empty frame
+    always means there were no bars in the range.
+    """
+    import yfinance as yf
+
+    data = yf.download(tickers=symbol, start=start, end=end, interval=interval, progress=False)
+    # yfinance logs failures (rate limits, network errors) and returns an empty frame instead of raising
+    errors = getattr(getattr(yf, 'shared', None), '_ERRORS', None) or {}
+    if symbol in errors or symbol.upper() in errors:
+        raise RuntimeError(f"yfinance download failed for {symbol}: {errors.get(symbol, errors.get(symbol.upper()))}")
+    return normalize_frame(data)
+
+
+def normalize_frame(data):
+    """Flattens yfinance's (Price, Ticker) columns and lowercases the OHLCV names."""
+    if data is None:
+        return None
+    if isinstance(data.columns, pd.MultiIndex):
+        data = data.droplevel(-1, axis=1)
+    data = data.rename(columns={
+        'Open': 'open',
+        'High': 'high',
+        'Low': 'low',
+        'Close': 'close',
+        'Volume': 'volume'
+    })
+    return data
+
+
+class FakeDownloader:
+    """
+    Deterministic offline downloader for testing the cache. Generates one bar per
+    weekday (or per minute of the NSE session for intraday intervals) and records
+    every (symbol, interval, start, end) it was asked for in `calls`.
+    """
+
+    def __init__(self, seed=0):
+        self.seed = seed
+        self.calls = []
+
+    def __call__(self, symbol, interval, start, end):
+        self.calls.append((symbol, interval, str(start), str(end)))
+        days = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+        if interval.endswith('d') or interval.endswith('wk') or interval.endswith('mo'):
+            index = days
+        else:
+            minutes = int(interval.rstrip('m'))
+            session = pd.timedelta_range('09:15:00', '15:29:00', freq=f'{minutes}min')
+            index = pd.DatetimeIndex([day + offset for day in days for offset in session]).tz_localize('Asia/Kolkata')
+
+        # Prices depend only on the timestamp, so overlapping downloads agree
+        t = index.asi8.astype(float) / 86_400e9
+        phase = (zlib.crc32(symbol.encode()) % 1000) / 1000 + self.seed
+        close = 1000 + 100 * np.sin(t / 30 + phase) + t % 7
+        return pd.DataFrame({
+            'open': close - 1,
+            'high': close + 2,
+            'low': close - 2,
+            'close': close,
+            'volume': (1000 + (t * 1000) % 500).astype(np.int64),
+        }, index=index)
+
+
+# --- Cache ---
+class OHLCCache:
+    """
+    On-disk OHLC cache keyed by (symbol, interval).
+
+    Parameters:
+    cache_dir (str): Root directory of the cache
+    disk_budget_bytes (int): Total size above which least recently used entries are evicted
+    downloader (callable): downloader(symbol, interval, start, end) -> DataFrame with
+                           lowercase OHLCV columns and a DatetimeIndex
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, disk_budget_bytes=DEFAULT_DISK_BUDGET_BYTES,
+                 downloader=yfinance_downloader):
+        self.cache_dir = cache_dir
+        self.disk_budget_bytes = disk_budget_bytes
+        self.downloader = downloader
+        self.manifest_path = os.path.join(cache_dir, 'manifest.json')
+        os.makedirs(cache_dir, exist_ok=True)
+        self.manifest = self._load_manifest()
+        self._manifest_saved_at = time.time()
+        self._manifest_dirty = False
+        atexit.register(self.flush)
+
+    # --- Manifest (size and last access per entry, used for LRU eviction) ---
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+        self._manifest_saved_at = time.time()
+        self._manifest_dirty = False
+
+    @staticmethod
+    def _key(symbol, interval):
+        return f"{symbol.replace('/', '_')}@{interval}"
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _touch(self, key):
+        if key in self.manifest:
+            now = time.time()
+            self.manifest[key]['last_access'] = now
+            self._manifest_dirty = True
+            if now - self._manifest_saved_at >= MANIFEST_TOUCH_INTERVAL_SECONDS:
+                self._save_manifest()
+
+    def flush(self):
+        """Writes any last-access times that reads have not saved yet."""
+        if self._manifest_dirty:
+            self._save_manifest()
+
+    # --- Coverage bookkeeping ---
+    def _load_meta(self, key):
+        try:
+            with open(os.path.join(self._entry_dir(key), 'meta.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'coverage': [], 'tz': None}
+
+    @staticmethod
+    def _missing_ranges(coverage, start, end):
+        """Returns the [start, end) day ranges not covered by the sorted coverage list."""
+        gaps = []
+        cursor = start
+        for covered_start, covered_end in coverage:
+            covered_start, covered_end = pd.Timestamp(covered_start), pd.Timestamp(covered_end)
+            if covered_end <= cursor:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    @staticmethod
+    def _merge_coverage(coverage, new_ranges):
+        ranges = sorted([(pd.Timestamp(s), pd.Timestamp(e)) for s, e in coverage] + list(new_ranges))
+        merged = []
+        for s, e in ranges:
+            if merged and s <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], e)
+            else:
+                merged.append([s, e])
+        return [[str(s.date()), str(e.date())] for s, e in merged]
+
+    # --- Reads ---
+    def read_arrays(self, symbol, interval, start, end):
+        """
+        Returns (timestamps, {column: array}, tz) for [start, end), filling gaps first.
+        Timestamps are int64 UTC nanoseconds. The arrays are slices of read-only
+        memory maps, so nothing is copied.
+        """
+        key = self._key(symbol, interval)
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        self._fill_gaps(key, symbol, interval, start, end)
+
+        entry_dir = self._entry_dir(key)
+        if not os.path.exists(os.path.join(entry_dir, 'timestamp.npy')):
+            return np.empty(0, dtype=np.int64), {c: np.empty(0) for c in COLUMNS}, None
+
+        meta = self._load_meta(key)
+        timestamps = np.load(os.path.join(entry_dir, 'timestamp.npy'), mmap_mode='r')
+        lo, hi = np.searchsorted(timestamps, [self._bound(start, meta['tz']), self._bound(end, meta['tz'])])
+        columns = {c: np.load(os.path.join(entry_dir, f'{c}.npy'), mmap_mode='r')[lo:hi] for c in COLUMNS}
+        self._touch(key)
+        return timestamps[lo:hi], columns, meta['tz']
+
+    def read(self, symbol, interval, start, end):
+        """Returns the bars for [start, end) as a DataFrame shaped like OHLCHistory() output."""
+        timestamps, columns, tz = self.read_arrays(symbol, interval, start, end)
+        index = pd.DatetimeIndex(np.asarray(timestamps).view('datetime64[ns]'), name='Date')
+        if tz is not None:
+            index = index.tz_localize('UTC').tz_convert(tz)
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    @staticmethod
+    def _bound(day, tz):
+        """Converts a day boundary to the int64 UTC nanoseconds used in timestamp.npy."""
+        return (day.tz_localize(tz) if tz is not None else day).value
+
+    # --- Writes ---
+    def _fill_gaps(self, key, symbol, interval, start, end):
+        meta = self._load_meta(key)
+        # Today's bars are still forming, so never mark today (or later) as covered
+        end_covered = min(end, pd.Timestamp.today().normalize())
+        gaps = self._missing_ranges(meta['coverage'], start, end)
+        if not gaps:
+            return
+
+        frames, fetched, error = [], [], None
+        for gap_start, gap_end in gaps:
+            try:
+                frame = self.downloader(symbol, interval, str(gap_start.date()), str(gap_end.date()))
+            except Exception as e:
+                # A failed download leaves the gap uncovered, so it is requested again next time
+                error = error or e
+                continue
+            # A successful download with no rows (weekends, holidays) still covers its past days
+            if frame is not None and len(frame):
+                frames.append(frame[COLUMNS])
+            if gap_start < end_covered:
+                fetched.append((gap_start, min(gap_end, end_covered)))
+        if frames or fetched:
+            self._write(key, meta, frames, fetched)
+        if error is not None:
+            raise error
+
+    def _write(self, key, meta, frames, fetched_ranges):
+        entry_dir = self._entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        timestamp_path = os.path.join(entry_dir, 'timestamp.npy')
+
+        tz = meta['tz']
+        new_timestamps, new_columns = [], {c: [] for c in COLUMNS}
+        for frame in frames:
+            index = frame.index
+            if index.tz is not None:
+                tz = str(index.tz)
+                index = index.tz_convert('UTC').tz_localize(None)
+            new_timestamps.append(index.values.astype('datetime64[ns]').view(np.int64))
+            for c in COLUMNS:
+                new_columns[c].append(frame[c].to_numpy(dtype=float))
+
+        if new_timestamps:
+            timestamps = np.concatenate(new_timestamps)
+            columns = {c: np.concatenate(new_columns[c]) for c in COLUMNS}
+            if os.path.exists(timestamp_path):
+                # Merge with what is already on disk; fresh downloads win on duplicates
+                old_timestamps = np.load(timestamp_path)
+                timestamps = np.concatenate([timestamps, old_timestamps])
+                columns = {c: np.concatenate([columns[c], np.load(os.path.join(entry_dir, f'{c}.npy'))])
+                           for c in COLUMNS}
+            timestamps, first = np.unique(timestamps, return_index=True)
+            self._save_array(entry_dir, 'timestamp', timestamps)
+            for c in COLUMNS:
+                self._save_array(entry_dir, c, columns[c][first])
+
+        meta = {'coverage': self._merge_coverage(meta['coverage'], fetched_ranges), 'tz': tz}
+        with open(os.path.join(entry_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+        size = sum(os.path.getsize(os.path.join(entry_dir, name)) for name in os.listdir(entry_dir))
+        self.manifest[key] = {'size_bytes': size, 'last_access': time.time()}
+        self._evict(keep=key)
+        self._save_manifest()
+
+    @staticmethod
+    def _save_array(entry_dir, name, array):
+        # Write to a temp file and rename, so open memory maps keep reading the old file
+        tmp_path = os.path.join(entry_dir, f'{name}.tmp.npy')
+        np.save(tmp_path, np.ascontiguousarray(array))
+        os.replace(tmp_path, os.path.join(entry_dir, f'{name}.npy'))
+
+    def _evict(self, keep=None):
+        """Removes least recently used entries until the cache fits its disk budget."""
+        total = sum(entry['size_bytes'] for entry in self.manifest.values())
+        for key in sorted(self.manifest, key=lambda k: self.manifest[k]['last_access']):
+            if total <= self.disk_budget_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self.manifest.pop(key)['size_bytes']
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def clear(self):
+        """Deletes every cached entry."""
+        for key in list(self.manifest):
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+        self.manifest = {}
+        self._save_manifest()
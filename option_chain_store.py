@@ -0,0 +1,424 @@
+# Append-only, delta-encoded store for intraday option-chain snapshots.
+# Every contract (symbol, expiry, strike, CE/PE) gets an integer id. A snapshot only
+# writes the (contract, field, value) records whose value changed since the previous
+# snapshot, and every `keyframe_every` snapshots a dense copy of all values is written
+# as well. A query for the chain at any time memory-maps the segment files, starts from
+# the nearest keyframe and applies at most `keyframe_every` snapshots of deltas, so it
+# never replays the whole day.
+#
+# Layout under the store root:
+#   <symbol>/meta.json                 stored fields
+#   <symbol>/contracts.seg             (expiry day, strike, side) per contract id
+#   <symbol>/<YYYY-MM-DD>/deltas.seg   (contract, field, value) change records
+#   <symbol>/<YYYY-MM-DD>/snapshots.idx  (time, end of deltas, keyframe offset, contracts)
+#   <symbol>/<YYYY-MM-DD>/keyframes.seg  dense (fields x contracts) float64 blocks
+
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from nse_option_chain_fetcher import records_to_frame
+
+DEFAULT_STORE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'option_chain_store')
+STORED_FIELDS = ['openInterest', 'totalTradedVolume', 'lastPrice', 'impliedVolatility']
+KEYFRAME_EVERY = 30          # snapshots between dense keyframes (30 minutes at one per minute)
+SESSION_TZ = 'Asia/Kolkata'
+SIDES = ('CE', 'PE')
+
+CONTRACT_DTYPE = np.dtype([('expiry', '<i4'), ('strike', '<f8'), ('side', 'i1')])
+DELTA_DTYPE = np.dtype([('contract', '<i4'), ('field', 'u1'), ('value', '<f8')])
+SNAPSHOT_DTYPE = np.dtype([('time', '<i8'), ('delta_end', '<i8'), ('keyframe', '<i8'), ('contracts', '<i4')])
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def _timestamp(when=None, day=None):
+    """A tz-aware session timestamp; naive values and bare times like '09:30' are IST."""
+    if when is None:
+        return pd.Timestamp.now(tz=SESSION_TZ)
+    if isinstance(when, str) and len(when) <= 8 and '-' not in when:
+        day = pd.Timestamp(day).date() if day is not None else pd.Timestamp.now(tz=SESSION_TZ).date()
+        when = f"{day} {when}"
+    when = pd.Timestamp(when)
+    return when.tz_localize(SESSION_TZ) if when.tz is None else when.tz_convert(SESSION_TZ)
+
+
+def _read(path, dtype):
+    """Memory-maps a whole segment file (an empty array if it does not exist yet)."""
+    if not os.path.exists(path) or os.path.getsize(path) < dtype.itemsize:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(os.path.getsize(path) // dtype.itemsize,))
+
+
+def _append(path, array):
+    with open(path, 'ab') as f:
+        f.write(np.ascontiguousarray(array).tobytes())
+
+
+# --- Per-symbol store ---
+class _SymbolStore:
+    """Contract registry and the writer state of one symbol."""
+
+    def __init__(self, directory, fields):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                fields = json.load(f)['fields']
+        else:
+            with open(meta_path, 'w') as f:
+                json.dump({'fields': list(fields)}, f)
+        self.fields = list(fields)
+        self.contracts_path = os.path.join(directory, 'contracts.seg')
+        contracts = np.array(_read(self.contracts_path, CONTRACT_DTYPE))
+        self.contracts = contracts
+        self.contract_ids = {(int(c['expiry']), float(c['strike']), int(c['side'])): i
+                             for i, c in enumerate(contracts)}
+        # Writer state: last stored values (fields x contracts) and the day they belong to
+        self.day = None
+        self.values = None
+        self.snapshots_today = 0
+
+    def ids_for(self, expiry_days, strikes, sides):
+        """Contract ids for the given keys, registering (and persisting) new contracts."""
+        ids = np.empty(len(strikes), dtype=np.int32)
+        new = []
+        for i, key in enumerate(zip(expiry_days.tolist(), strikes.tolist(), sides.tolist())):
+            contract_id = self.contract_ids.get(key)
+            if contract_id is None:
+                contract_id = len(self.contract_ids)
+                self.contract_ids[key] = contract_id
+                new.append(key)
+            ids[i] = contract_id
+        if new:
+            added = np.array(new, dtype=CONTRACT_DTYPE)
+            _append(self.contracts_path, added)
+            self.contracts = np.concatenate([self.contracts, added])
+        return ids
+
+    def sync_contracts(self, n_contracts):
+        """
+        Re-reads contracts.seg when a snapshot covers more contracts than this instance
+        knows about, i.e. another store instance (the writer) registered new strikes.
+        """
+        if n_contracts <= len(self.contracts):
+            return
+        contracts = np.array(_read(self.contracts_path, CONTRACT_DTYPE))
+        for i in range(len(self.contracts), len(contracts)):
+            c = contracts[i]
+            self.contract_ids[(int(c['expiry']), float(c['strike']), int(c['side']))] = i
+        self.contracts = contracts
+
+    def day_dir(self, day):
+        return os.path.join(self.directory, str(day))
+
+
+class OptionChainStore:
+    """
+    Records option-chain snapshots and answers open-interest queries.
+
+    Parameters:
+    root (str): Directory holding one sub-directory per symbol
+    fields (list): Leg fields to store (names as in records_to_frame(): 'openInterest', ...)
+    keyframe_every (int): Snapshots between dense keyframes; bounds the deltas a query applies
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR, fields=STORED_FIELDS, keyframe_every=KEYFRAME_EVERY):
+        self.root = root
+        self.default_fields = list(fields)
+        self.keyframe_every = keyframe_every
+        self.symbols = {}
+
+    def _symbol(self, symbol):
+        store = self.symbols.get(symbol)
+        if store is None:
+            store = self.symbols[symbol] = _SymbolStore(os.path.join(self.root, symbol), self.default_fields)
+        return store
+
+    # --- Writing ---
+    def record(self, symbol, chain, when=None):
+        """
+        Stores one snapshot of a chain.
+
+        Parameters:
+        symbol (str): e.g. 'NIFTY'
+        chain: NSE 'records' payload or a records_to_frame() DataFrame
+        when: Snapshot time (default: now); snapshots of a symbol must be recorded in time order
+
+        Returns:
+        int: Number of change records written (0 for a keyframe-only or unchanged snapshot).
+        """
+        frame = chain if isinstance(chain, pd.DataFrame) else records_to_frame(chain)
+        when = _timestamp(when)
+        store = self._symbol(symbol)
+
+        # One row per listed leg: contract ids and a (fields x legs) value matrix
+        expiry_days = (frame['expiryDate'].to_numpy(dtype='datetime64[D]') - EPOCH).astype(np.int32)
+        strikes = frame['strikePrice'].to_numpy(dtype=float)
+        ids, values = [], []
+        for side, leg in enumerate(SIDES):
+            present = frame[f'{leg}_present'].to_numpy()
+            ids.append(store.ids_for(expiry_days[present], strikes[present], np.full(present.sum(), side, np.int8)))
+            values.append(np.vstack([frame[f'{leg}_{field}'].to_numpy(dtype=float)[present] for field in store.fields]))
+        ids = np.concatenate(ids)
+        values = np.hstack(values)
+
+        day = when.date()
+        day_dir = store.day_dir(day)
+        if store.day != day:
+            self._resume(store, day)
+        n_contracts = len(store.contracts)
+        if store.values.shape[1] < n_contracts:
+            grown = np.full((len(store.fields), n_contracts), np.nan)
+            grown[:, :store.values.shape[1]] = store.values
+            store.values = grown
+
+        previous = store.values[:, ids]
+        changed = ~((values == previous) | (np.isnan(values) & np.isnan(previous)))
+        store.values[:, ids] = values
+
+        deltas_path = os.path.join(day_dir, 'deltas.seg')
+        delta_end = os.path.getsize(deltas_path) // DELTA_DTYPE.itemsize if os.path.exists(deltas_path) else 0
+        keyframe = -1
+        written = 0
+        if store.snapshots_today % self.keyframe_every == 0:
+            keyframes_path = os.path.join(day_dir, 'keyframes.seg')
+            keyframe = os.path.getsize(keyframes_path) if os.path.exists(keyframes_path) else 0
+            _append(keyframes_path, store.values[:, :n_contracts])
+        else:
+            field_ids, legs = np.nonzero(changed)
+            records = np.empty(field_ids.size, dtype=DELTA_DTYPE)
+            records['contract'] = ids[legs]
+            records['field'] = field_ids
+            records['value'] = values[field_ids, legs]
+            _append(deltas_path, records)
+            written = records.size
+            delta_end += written
+
+        # The index entry goes last: readers only trust what it points at
+        entry = np.array([(when.value, delta_end, keyframe, n_contracts)], dtype=SNAPSHOT_DTYPE)
+        _append(os.path.join(day_dir, 'snapshots.idx'), entry)
+        store.snapshots_today += 1
+        return written
+
+    def _resume(self, store, day):
+        """Starts (or, after a restart, continues) the given day for a symbol's writer."""
+        os.makedirs(store.day_dir(day), exist_ok=True)
+        store.day = day
+        snapshots = _read(os.path.join(store.day_dir(day), 'snapshots.idx'), SNAPSHOT_DTYPE)
+        store.snapshots_today = len(snapshots)
+        if len(snapshots):
+            store.values = self._state(store, day, len(snapshots) - 1)
+        else:
+            store.values = np.full((len(store.fields), len(store.contracts)), np.nan)
+
+    # --- Reading ---
+    def _state(self, store, day, snapshot):
+        """Dense (fields x contracts) values after the given snapshot index of a day."""
+        day_dir = store.day_dir(day)
+        snapshots = _read(os.path.join(day_dir, 'snapshots.idx'), SNAPSHOT_DTYPE)
+        keyframes = np.flatnonzero(snapshots['keyframe'][:snapshot + 1] >= 0)
+        base = snapshots[keyframes[-1]]
+        n_fields = len(store.fields)
+        block = np.memmap(os.path.join(day_dir, 'keyframes.seg'), dtype='<f8', mode='r',
+                          offset=int(base['keyframe']), shape=(n_fields, int(base['contracts'])))
+        state = np.full((n_fields, int(snapshots[snapshot]['contracts'])), np.nan)
+        state[:, :block.shape[1]] = block
+
+        deltas = _read(os.path.join(day_dir, 'deltas.seg'), DELTA_DTYPE)[int(base['delta_end']):int(snapshots[snapshot]['delta_end'])]
+        if len(deltas):
+            keys = deltas['field'].astype(np.int64) * state.shape[1] + deltas['contract']
+            # Later records win: keep the last occurrence of every (field, contract)
+            _, first_from_end = np.unique(keys[::-1], return_index=True)
+            last = len(keys) - 1 - first_from_end
+            state.reshape(-1)[keys[last]] = deltas['value'][last]
+        return state
+
+    def snapshot_times(self, symbol, day=None):
+        """Times of the snapshots recorded for a symbol on a day (default today)."""
+        store = self._symbol(symbol)
+        day = _timestamp(day).date() if day is not None else _timestamp().date()
+        snapshots = _read(os.path.join(store.day_dir(day), 'snapshots.idx'), SNAPSHOT_DTYPE)
+        return pd.DatetimeIndex(pd.to_datetime(np.asarray(snapshots['time']), utc=True)).tz_convert(SESSION_TZ)
+
+    def state_at(self, symbol, when=None, day=None):
+        """
+        The chain as of the last snapshot at or before `when` (default: latest).
+
+        Returns:
+        DataFrame: One row per contract with expiryDate, strikePrice, side and the stored
+                   fields, plus the snapshot time in .attrs['time']. Empty if there is no
+                   snapshot that day before `when`.
+        """
+        store = self._symbol(symbol)
+        when = _timestamp(when, day)
+        snapshots = _read(os.path.join(store.day_dir(when.date()), 'snapshots.idx'), SNAPSHOT_DTYPE)
+        snapshot = int(np.searchsorted(snapshots['time'], when.value, side='right')) - 1
+        if snapshot < 0:
+            return pd.DataFrame(columns=['expiryDate', 'strikePrice', 'side'] + store.fields)
+        state = self._state(store, when.date(), snapshot)
+        store.sync_contracts(state.shape[1])
+        contracts = store.contracts[:state.shape[1]]
+        frame = pd.DataFrame({
+            'expiryDate': pd.to_datetime(EPOCH + contracts['expiry'].astype('timedelta64[D]')),
+            'strikePrice': contracts['strike'],
+            'side': np.array(SIDES)[contracts['side']],
+            **{field: state[i] for i, field in enumerate(store.fields)},
+        })
+        frame.attrs['time'] = pd.Timestamp(int(snapshots[snapshot]['time']), tz='UTC').tz_convert(SESSION_TZ)
+        return frame
+
+    def oi_change(self, symbol, start, end=None, day=None, expiry=None):
+        """
+        Open-interest change per strike between two times of a day, e.g.
+        oi_change('NIFTY', '09:30', '11:00').
+
+        Returns:
+        DataFrame: expiryDate, strikePrice and, for CE and PE, the OI at start and end and
+                   the change. Contracts without a snapshot at start count from zero.
+        """
+        before = self.state_at(symbol, start, day).set_index(['expiryDate', 'strikePrice', 'side'])
+        after = self.state_at(symbol, end, day).set_index(['expiryDate', 'strikePrice', 'side'])
+        oi = pd.DataFrame({
+            'start': before['openInterest'].reindex(after.index),
+            'end': after['openInterest'],
+        })
+        oi['start'] = oi['start'].fillna(0.0)
+        oi['change'] = oi['end'] - oi['start']
+        if expiry is not None:
+            oi = oi[oi.index.get_level_values('expiryDate') == pd.Timestamp(expiry)]
+        table = oi.unstack('side')
+        table.columns = [f'{side}_oi_{name}' for name, side in table.columns]
+        return table.reset_index()
+
+    def top_oi_buildup(self, symbol, n=10, since=None, when=None, day=None, side=None):
+        """
+        Contracts with the largest open-interest increase from `since` (default: the
+        day's first snapshot) to `when` (default: the latest snapshot).
+
+        Returns:
+        DataFrame: expiryDate, strikePrice, side, oi_start, oi_end, oi_change, the n largest
+                   increases first.
+        """
+        times = self.snapshot_times(symbol, day if day is not None else when)
+        if not len(times):
+            return pd.DataFrame(columns=['expiryDate', 'strikePrice', 'side', 'oi_start', 'oi_end', 'oi_change'])
+        before = self.state_at(symbol, since if since is not None else times[0], day)
+        after = self.state_at(symbol, when, day)
+        start = before['openInterest'].reindex(after.index).fillna(0.0).to_numpy()
+        frame = after[['expiryDate', 'strikePrice', 'side']].assign(
+            oi_start=start, oi_end=after['openInterest'].to_numpy(),
+            oi_change=after['openInterest'].to_numpy() - start)
+        if side is not None:
+            frame = frame[frame['side'] == side]
+        return frame.nlargest(n, 'oi_change').reset_index(drop=True)
+
+    def history(self, symbol, expiry, strike, side, field='openInterest', day=None):
+        """
+        Intraday series of one field of one contract, from the day's keyframes and deltas.
+
+        Returns:
+        Series: The value after every snapshot of the day, indexed by snapshot time.
+        """
+        store = self._symbol(symbol)
+        day = _timestamp(day).date() if day is not None else _timestamp().date()
+        key = (int((np.datetime64(pd.Timestamp(expiry).date(), 'D') - EPOCH).astype(int)), float(strike), SIDES.index(side))
+        day_dir = store.day_dir(day)
+        snapshots = _read(os.path.join(day_dir, 'snapshots.idx'), SNAPSHOT_DTYPE)
+        times = pd.DatetimeIndex(pd.to_datetime(np.asarray(snapshots['time']), utc=True)).tz_convert(SESSION_TZ)
+        values = np.full(len(times), np.nan)
+        if not len(times):
+            return pd.Series(values, index=times, name=field)
+        store.sync_contracts(int(snapshots['contracts'][-1]))
+        contract = store.contract_ids.get(key)
+        if contract is None:
+            return pd.Series(values, index=times, name=field)
+        field_id = store.fields.index(field)
+        deltas = _read(os.path.join(day_dir, 'deltas.seg'), DELTA_DTYPE)
+        mine = np.flatnonzero((deltas['contract'] == contract) & (deltas['field'] == field_id))
+        # Snapshot each record belongs to, from the running delta counts
+        owners = np.searchsorted(snapshots['delta_end'], mine, side='right')
+        values[owners] = deltas['value'][mine]
+        for i in np.flatnonzero(snapshots['keyframe'] >= 0):
+            if contract < snapshots[i]['contracts']:
+                block = np.memmap(os.path.join(day_dir, 'keyframes.seg'), dtype='<f8', mode='r',
+                                  offset=int(snapshots[i]['keyframe']),
+                                  shape=(len(store.fields), int(snapshots[i]['contracts'])))
+                values[i] = block[field_id, contract]
+        # Snapshots without a record for the contract carry the previous value forward
+        return pd.Series(values, index=times, name=field).ffill()
+
+    def disk_usage(self, symbol, day=None):
+        store = self._symbol(symbol)
+        day = _timestamp(day).date() if day is not None else _timestamp().date()
+        day_dir = store.day_dir(day)
+        return sum(os.path.getsize(os.path.join(day_dir, f)) for f in os.listdir(day_dir)) if os.path.isdir(day_dir) else 0
+
+
+# --- Synthetic session and benchmark ---
+def synthetic_chain_session(symbol='NIFTY', n_snapshots=375, change_fraction=0.2, day='2025-07-24', seed=0, **chain_args):
+    """
+    Yields (time, records_to_frame() frame) for one minute-by-minute session starting at
+    09:15 IST. Each minute a `change_fraction` of the listed legs trade: their volume and
+    last price move and their open interest changes.
+    """
+    from nse_option_chain_fetcher import synthetic_option_chain
+
+    rng = np.random.default_rng(seed)
+    frame = records_to_frame(synthetic_option_chain(symbol, seed=seed, **chain_args)['records'])
+    start = _timestamp('09:15', day)
+    for minute in range(n_snapshots):
+        if minute:
+            frame = frame.copy()
+            for leg in SIDES:
+                trades = frame[f'{leg}_present'].to_numpy() & (rng.random(len(frame)) < change_fraction)
+                n = int(trades.sum())
+                frame.loc[trades, f'{leg}_totalTradedVolume'] += rng.integers(1, 5_000, n) * 50
+                frame.loc[trades, f'{leg}_openInterest'] = np.maximum(
+                    frame.loc[trades, f'{leg}_openInterest'] + rng.integers(-2_000, 3_000, n) * 50, 0)
+                frame.loc[trades, f'{leg}_lastPrice'] = np.maximum(
+                    np.round(frame.loc[trades, f'{leg}_lastPrice'] * np.exp(rng.normal(0, 0.01, n)), 2), 0.05)
+        yield start + pd.Timedelta(minutes=minute), frame
+
+
+def benchmark_store(n_snapshots=375, n_strikes=100, root=None):
+    """Records a synthetic session and prints disk use against raw JSON and query latencies."""
+    import shutil
+    import tempfile
+
+    root = root or tempfile.mkdtemp(prefix='option_chain_store_')
+    store = OptionChainStore(root)
+    json_bytes = 0
+    start = time.perf_counter()
+    for when, frame in synthetic_chain_session(n_snapshots=n_snapshots, n_strikes=n_strikes):
+        store.record('NIFTY', frame, when)
+        json_bytes += len(frame.to_json(date_format='iso'))
+    recording = time.perf_counter() - start
+    day = '2025-07-24'
+    stored = store.disk_usage('NIFTY', day)
+
+    def timed(fn):
+        start = time.perf_counter()
+        result = fn()
+        return result, (time.perf_counter() - start) * 1000
+
+    reader = OptionChainStore(root)
+    _, state_ms = timed(lambda: reader.state_at('NIFTY', '15:29', day))
+    change, change_ms = timed(lambda: reader.oi_change('NIFTY', '09:30', '11:00', day))
+    top, top_ms = timed(lambda: reader.top_oi_buildup('NIFTY', 5, day=day, when=f'{day} 15:30'))
+    print(f"--- Option-chain store ({n_snapshots} snapshots, {n_strikes} strikes x 3 expiries) ---")
+    print(f"Recorded in {recording:.2f}s ({recording / n_snapshots * 1000:.2f} ms per snapshot)")
+    print(f"Disk: {stored / 2**20:.2f} MiB vs {json_bytes / 2**20:.2f} MiB as JSON ({json_bytes / stored:.1f}x smaller)")
+    print(f"state_at(15:29): {state_ms:.2f} ms | oi_change(09:30-11:00): {change_ms:.2f} ms | "
+          f"top_oi_buildup: {top_ms:.2f} ms")
+    print(top.to_string(index=False))
+    shutil.rmtree(root, ignore_errors=True)
+    return change
+
+
+# Example usage: record a synthetic session, query it, report size and latency
+if __name__ == "__main__":
+    benchmark_store()
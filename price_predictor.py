@@ -0,0 +1,81 @@
+# LSTM closing-price predictor from the Keras notebook, as importable functions.
+# Same network as the notebook (two 50-unit LSTM layers, Dense 25, Dense 1, Adam on MSE),
+# trained on the zero-copy windows from lstm_windows.py. TensorFlow is only imported when
+# a model is built, so importing this module costs nothing.
+
+import math
+
+import numpy as np
+
+from lstm_windows import TRAIN_FRACTION, WINDOW, TrainSplitScaler, make_tf_dataset, train_test_windows, training_length
+
+
+def build_model(window=WINDOW, units=50):
+    """The notebook's LSTM network, compiled with Adam and mean squared error."""
+    from keras.layers import LSTM, Dense, Input
+    from keras.models import Sequential
+
+    model = Sequential([
+        Input(shape=(window, 1)),
+        LSTM(units, return_sequences=True),
+        LSTM(units, return_sequences=False),
+        Dense(25),
+        Dense(1),
+    ])
+    model.compile(optimizer='adam', loss='mean_squared_error')
+    return model
+
+
+def train_and_predict(close, epochs=1, batch_size=64, window=WINDOW, train_fraction=TRAIN_FRACTION, seed=0, units=50):
+    """
+    Trains the LSTM on the first `train_fraction` of a closing-price series and predicts
+    the rest, one step ahead, like the notebook.
+
+    Parameters:
+    close (array-like): Closing prices, oldest first
+    epochs (int): Passes over the training windows
+    batch_size (int): Mini-batch size (the notebook used 1)
+    seed (int): Seeds Python, NumPy and TensorFlow, so weights and shuffling are reproducible
+
+    Returns:
+    dict: 'predictions' and 'actual' test-period prices, their 'rmse', the model's
+          'next_close' forecast for the bar after the series, the trained 'model' and
+          the fitted 'scaler'.
+    """
+    close = np.asarray(close, dtype=float).reshape(-1)
+    train_len = training_length(close.size, train_fraction)
+    if train_len <= window or close.size - train_len < 1:
+        raise ValueError(f"need more than {window} training rows and at least one test row, got {close.size} rows")
+
+    scaler = TrainSplitScaler().fit(close[:train_len])
+    scaled = scaler.transform(close)
+    x_train, y_train, x_test, _ = train_test_windows(scaled, train_len, window)
+
+    import keras
+
+    keras.utils.set_random_seed(seed)  # the initial weights, not just the batch order, follow the seed
+    model = build_model(window, units)
+    model.fit(make_tf_dataset(x_train, y_train, batch_size=batch_size, seed=seed), epochs=epochs, verbose=0)
+
+    predictions = scaler.inverse_transform(model.predict(x_test[..., np.newaxis], verbose=0).reshape(-1))
+    actual = close[train_len:]
+    next_scaled = model.predict(scaled[-window:].reshape(1, window, 1), verbose=0)
+    return {
+        'predictions': predictions,
+        'actual': actual,
+        'rmse': math.sqrt(np.mean((predictions - actual) ** 2)),
+        'next_close': float(scaler.inverse_transform(next_scaled.reshape(-1))[0]),
+        'model': model,
+        'scaler': scaler,
+    }
+
+
+# Example usage: train on a synthetic random walk and report the test error
+if __name__ == "__main__":
+    from synthetic_market_data import synthetic_price_paths
+
+    _, paths = synthetic_price_paths(1, 1_500)
+    series = paths[:, 0]
+    result = train_and_predict(series, epochs=2)
+    print(f"Test RMSE: {result['rmse']:.2f} | next close forecast: {result['next_close']:.2f} "
+          f"(last close {series[-1]:.2f})")
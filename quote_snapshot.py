@@ -0,0 +1,419 @@
+# Shared-memory quote snapshot: one daemon polls the union of every script's tickers,
+# and the scripts read its prices instead of calling yfinance themselves.
+# The snapshot is a columnar block in multiprocessing.shared_memory (symbol, last, open,
+# 52-week high, dividend yield, timestamp) guarded by a seqlock: the writer makes the
+# sequence number odd while it updates and even again when done, and a reader retries
+# if the number was odd or changed while it read. Readers get NumPy views straight onto
+# the shared block, so reading costs no copy and no network call.
+#
+#   python quote_snapshot.py --universe informer --universe fo --tickers AAPL
+
+import argparse
+import math
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from metrics import STAGE_SECONDS, record_cycle
+from quote_sources import (ConcurrentQuotePoller, QuoteSource, YFinanceQuoteSource, CURRENT_PRICE,
+                           DIVIDEND_YIELD, FIFTY_TWO_WEEK_HIGH, OPEN_PRICE)
+
+DEFAULT_SNAPSHOT_NAME = 'market_quote_snapshot'
+SYMBOL_BYTES = 32
+PRICE_FIELDS = (CURRENT_PRICE, OPEN_PRICE)               # refreshed every cycle, one batch download
+SLOW_FIELDS = (FIFTY_TWO_WEEK_HIGH, DIVIDEND_YIELD)      # refreshed every slow_interval, per ticker
+
+# Header slots (int64)
+SEQ, CAPACITY, N_SYMBOLS, PUBLISHED_NS, CYCLES = range(5)
+HEADER_SLOTS = 8
+
+# Data columns after the header, in order
+COLUMNS = [
+    ('symbol', f'S{SYMBOL_BYTES}'),
+    ('last', np.float64),
+    ('open', np.float64),
+    ('high_52_week', np.float64),
+    ('dividend_yield', np.float64),
+    ('timestamp', np.float64),   # epoch seconds the row's last price was last refreshed
+]
+VALUE_COLUMNS = [name for name, _ in COLUMNS if name != 'symbol']
+
+# Blocks created by a writer in this process; the resource tracker already owns those
+_CREATED_HERE = set()
+
+
+def _layout(capacity):
+    """Byte offset of every column for a given capacity, each aligned to 64 bytes."""
+    offsets = {}
+    offset = HEADER_SLOTS * 8
+    for name, dtype in COLUMNS:
+        offset = -(-offset // 64) * 64
+        offsets[name] = (offset, np.dtype(dtype))
+        offset += np.dtype(dtype).itemsize * capacity
+    return offsets, offset
+
+
+def _map_columns(buffer, capacity):
+    offsets, _ = _layout(capacity)
+    header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=buffer)
+    columns = {name: np.ndarray((capacity,), dtype=dtype, buffer=buffer, offset=offset)
+               for name, (offset, dtype) in offsets.items()}
+    return header, columns
+
+
+def _attach(name):
+    """Opens an existing block without letting this process's resource tracker unlink it on exit."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    from multiprocessing import resource_tracker
+
+    shm = shared_memory.SharedMemory(name=name)
+    if name not in _CREATED_HERE:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+# --- Writer ---
+class SnapshotWriter:
+    """Owns the shared block. Only one writer (the daemon) may publish to a snapshot."""
+
+    def __init__(self, symbols, name=DEFAULT_SNAPSHOT_NAME, capacity=None):
+        symbols = list(dict.fromkeys(symbols))
+        self.capacity = max(capacity or 0, len(symbols), 1)
+        _, size = _layout(self.capacity)
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a daemon that did not shut down cleanly
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = name
+        _CREATED_HERE.add(name)
+        self.header, self.columns = _map_columns(self.shm.buf, self.capacity)
+        self.header[:] = 0
+        self.header[CAPACITY] = self.capacity
+        for column in VALUE_COLUMNS:
+            self.columns[column][:] = np.nan
+        self.symbol_ids = {}
+        self.add_symbols(symbols)
+
+    def add_symbols(self, symbols):
+        """Appends symbols (ids of existing symbols never change). Returns their ids."""
+        new = [s for s in dict.fromkeys(symbols) if s not in self.symbol_ids]
+        if len(self.symbol_ids) + len(new) > self.capacity:
+            raise ValueError(f"snapshot capacity {self.capacity} exceeded")
+        if new:
+            self.header[SEQ] += 1
+            for symbol in new:
+                symbol_id = len(self.symbol_ids)
+                self.columns['symbol'][symbol_id] = symbol.encode('utf-8')[:SYMBOL_BYTES]
+                self.symbol_ids[symbol] = symbol_id
+            self.header[N_SYMBOLS] = len(self.symbol_ids)
+            self.header[SEQ] += 1
+        return np.array([self.symbol_ids[s] for s in symbols], dtype=np.intp)
+
+    def publish(self, ids, **values):
+        """
+        Writes new values for the given ids inside one seqlock section.
+        `values` maps column names (see VALUE_COLUMNS) to arrays aligned with ids;
+        NaN entries keep the previous value. Only rows that got a new last price (or, when
+        no last prices are published, any new value) are stamped, so a ticker whose fetch
+        keeps failing ages out of max_age checks instead of looking fresh.
+        """
+        ids = np.asarray(ids, dtype=np.intp)
+        now = time.time()
+        updated = np.zeros(ids.size, dtype=bool)
+        self.header[SEQ] += 1   # odd: update in progress
+        for column, new in values.items():
+            new = np.asarray(new, dtype=float)
+            keep = np.isnan(new)
+            self.columns[column][ids[~keep]] = new[~keep]
+            if column == 'last' or 'last' not in values:
+                updated |= ~keep
+        self.columns['timestamp'][ids[updated]] = now
+        self.header[PUBLISHED_NS] = time.time_ns()
+        self.header[CYCLES] += 1
+        self.header[SEQ] += 1   # even: consistent again
+
+    def close(self, unlink=True):
+        self.header = self.columns = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+            _CREATED_HERE.discard(self.name)
+
+
+# --- Reader ---
+class SnapshotReader:
+    """
+    Read-only access to a published snapshot.
+
+    Zero-copy use goes through the seqlock directly:
+
+        while True:
+            seq = reader.begin()
+            prices = reader.last[ids]        # any computation on the views
+            if not reader.retry(seq):
+                break
+
+    read() and quote() wrap that loop and return small copies of the requested rows.
+    """
+
+    def __init__(self, name=DEFAULT_SNAPSHOT_NAME):
+        self.shm = _attach(name)
+        capacity = int(np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=self.shm.buf)[CAPACITY])
+        self.header, columns = _map_columns(self.shm.buf, capacity)
+        for array in columns.values():
+            array.flags.writeable = False
+        self.columns = columns
+        self.last = columns['last']
+        self.open = columns['open']
+        self.high_52_week = columns['high_52_week']
+        self.dividend_yield = columns['dividend_yield']
+        self.timestamp = columns['timestamp']
+        self.symbol_ids = {}
+
+    # Seqlock read side
+    def begin(self):
+        """Waits until no write is in progress and returns the sequence number to check later."""
+        while True:
+            seq = int(self.header[SEQ])
+            if seq % 2 == 0:
+                return seq
+            time.sleep(0)
+
+    def retry(self, seq):
+        """True if the snapshot changed since begin() returned `seq`, so the read must be redone."""
+        return int(self.header[SEQ]) != seq
+
+    def _refresh_symbols(self):
+        n = int(self.header[N_SYMBOLS])
+        if n != len(self.symbol_ids):
+            names = self.columns['symbol'][:n]
+            self.symbol_ids = {name.decode('utf-8'): i for i, name in enumerate(names)}
+
+    def ids(self, symbols):
+        """Symbol ids for the given tickers, -1 for tickers the daemon does not poll."""
+        while True:
+            seq = self.begin()
+            self._refresh_symbols()
+            ids = np.array([self.symbol_ids.get(s, -1) for s in symbols], dtype=np.intp)
+            if not self.retry(seq):
+                return ids
+
+    @property
+    def published(self):
+        """Epoch seconds of the last publish, or None before the first one."""
+        ns = int(self.header[PUBLISHED_NS])
+        return ns / 1e9 if ns else None
+
+    def read(self, symbols):
+        """
+        Consistent copy of every column for the given tickers. Rows for tickers that
+        are not in the snapshot are NaN.
+        """
+        ids = self.ids(symbols)
+        known = ids >= 0
+        while True:
+            seq = self.begin()
+            out = {}
+            for column in VALUE_COLUMNS:
+                values = np.full(ids.size, np.nan)
+                values[known] = self.columns[column][ids[known]]
+                out[column] = values
+            if not self.retry(seq):
+                return out
+
+    def quote(self, symbol):
+        """One ticker's row as a dict, or None if it is not published (yet)."""
+        row = self.read([symbol])
+        if math.isnan(row['timestamp'][0]):
+            return None
+        return {column: float(values[0]) for column, values in row.items()}
+
+    def close(self):
+        self.header = self.columns = None
+        self.last = self.open = self.high_52_week = self.dividend_yield = self.timestamp = None
+        self.shm.close()
+
+
+def snapshot_available(name=DEFAULT_SNAPSHOT_NAME):
+    """True if a daemon has created the snapshot and published at least once."""
+    try:
+        reader = SnapshotReader(name)
+    except FileNotFoundError:
+        return False
+    try:
+        return reader.published is not None
+    finally:
+        reader.close()
+
+
+def read_quote(symbol, name=DEFAULT_SNAPSHOT_NAME, max_age=None):
+    """
+    One ticker's snapshot row, or None if no daemon is running, the ticker is not polled
+    or its row is older than `max_age` seconds.
+    """
+    try:
+        reader = SnapshotReader(name)
+    except FileNotFoundError:
+        return None
+    try:
+        quote = reader.quote(symbol)
+    finally:
+        reader.close()
+    if quote is None or (max_age is not None and time.time() - quote['timestamp'] > max_age):
+        return None
+    return quote
+
+
+class SnapshotQuoteSource(QuoteSource):
+    """
+    QuoteSource backed by the shared snapshot, so ConcurrentQuotePoller users (the
+    informer) read the daemon's prices instead of going to the network.
+    """
+
+    FIELD_COLUMNS = {CURRENT_PRICE: 'last', OPEN_PRICE: 'open',
+                     FIFTY_TWO_WEEK_HIGH: 'high_52_week', DIVIDEND_YIELD: 'dividend_yield'}
+
+    def __init__(self, name=DEFAULT_SNAPSHOT_NAME, max_age=None):
+        self.reader = SnapshotReader(name)
+        self.max_age = max_age
+
+    def batch_size(self, fields):
+        return 10_000
+
+    def fetch_batch(self, tickers, fields):
+        rows = self.reader.read(tickers)
+        fresh = ~np.isnan(rows['timestamp'])
+        if self.max_age is not None:
+            fresh &= time.time() - rows['timestamp'] <= self.max_age
+        for field in fields:
+            fresh &= ~np.isnan(rows[self.FIELD_COLUMNS[field]])
+        return {ticker: {field: float(rows[self.FIELD_COLUMNS[field]][i]) for field in fields}
+                for i, ticker in enumerate(tickers) if fresh[i]}
+
+
+# --- Daemon ---
+class QuoteSnapshotDaemon:
+    """
+    Polls a ticker universe once per cycle and publishes it to the shared snapshot.
+    Last and open prices are refreshed every `interval` seconds through one batched
+    request per batch of tickers; the 52-week high and dividend yield change slowly and
+    are refreshed every `slow_interval` seconds.
+    """
+
+    def __init__(self, tickers, source=None, name=DEFAULT_SNAPSHOT_NAME, interval=60, slow_interval=3600,
+                 max_workers=8, requests_per_second=2):
+        self.tickers = list(dict.fromkeys(tickers))
+        self.source = source or YFinanceQuoteSource()
+        self.poller = ConcurrentQuotePoller(self.source, max_workers=max_workers,
+                                            requests_per_second=requests_per_second)
+        self.writer = SnapshotWriter(self.tickers, name=name)
+        self.ids = self.writer.add_symbols(self.tickers)
+        self.interval = interval
+        self.slow_interval = slow_interval
+        self.last_slow_refresh = None
+        self.stage_timers = {stage: STAGE_SECONDS.labels(loop='quote_snapshot', stage=stage)
+                             for stage in ('fetch_prices', 'fetch_slow', 'publish')}
+
+    def _column(self, quotes, field):
+        return np.array([quotes.get(t, {}).get(field, np.nan) for t in self.tickers], dtype=float)
+
+    def run_cycle(self):
+        """Fetches and publishes one cycle. Returns the number of tickers with a price."""
+        values = {}
+        if self.last_slow_refresh is None or time.monotonic() - self.last_slow_refresh >= self.slow_interval:
+            with self.stage_timers['fetch_slow'].time():
+                slow = self.poller.fetch(self.tickers, SLOW_FIELDS)
+            values['high_52_week'] = self._column(slow, FIFTY_TWO_WEEK_HIGH)
+            values['dividend_yield'] = self._column(slow, DIVIDEND_YIELD)
+            self.last_slow_refresh = time.monotonic()
+
+        with self.stage_timers['fetch_prices'].time():
+            quotes = self.poller.fetch(self.tickers, PRICE_FIELDS)
+        values['last'] = self._column(quotes, CURRENT_PRICE)
+        values['open'] = self._column(quotes, OPEN_PRICE)
+
+        with self.stage_timers['publish'].time():
+            self.writer.publish(self.ids, **values)
+        return len(quotes)
+
+    def run_forever(self, cycles=None):
+        """Runs cycles aligned to `interval` until interrupted (or `cycles` have run)."""
+        done = 0
+        while cycles is None or done < cycles:
+            start = time.perf_counter()
+            n = self.run_cycle()
+            elapsed = time.perf_counter() - start
+            record_cycle('quote_snapshot', elapsed, self.interval)
+            print(f"Published {n}/{len(self.tickers)} quotes in {elapsed:.2f}s")
+            done += 1
+            if cycles is None or done < cycles:
+                time.sleep(max(0.0, self.interval - elapsed))
+
+    def close(self):
+        self.poller.close()
+        self.writer.close()
+
+
+def benchmark_reads(n_symbols=2_000, n_reads=2_000, name='quote_snapshot_benchmark'):
+    """Prints the cost of a consistent zero-copy read of every price vs a copied read()."""
+    from quote_sources import FakeQuoteSource
+
+    tickers = [f"SNAP{i:05d}.NS" for i in range(n_symbols)]
+    daemon = QuoteSnapshotDaemon(tickers, FakeQuoteSource(tickers, latency=0, batch=500),
+                                 name=name, requests_per_second=1000)
+    try:
+        daemon.run_cycle()
+        reader = SnapshotReader(name)
+        ids = reader.ids(tickers)
+        start = time.perf_counter()
+        for _ in range(n_reads):
+            while True:
+                seq = reader.begin()
+                drawdown = 1 - reader.last[:n_symbols] / reader.high_52_week[:n_symbols]
+                if not reader.retry(seq):
+                    break
+        zero_copy = (time.perf_counter() - start) / n_reads
+        start = time.perf_counter()
+        for _ in range(n_reads // 10):
+            reader.read(tickers)
+        copied = (time.perf_counter() - start) / (n_reads // 10)
+        reader.close()
+    finally:
+        daemon.close()
+    print(f"--- Snapshot reads ({n_symbols:,} symbols) ---")
+    print(f"Zero-copy seqlock read of all prices: {zero_copy * 1e6:>9.1f} us (max drawdown {drawdown.max():.1%})")
+    print(f"read() of all tickers by name:        {copied * 1e6:>9.1f} us")
+
+
+def main(argv=None):
+    from universes import UNIVERSES, union_of
+
+    parser = argparse.ArgumentParser(description="Publish a shared-memory quote snapshot for the other scripts.")
+    parser.add_argument('--universe', action='append', choices=sorted(UNIVERSES), default=[],
+                        help="ticker universe to poll (repeatable)")
+    parser.add_argument('--tickers', nargs='*', default=[], help="extra tickers, e.g. for the calculator")
+    parser.add_argument('--interval', type=float, default=60)
+    parser.add_argument('--slow-interval', type=float, default=3600)
+    parser.add_argument('--name', default=DEFAULT_SNAPSHOT_NAME)
+    args = parser.parse_args(argv)
+
+    tickers = union_of(args.universe or sorted(UNIVERSES), args.tickers)
+    daemon = QuoteSnapshotDaemon(tickers, name=args.name, interval=args.interval, slow_interval=args.slow_interval)
+    print(f"Publishing {len(tickers)} tickers to shared memory '{args.name}' every {args.interval:.0f}s")
+    try:
+        daemon.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
+
+
+if __name__ == "__main__":
+    main()
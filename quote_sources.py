@@ -0,0 +1,257 @@
+# Pluggable quote-source layer for the price informer.
+# A QuoteSource knows how to fetch a batch of tickers; the ConcurrentQuotePoller spreads
+# those batches over a bounded worker pool and paces them with a token-bucket rate limiter,
+# so a polling cycle no longer costs one full round trip plus a 1 second sleep per ticker.
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from metrics import FETCH_FAILURES, RATE_LIMIT_WAIT_SECONDS, RATE_LIMIT_WAITS, STAGE_SECONDS
+
+# Fields the alert logic needs. Startup needs both, the monitoring loop only the price.
+CURRENT_PRICE = 'current_price'
+FIFTY_TWO_WEEK_HIGH = 'fifty_two_week_high'
+ALL_FIELDS = (CURRENT_PRICE, FIFTY_TWO_WEEK_HIGH)
+# Extra fields the snapshot daemon publishes for the other scripts
+OPEN_PRICE = 'open_price'
+DIVIDEND_YIELD = 'dividend_yield'
+# Fields one intraday download can serve for a whole batch of tickers
+BATCHABLE_FIELDS = frozenset((CURRENT_PRICE, OPEN_PRICE))
+
+
+# --- Rate limiting ---
+class TokenBucket:
+    """
+    Thread-safe token bucket: allows `rate` requests per second on average with
+    bursts of up to `capacity` requests.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Blocks until `tokens` are available. Returns the number of seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+# --- Quote sources ---
+class QuoteSource:
+    """
+    Base class for quote sources. Subclasses implement fetch_batch() and may override
+    batch_size() when one network round trip can serve several tickers.
+    """
+
+    def batch_size(self, fields):
+        return 1
+
+    def fetch_batch(self, tickers, fields):
+        """Returns {ticker: {field: value}} for the tickers that could be fetched."""
+        raise NotImplementedError
+
+
+class YFinanceQuoteSource(QuoteSource):
+    """
+    Reads quotes from yfinance without the heavy `.info` call. Price-only requests are
+    served by one `yf.download` per batch; the 52-week high comes from `fast_info`.
+    Only the dividend yield needs `.info`, so it is fetched only when asked for.
+    """
+
+    def __init__(self, price_batch_size=50):
+        import yfinance as yf
+        self.yf = yf
+        self.price_batch_size = price_batch_size
+
+    def batch_size(self, fields):
+        return self.price_batch_size if BATCHABLE_FIELDS.issuperset(fields) else 1
+
+    def fetch_batch(self, tickers, fields):
+        if BATCHABLE_FIELDS.issuperset(fields):
+            return self._fetch_last_prices(tickers, fields)
+
+        quotes = {}
+        for ticker in tickers:
+            try:
+                stock = self.yf.Ticker(ticker)
+                fast_info = stock.fast_info
+                quote = {}
+                if CURRENT_PRICE in fields:
+                    quote[CURRENT_PRICE] = fast_info['last_price']
+                if OPEN_PRICE in fields:
+                    quote[OPEN_PRICE] = fast_info['open']
+                if FIFTY_TWO_WEEK_HIGH in fields:
+                    quote[FIFTY_TWO_WEEK_HIGH] = fast_info['year_high']
+                if DIVIDEND_YIELD in fields:
+                    quote[DIVIDEND_YIELD] = stock.info.get('dividendYield') or 0
+                if any(value is None for value in quote.values()):
+                    print(f"Warning: Could not retrieve {', '.join(fields)} for {ticker}. Skipping.")
+                    continue
+                quotes[ticker] = quote
+            except Exception as e:
+                print(f"Error fetching data for {ticker}: {e}")
+        return quotes
+
+    def _fetch_last_prices(self, tickers, fields=(CURRENT_PRICE,)):
+        data = self.yf.download(tickers=list(tickers), period='1d', interval='1m',
+                                group_by='ticker', progress=False, threads=False)
+        quotes = {}
+        for ticker in tickers:
+            try:
+                closes = data[ticker]['Close'].dropna()
+                if len(closes):
+                    quote = {CURRENT_PRICE: float(closes.iloc[-1])}
+                    if OPEN_PRICE in fields:
+                        opens = data[ticker]['Open'].dropna()
+                        quote[OPEN_PRICE] = float(opens.iloc[0]) if len(opens) else float('nan')
+                    quotes[ticker] = {field: quote[field] for field in fields}
+                else:
+                    print(f"Warning: Could not retrieve current price for {ticker}. Skipping.")
+            except KeyError:
+                print(f"Warning: Could not retrieve current price for {ticker}. Skipping.")
+        return quotes
+
+
+class FakeQuoteSource(QuoteSource):
+    """
+    Offline quote source for measuring cycle latency. Prices follow a random walk, each
+    batch sleeps `latency` seconds to stand in for the network, and `failure_rate` of
+    tickers are dropped from every response.
+    """
+
+    def __init__(self, tickers, latency=0.05, batch=50, failure_rate=0.0, seed=0):
+        self.rng = random.Random(seed)
+        self.latency = latency
+        self.batch = batch
+        self.failure_rate = failure_rate
+        self.lock = threading.Lock()
+        self.prices = {}
+        self.opens = {}
+        self.highs = {}
+        self.dividend_yields = {}
+        for ticker in tickers:
+            high = self.rng.uniform(100, 5000)
+            self.highs[ticker] = high
+            self.prices[ticker] = self.opens[ticker] = high * self.rng.uniform(0.7, 1.0)
+            self.dividend_yields[ticker] = round(self.rng.uniform(0, 0.04), 4)
+
+    def batch_size(self, fields):
+        return self.batch
+
+    def fetch_batch(self, tickers, fields):
+        time.sleep(self.latency)
+        quotes = {}
+        with self.lock:
+            for ticker in tickers:
+                if ticker not in self.prices or self.rng.random() < self.failure_rate:
+                    continue
+                self.prices[ticker] *= 1 + self.rng.gauss(0, 0.005)
+                quote = {}
+                if CURRENT_PRICE in fields:
+                    quote[CURRENT_PRICE] = self.prices[ticker]
+                if OPEN_PRICE in fields:
+                    quote[OPEN_PRICE] = self.opens[ticker]
+                if FIFTY_TWO_WEEK_HIGH in fields:
+                    quote[FIFTY_TWO_WEEK_HIGH] = self.highs[ticker]
+                if DIVIDEND_YIELD in fields:
+                    quote[DIVIDEND_YIELD] = self.dividend_yields[ticker]
+                quotes[ticker] = quote
+        return quotes
+
+
+# --- Concurrent poller ---
+class ConcurrentQuotePoller:
+    """
+    Fetches quotes for many tickers through a QuoteSource using a bounded thread pool.
+    Every batch takes one token from the rate limiter before it goes out.
+    """
+
+    def __init__(self, source, max_workers=8, requests_per_second=5, burst=None):
+        self.source = source
+        self.max_workers = max_workers
+        self.limiter = TokenBucket(requests_per_second, burst)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.rate_limit_wait_seconds = 0.0
+        self.lock = threading.Lock()
+        # Metric children bound once, so recording costs no label lookups per batch
+        self.source_name = type(source).__name__
+        self.batch_timer = STAGE_SECONDS.labels(loop='quote_poller', stage='fetch_batch')
+        self.rate_limit_waits = RATE_LIMIT_WAITS.labels(source=self.source_name)
+        self.rate_limit_wait_total = RATE_LIMIT_WAIT_SECONDS.labels(source=self.source_name)
+
+    def _fetch(self, batch, fields):
+        waited = self.limiter.acquire()
+        if waited:
+            with self.lock:
+                self.rate_limit_wait_seconds += waited
+            self.rate_limit_waits.inc()
+            self.rate_limit_wait_total.inc(waited)
+        with self.batch_timer.time():
+            return self.source.fetch_batch(batch, fields)
+
+    def fetch(self, tickers, fields=ALL_FIELDS):
+        """Returns {ticker: {field: value}}; tickers that failed are left out."""
+        tickers = list(tickers)
+        size = max(1, self.source.batch_size(fields))
+        batches = [tickers[i:i + size] for i in range(0, len(tickers), size)]
+        futures = [self.executor.submit(self._fetch, batch, fields) for batch in batches]
+
+        quotes = {}
+        for future in as_completed(futures):
+            try:
+                quotes.update(future.result())
+            except Exception as e:
+                print(f"Error fetching quote batch: {e}")
+
+        for ticker in tickers:
+            if ticker not in quotes:
+                FETCH_FAILURES.inc(source=self.source_name, ticker=ticker)
+        return quotes
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+def measure_cycle_latency(n_tickers=500, cycles=5, latency=0.05, batch=50,
+                          max_workers=8, requests_per_second=20):
+    """Times full polling cycles against FakeQuoteSource, with no network involved."""
+    tickers = [f"FAKE{i:04d}.NS" for i in range(n_tickers)]
+    source = FakeQuoteSource(tickers, latency=latency, batch=batch)
+    poller = ConcurrentQuotePoller(source, max_workers=max_workers, requests_per_second=requests_per_second)
+
+    timings = []
+    try:
+        poller.fetch(tickers, ALL_FIELDS)  # startup cycle
+        for _ in range(cycles):
+            start = time.perf_counter()
+            quotes = poller.fetch(tickers, (CURRENT_PRICE,))
+            timings.append(time.perf_counter() - start)
+    finally:
+        poller.close()
+
+    print(f"--- Quote poller cycle latency ({n_tickers} tickers, {latency * 1000:.0f} ms per request) ---")
+    print(f"Fetched {len(quotes)} quotes per cycle")
+    print(f"Best cycle: {min(timings):.3f}s | Worst cycle: {max(timings):.3f}s")
+    print(f"Sequential loop estimate: {n_tickers * (latency + 1):.0f}s (one request + 1s sleep per ticker)")
+    return timings
+
+
+if __name__ == "__main__":
+    measure_cycle_latency()
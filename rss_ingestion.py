@@ -0,0 +1,305 @@
+# Concurrent RSS ingestion with conditional GETs and a cross-poll dedup index.
+# All feeds are polled in parallel, each request carries the ETag / Last-Modified seen
+# last time so unchanged feeds come back as a bare 304, and a persistent index of
+# GUID/link hashes means only entries never emitted before are passed downstream.
+# Summaries are cleaned with BeautifulSoup lazily, only when an emitted item is read.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from functools import cached_property
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+import feedparser
+
+# Define RSS feeds with their source names
+rss_feeds = {
+    'BBC': 'https://feeds.bbci.co.uk/news/rss.xml',
+    'Bloomberg': 'https://feeds.bloomberg.com/markets/news.rss',
+    'CNBC': 'https://www.cnbc.com/id/100003114/device/rss/rss.html',
+    'Reuters': 'https://www.reuters.com/rssFeed/topNews',
+    'LiveMint': 'https://www.livemint.com/rss/news',
+    'NPR': 'https://feeds.npr.org/1001/rss.xml',
+    'Moneycontrol': 'https://www.moneycontrol.com/rss/news.xml',
+    'WSJ': 'https://www.wsj.com/xml/rss/3_7014.xml',
+    'The Guardian': 'https://www.theguardian.com/world/rss',
+    'Al Jazeera': 'https://www.aljazeera.com/xml/rss/all.xml'
+}
+
+DEFAULT_STATE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'rss_ingestion')
+
+
+# --- Items ---
+class FeedItem:
+    """One new feed entry. The HTML summary is only cleaned when `summary` is first read."""
+
+    def __init__(self, source, entry):
+        self.source = source
+        self.title = entry.get('title', 'No title')
+        self.link = entry.get('link', 'No link')
+        self.summary_raw = entry.get('summary', '')
+        self.published_parsed = entry.get('published_parsed')
+
+    @cached_property
+    def summary(self):
+        from bs4 import BeautifulSoup
+
+        return BeautifulSoup(self.summary_raw, 'html.parser').get_text()
+
+    @property
+    def published(self):
+        if self.published_parsed:
+            return datetime.fromtimestamp(time.mktime(self.published_parsed)).strftime('%Y-%m-%d %H:%M:%S')
+        return "Unknown"
+
+
+def entry_key(entry):
+    """Stable identity of an entry: its GUID, else its link, else its title."""
+    identity = entry.get('id') or entry.get('link') or entry.get('title', '')
+    return hashlib.blake2b(identity.encode('utf-8'), digest_size=16).hexdigest()
+
+
+# --- Persistent state ---
+class SeenIndex:
+    """SQLite set of entry keys already emitted, pruned after `retention_days`."""
+
+    def __init__(self, path, retention_days=14):
+        self.retention_seconds = retention_days * 86400
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY, first_seen REAL NOT NULL)")
+
+    def add_new(self, keys, limit=None):
+        """
+        Records the keys not seen before and returns them as a set. With `limit`, only the
+        first `limit` new keys (in the given order) are recorded and returned, so the rest
+        stay new for a later poll.
+        """
+        keys = list(dict.fromkeys(keys))
+        with self.lock:
+            placeholders = ','.join('?' * len(keys))
+            seen = {row[0] for row in self.conn.execute(f"SELECT key FROM seen WHERE key IN ({placeholders})", keys)}
+            new = [key for key in keys if key not in seen][:limit]
+            self.conn.executemany("INSERT INTO seen (key, first_seen) VALUES (?, ?)",
+                                  [(key, time.time()) for key in new])
+            self.conn.commit()
+        return set(new)
+
+    def prune(self):
+        """Forgets keys first seen more than `retention_days` ago."""
+        with self.lock:
+            self.conn.execute("DELETE FROM seen WHERE first_seen < ?", (time.time() - self.retention_seconds,))
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+# --- Ingestor ---
+class RSSIngestor:
+    """
+    Polls a set of feeds concurrently and returns only entries not emitted before.
+
+    Parameters:
+    feeds (dict): {source name: feed URL}
+    state_dir (str): Where ETag/Last-Modified validators and the seen index are kept
+    max_workers (int): Feeds fetched in parallel
+    max_items_per_feed (int): Cap on new entries emitted per feed per poll
+    """
+
+    def __init__(self, feeds=rss_feeds, state_dir=DEFAULT_STATE_DIR, max_workers=10, max_items_per_feed=None):
+        os.makedirs(state_dir, exist_ok=True)
+        self.feeds = dict(feeds)
+        self.max_workers = max_workers
+        self.max_items_per_feed = max_items_per_feed
+        self.validators_path = os.path.join(state_dir, 'validators.json')
+        self.validators = self._load_validators()
+        self.seen = SeenIndex(os.path.join(state_dir, 'seen.sqlite'))
+        self.stats = {'fetched': 0, 'not_modified': 0, 'failed': 0, 'new_items': 0}
+
+    def _load_validators(self):
+        try:
+            with open(self.validators_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_validators(self):
+        tmp_path = self.validators_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.validators, f)
+        os.replace(tmp_path, self.validators_path)
+
+    def _fetch(self, source, url):
+        validators = self.validators.get(url, {})
+        feed = feedparser.parse(url, etag=validators.get('etag'), modified=validators.get('modified'))
+        return source, url, feed
+
+    def poll(self):
+        """Fetches every feed once and returns the new FeedItems, grouped by source in feed order."""
+        self.seen.prune()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(lambda item: self._fetch(*item), self.feeds.items()))
+
+        items = []
+        for source, url, feed in results:
+            status = feed.get('status')
+            if status == 304:
+                self.stats['not_modified'] += 1
+                continue
+            if feed.get('bozo') and not feed.entries:
+                self.stats['failed'] += 1
+                print(f"Error fetching {source}: {feed.get('bozo_exception')}")
+                continue
+
+            self.stats['fetched'] += 1
+            keys = [entry_key(entry) for entry in feed.entries]
+            # Only the entries emitted now are marked seen; the ones over the cap stay new
+            new = self.seen.add_new(keys, self.max_items_per_feed) if keys else set()
+            if self.max_items_per_feed is None or len(new) < self.max_items_per_feed:
+                self.validators[url] = {'etag': feed.get('etag'), 'modified': feed.get('modified')}
+            else:
+                # Entries may have been held back: fetch the full feed again next poll
+                # instead of getting a 304 that would hide them until the feed changes
+                self.validators.pop(url, None)
+            items.extend(FeedItem(source, entry) for entry, key in zip(feed.entries, keys) if key in new)
+
+        self.stats['new_items'] += len(items)
+        self._save_validators()
+        return items
+
+    def close(self):
+        self.seen.close()
+
+
+def print_items(items):
+    """Prints new items in the same layout as the original fetch_news() loop."""
+    print(f"\n🕒 Fetching news at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n" + "-"*70)
+    current_source = None
+    for item in items:
+        if item.source != current_source:
+            current_source = item.source
+            print(f"\n📡 Source: {item.source}")
+        print(f"📰 {item.title}")
+        print(f"📅 Published: {item.published}")
+        print(f"🔗 Link: {item.link}")
+        print(f"📝 Summary: {item.summary}\n")
+
+
+# --- Synthetic feeds and local feed server ---
+def synthetic_rss(source, n_items=20, start=0):
+    """RSS 2.0 XML with items numbered start .. start + n_items - 1, newest first."""
+    items = []
+    for i in reversed(range(start, start + n_items)):
+        pub_date = formatdate(1_700_000_000 + i * 60, usegmt=True)
+        items.append(
+            f"<item><title>{escape(source)} headline {i}</title>"
+            f"<link>https://example.com/{escape(source)}/{i}</link>"
+            f"<guid>{escape(source)}-{i}</guid>"
+            f"<description>{escape(f'<p>Story <b>{i}</b> from {source}</p>')}</description>"
+            f"<pubDate>{pub_date}</pubDate></item>")
+    return (f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>{escape(source)}</title><link>https://example.com/</link><description>Synthetic</description>"
+            f"{''.join(items)}</channel></rss>").encode('utf-8')
+
+
+class LocalFeedServer:
+    """
+    Local feed server that honours If-None-Match / If-Modified-Since. Feeds live at
+    /<name>.xml; set_feed() changes a feed's body and bumps its ETag.
+    Counts of 200 and 304 responses are kept in `responses`.
+    """
+
+    def __init__(self):
+        self.feeds = {}
+        self.responses = {200: 0, 304: 0, 404: 0}
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def set_feed(self, name, body):
+        with self.lock:
+            version = self.feeds.get(name, (None, None, 0))[2] + 1
+            last_modified = formatdate(time.time(), usegmt=True)
+            self.feeds[name] = (body, last_modified, version)
+        return f"{self.url}/{name}.xml"
+
+    @staticmethod
+    def _not_modified(headers, etag, last_modified):
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+        if headers.get('If-None-Match') is not None:
+            return headers['If-None-Match'] == etag
+        since = headers.get('If-Modified-Since')
+        if since is None:
+            return False
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(since)
+        except (TypeError, ValueError):
+            return False
+
+    def _handler(self):
+        feed_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                name = self.path.lstrip('/').removesuffix('.xml')
+                with feed_server.lock:
+                    feed = feed_server.feeds.get(name)
+                if feed is None:
+                    status = 404
+                    self.send_response(404)
+                    self.end_headers()
+                else:
+                    body, last_modified, version = feed
+                    etag = f'"{name}-{version}"'
+                    if feed_server._not_modified(self.headers, etag, last_modified):
+                        status = 304
+                        self.send_response(304)
+                        self.end_headers()
+                    else:
+                        status = 200
+                        self.send_response(200)
+                        self.send_header('Content-Type', 'application/rss+xml')
+                        self.send_header('ETag', etag)
+                        self.send_header('Last-Modified', last_modified)
+                        self.send_header('Content-Length', str(len(body)))
+                        self.end_headers()
+                        self.wfile.write(body)
+                with feed_server.lock:
+                    feed_server.responses[status] += 1
+
+        return Handler
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# Example usage: three polls against the local server, with one feed updated in between
+if __name__ == "__main__":
+    import tempfile
+
+    with LocalFeedServer() as server, tempfile.TemporaryDirectory() as state_dir:
+        feeds = {source: server.set_feed(source, synthetic_rss(source)) for source in ['BBC', 'CNBC', 'Reuters']}
+        ingestor = RSSIngestor(feeds, state_dir=state_dir)
+        print(f"Poll 1: {len(ingestor.poll())} new items")
+        print(f"Poll 2: {len(ingestor.poll())} new items")
+        server.set_feed('CNBC', synthetic_rss('CNBC', start=5))
+        print(f"Poll 3: {len(ingestor.poll())} new items")
+        print(f"Server responses: {server.responses} | Ingestor stats: {ingestor.stats}")
+        ingestor.close()
@@ -0,0 +1,239 @@
+# Portfolio scenario engine: P&L and Greek surfaces over spot x vol x time shocks.
+# Positions (one row per option held) are broadcast against the whole shock grid in one
+# NumPy pass through black_scholes_batch(), which reproduces black_scholes() from
+# Black-scholes_option_price_calculator.py bit for bit. Positions are evaluated in chunks
+# so memory stays bounded for large grids, each chunk is reduced straight into
+# per-underlying surfaces, and chunks can optionally be fanned out to a process pool.
+
+import datetime
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from black_scholes_vectorized import black_scholes_batch
+
+# Per-position quantities the report aggregates, besides P&L
+GREEKS = ['delta', 'gamma', 'vega', 'theta']
+MIN_SIGMA = 1e-4
+DEFAULT_MAX_CELLS = 500_000   # position x scenario cells evaluated per chunk
+
+
+# --- Shock grid ---
+class ScenarioGrid:
+    """
+    Spot moves (fractions, e.g. -0.1 for -10%), absolute vol shifts (e.g. 0.05 for +5 vol
+    points) and calendar days forward. Scenario (i, j, k) applies spot_shocks[i],
+    vol_shifts[j] and days_forward[k] together.
+    """
+
+    def __init__(self, spot_shocks, vol_shifts=(0.0,), days_forward=(0,)):
+        self.spot_shocks = np.asarray(spot_shocks, dtype=float)
+        self.vol_shifts = np.asarray(vol_shifts, dtype=float)
+        self.days_forward = np.asarray(days_forward, dtype=float)
+
+    @classmethod
+    def linear(cls, spot_range=0.2, spot_points=21, vol_range=0.1, vol_points=11, days=(0, 1, 2, 5, 10)):
+        """Evenly spaced spot and vol shocks centred on zero."""
+        return cls(np.linspace(-spot_range, spot_range, spot_points),
+                   np.linspace(-vol_range, vol_range, vol_points), days)
+
+    @property
+    def shape(self):
+        return (self.spot_shocks.size, self.vol_shifts.size, self.days_forward.size)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+
+# --- Positions ---
+def chain_from_calls_puts(calls, puts, expiry):
+    """
+    Combines the calls and puts frames get_option_chain() returns into one chain frame
+    with the 'expiry' and 'option_type' columns build_positions() expects.
+    """
+    frames = []
+    for option_type, frame in (('call', calls), ('put', puts)):
+        frame = frame.copy()
+        frame['expiry'] = expiry
+        frame['option_type'] = option_type
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_positions(chain, underlying, spot, quantity, r, q=0.0, lot_size=1, valuation_date=None):
+    """
+    Turns yfinance option-chain rows ('expiry', 'strike', 'option_type',
+    'impliedVolatility') into position rows for scenario_report().
+
+    Parameters:
+    chain (DataFrame): Rows from get_option_chain() / fetch_option_chains()
+    underlying (str): Symbol the rows belong to
+    spot (float): Current price of the underlying
+    quantity (float or array-like): Contracts held per row (negative for short)
+    lot_size (float): Units of the underlying per contract
+
+    Returns:
+    DataFrame: One row per position with underlying, S, K, T, r, sigma, is_call, q, quantity.
+    """
+    valuation_date = valuation_date or datetime.date.today()
+    days = (pd.to_datetime(chain['expiry']) - pd.Timestamp(valuation_date)).dt.days.to_numpy(dtype=float)
+    return pd.DataFrame({
+        'underlying': underlying,
+        'S': float(spot),
+        'K': chain['strike'].to_numpy(dtype=float),
+        'T': np.maximum(days, 0) / 365.0,
+        'r': r,
+        'sigma': chain['impliedVolatility'].to_numpy(dtype=float),
+        'is_call': (chain['option_type'] == 'call').to_numpy(),
+        'q': q,
+        'quantity': np.asarray(quantity, dtype=float) * lot_size,
+    })
+
+
+def synthetic_book(n_positions=500, underlyings=('NIFTY', 'BANKNIFTY', 'RELIANCE'), seed=0):
+    """Random long/short option positions on a few underlyings, for benchmarks and examples."""
+    rng = np.random.default_rng(seed)
+    spots = {'NIFTY': 22000.0, 'BANKNIFTY': 48000.0, 'RELIANCE': 2900.0}
+    names = rng.choice(list(underlyings), n_positions)
+    S = np.array([spots.get(name, 1000.0) for name in names])
+    return pd.DataFrame({
+        'underlying': names,
+        'S': S,
+        'K': np.round(S * rng.uniform(0.85, 1.15, n_positions) / 50) * 50,
+        'T': rng.choice([3, 10, 24, 52, 87], n_positions) / 365.0,
+        'r': 0.065,
+        'sigma': rng.uniform(0.12, 0.35, n_positions),
+        'is_call': rng.random(n_positions) < 0.5,
+        'q': 0.0,
+        'quantity': rng.choice([-3, -2, -1, 1, 2, 3], n_positions) * 25.0,
+    })
+
+
+# --- Evaluation ---
+def _position_arrays(positions):
+    return {name: positions[name].to_numpy(dtype=bool if name == 'is_call' else float)
+            for name in ('S', 'K', 'T', 'r', 'sigma', 'is_call', 'q', 'quantity')}
+
+
+def _evaluate_chunk(arrays, group_ids, n_groups, grid):
+    """
+    Values one chunk of positions on every scenario and sums the quantity-weighted
+    results per underlying.
+
+    Returns:
+    dict: 'value', 'pnl' and each of GREEKS as (n_groups x scenarios) arrays.
+    """
+    n = arrays['S'].size
+    # (positions, spot, vol, days) through broadcasting
+    S = arrays['S'][:, None, None, None] * (1 + grid.spot_shocks[None, :, None, None])
+    sigma = np.maximum(arrays['sigma'][:, None, None, None] + grid.vol_shifts[None, None, :, None], MIN_SIGMA)
+    T = np.maximum(arrays['T'][:, None, None, None] - grid.days_forward[None, None, None, :] / 365.0, 0.0)
+    expand = lambda a: a[:, None, None, None]
+    shocked = black_scholes_batch(S, expand(arrays['K']), T, expand(arrays['r']), sigma,
+                                  expand(arrays['is_call']), expand(arrays['q']))
+    base = black_scholes_batch(arrays['S'], arrays['K'], arrays['T'], arrays['r'],
+                               arrays['sigma'], arrays['is_call'], arrays['q'])['price']
+
+    # Quantity-weighted group membership: one matrix product reduces positions to underlyings
+    weights = np.zeros((n_groups, n))
+    weights[group_ids, np.arange(n)] = arrays['quantity']
+    values = shocked['price'].reshape(n, -1)
+    out = {
+        'value': weights @ values,
+        'pnl': weights @ (values - base[:, None]),
+    }
+    for name in GREEKS:
+        out[name] = weights @ shocked[name].reshape(n, -1)
+    return out
+
+
+def _evaluate_chunk_star(args):
+    return _evaluate_chunk(*args)
+
+
+def scenario_report(positions, grid, max_cells=DEFAULT_MAX_CELLS, processes=None):
+    """
+    Values a book of option positions over a shock grid.
+
+    Parameters:
+    positions (DataFrame): Rows from build_positions() / synthetic_book()
+    grid (ScenarioGrid): Spot, vol and time shocks
+    max_cells (int): Position x scenario cells per chunk; bounds peak memory
+    processes (int): Fan chunks out to this many worker processes (None runs in-process)
+
+    Returns:
+    dict: 'underlyings' (list), the grid axes, and 'value', 'pnl', 'delta', 'gamma',
+          'vega', 'theta' arrays shaped (underlyings x spot x vol x days). P&L is relative
+          to the model value at today's inputs; Greeks are quantity-weighted sums.
+    """
+    underlyings, group_ids = np.unique(positions['underlying'].to_numpy(dtype=str), return_inverse=True)
+    arrays = _position_arrays(positions)
+    n_positions = len(positions)
+    chunk_size = max(1, max_cells // grid.size)
+    chunks = [
+        ({name: a[start:start + chunk_size] for name, a in arrays.items()},
+         group_ids[start:start + chunk_size], len(underlyings), grid)
+        for start in range(0, n_positions, chunk_size)
+    ]
+
+    totals = {name: np.zeros((len(underlyings), grid.size)) for name in ['value', 'pnl'] + GREEKS}
+    if processes and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            partials = executor.map(_evaluate_chunk_star, chunks)
+            for partial in partials:
+                for name, surface in partial.items():
+                    totals[name] += surface
+    else:
+        for chunk in chunks:
+            for name, surface in _evaluate_chunk(*chunk).items():
+                totals[name] += surface
+
+    report = {
+        'underlyings': underlyings.tolist(),
+        'spot_shocks': grid.spot_shocks,
+        'vol_shifts': grid.vol_shifts,
+        'days_forward': grid.days_forward,
+    }
+    for name, surface in totals.items():
+        report[name] = surface.reshape((len(underlyings),) + grid.shape)
+    return report
+
+
+def surface_frame(report, underlying, metric='pnl', day_index=0):
+    """One spot x vol slice of a report as a DataFrame, for printing."""
+    i = report['underlyings'].index(underlying)
+    return pd.DataFrame(
+        report[metric][i, :, :, day_index],
+        index=pd.Index(np.round(report['spot_shocks'] * 100, 2), name='spot %'),
+        columns=pd.Index(np.round(report['vol_shifts'] * 100, 2), name='vol pts'),
+    )
+
+
+def benchmark_scenarios(n_positions=(100, 500, 2_000), grid=None, processes=None):
+    """Prints position x scenario cells evaluated per second."""
+    grid = grid or ScenarioGrid.linear()
+    print(f"--- Scenario grid ({grid.shape[0]} spot x {grid.shape[1]} vol x {grid.shape[2]} days) ---")
+    for n in n_positions:
+        book = synthetic_book(n)
+        start = time.perf_counter()
+        scenario_report(book, grid, processes=processes)
+        elapsed = time.perf_counter() - start
+        cells = n * grid.size
+        print(f"{n:>6,} positions: {elapsed * 1000:>9.1f} ms | {cells / elapsed:>14,.0f} cells/sec")
+
+
+# Example usage: P&L surface for a synthetic book, then throughput
+if __name__ == "__main__":
+    book = synthetic_book(300)
+    grid = ScenarioGrid.linear(spot_points=9, vol_points=5, days=(0, 7))
+    report = scenario_report(book, grid)
+    pd.set_option('display.width', 200)
+    for underlying in report['underlyings']:
+        print(f"\n{underlying}: P&L today (rows: spot move, columns: vol shift)")
+        print(surface_frame(report, underlying).round(0).to_string())
+    print(f"\nNet delta at no shock: "
+          f"{dict(zip(report['underlyings'], report['delta'][:, 4, 2, 0].round(1)))}\n")
+    benchmark_scenarios()
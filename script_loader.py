@@ -0,0 +1,36 @@
+# Imports the repository's scripts whose file names are not valid module names
+# (e.g. "20%_down_price_informer.py", "Black-scholes_option_price_calculator.py").
+
+import importlib.util
+import os
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Importable aliases for the scripts
+SCRIPTS = {
+    'black_scholes_calculator': 'Black-scholes_option_price_calculator.py',
+    'price_informer': '20%_down_price_informer.py',
+    'ohlc_macd': 'OHLC_&_MACD.py',
+}
+
+
+def load_script(name):
+    """
+    Imports a script by alias (see SCRIPTS) or file name and caches it in sys.modules
+    under the alias, so every caller shares the same module object and its state.
+    """
+    filename = SCRIPTS.get(name, name)
+    alias = name if name in SCRIPTS else os.path.splitext(filename)[0]
+    if alias in sys.modules:
+        return sys.modules[alias]
+
+    spec = importlib.util.spec_from_file_location(alias, os.path.join(SCRIPT_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[alias] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[alias]
+        raise
+    return module
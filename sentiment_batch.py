@@ -0,0 +1,214 @@
+# Cached, parallel batch sentiment scoring for news headlines.
+# Headlines are deduplicated by a hash of their whitespace-normalized text, scores are kept in a
+# persistent SQLite cache with least-recently-used eviction, and only the cache misses
+# are sent through TextBlob, spread over a process pool when the batch is large enough.
+# The per-ticker counts have the same shape analyze_sentiment() returns, so they can be
+# passed straight to news_indicator().
+
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'sentiment_scores.sqlite')
+_WHITESPACE = re.compile(r'\s+')
+
+
+# --- Normalization and classification ---
+def normalize_headline(headline):
+    """
+    Collapses whitespace, which TextBlob's tokenizer ignores. No Unicode normalization:
+    NFKC turns full-width letters into ASCII words TextBlob knows, which changes the score.
+    """
+    return _WHITESPACE.sub(' ', headline or '').strip()
+
+
+def headline_key(normalized):
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def classify(polarity):
+    """Same buckets as analyze_sentiment()."""
+    if polarity > 0:
+        return 'Positive'
+    elif polarity == 0:
+        return 'Neutral'
+    return 'Negative'
+
+
+def score_texts(texts):
+    """Scores a list of headlines with TextBlob. Runs inside pool workers."""
+    from textblob import TextBlob
+
+    return [TextBlob(text).sentiment.polarity for text in texts]
+
+
+# --- Persistent score cache ---
+class SentimentCache:
+    """
+    SQLite-backed {headline hash: polarity} cache holding at most `max_entries` rows.
+    When it grows past that, the least recently used rows are deleted.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=200_000):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.max_entries = max_entries
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, polarity REAL NOT NULL, last_used REAL NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)")
+
+    def get_many(self, keys):
+        """Returns {key: polarity} for the keys that are cached and marks them as used."""
+        found = {}
+        keys = list(keys)
+        for i in range(0, len(keys), 900):  # stay under SQLite's bound-parameter limit
+            chunk = keys[i:i + 900]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(f"SELECT key, polarity FROM scores WHERE key IN ({placeholders})", chunk)
+            found.update(rows.fetchall())
+        if found:
+            now = time.time()
+            self.conn.executemany("UPDATE scores SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+            self.conn.commit()
+        return found
+
+    def put_many(self, scores):
+        now = time.time()
+        self.conn.executemany("INSERT OR REPLACE INTO scores (key, polarity, last_used) VALUES (?, ?, ?)",
+                              [(key, polarity, now) for key, polarity in scores.items()])
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self):
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,))
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+# --- Batch scorer ---
+class BatchSentimentScorer:
+    """
+    Scores streams of headlines with deduplication, caching and a process pool.
+
+    Parameters:
+    cache (SentimentCache): Persistent cache, or None to only dedupe within each batch
+    processes (int): Worker processes for cache misses (default: CPU count)
+    parallel_threshold (int): Fewer misses than this are scored in-process
+    chunk_size (int): Headlines per task sent to a worker
+    """
+
+    def __init__(self, cache=None, processes=None, parallel_threshold=1000, chunk_size=250):
+        self.cache = cache
+        self.processes = processes or os.cpu_count() or 1
+        self.parallel_threshold = parallel_threshold
+        self.chunk_size = chunk_size
+        self.executor = None
+
+    def _score_misses(self, texts):
+        if len(texts) < self.parallel_threshold or self.processes == 1:
+            return score_texts(texts)
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.processes)
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        return [polarity for chunk in self.executor.map(score_texts, chunks) for polarity in chunk]
+
+    def score(self, headlines):
+        """Returns one polarity per headline, in input order."""
+        headlines = [headline or '' for headline in headlines]
+        keys = [headline_key(normalize_headline(headline)) for headline in headlines]
+
+        # Each key is scored from the first original headline that produced it
+        unique = {}
+        for key, headline in zip(keys, headlines):
+            unique.setdefault(key, headline)
+        scores = self.cache.get_many(unique) if self.cache is not None else {}
+        misses = [key for key in unique if key not in scores]
+        if misses:
+            fresh = dict(zip(misses, self._score_misses([unique[key] for key in misses])))
+            if self.cache is not None:
+                self.cache.put_many(fresh)
+            scores.update(fresh)
+        return [scores[key] for key in keys]
+
+    def score_by_ticker(self, articles):
+        """
+        Aggregates articles into per-ticker sentiment counts.
+
+        Parameters:
+        articles (iterable): dicts with 'ticker' and 'headline' keys
+
+        Returns:
+        dict: {ticker: {'Positive': n, 'Neutral': n, 'Negative': n}}, the same counts
+              analyze_sentiment() produces for that ticker's headlines.
+        """
+        articles = list(articles)
+        polarities = self.score([article.get('headline', '') for article in articles])
+        sentiment = {}
+        for article, polarity in zip(articles, polarities):
+            counts = sentiment.setdefault(article['ticker'], {'Positive': 0, 'Neutral': 0, 'Negative': 0})
+            counts[classify(polarity)] += 1
+        return sentiment
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+# --- Benchmark ---
+def synthetic_headlines(n=20_000, unique=2_000, tickers=('RELIANCE', 'TCS', 'INFY', 'HDFCBANK', 'ITC'), seed=0):
+    """Wire-style headline stream in which the same stories repeat across tickers and polls."""
+    import random
+
+    rng = random.Random(seed)
+    subjects = ['Shares', 'Profit', 'Revenue', 'Outlook', 'Margins', 'Guidance', 'Orders', 'Exports']
+    verbs = ['surge', 'slump', 'rise', 'fall', 'hold steady', 'beat estimates', 'miss estimates', 'stay flat']
+    tails = ['after strong quarter', 'amid weak demand', 'on upbeat outlook', 'as costs rise',
+             'in volatile trade', 'on record orders', 'despite concerns', 'ahead of results']
+    stories = [f"{rng.choice(subjects)} {rng.choice(verbs)} {rng.choice(tails)} #{i}" for i in range(unique)]
+    return [{'ticker': rng.choice(tickers), 'headline': rng.choice(stories) + (' ' if rng.random() < 0.2 else '')}
+            for _ in range(n)]
+
+
+def benchmark_sentiment(n=20_000, unique=2_000, cache_path=':memory:'):
+    """Reports headlines per second for analyze_sentiment() and the batch scorer (cold and warm cache)."""
+    from news_sentiment_analysis import analyze_sentiment
+
+    articles = synthetic_headlines(n, unique)
+
+    start = time.perf_counter()
+    baseline = {}
+    for ticker in {article['ticker'] for article in articles}:
+        baseline[ticker] = analyze_sentiment([a for a in articles if a['ticker'] == ticker])
+    baseline_time = time.perf_counter() - start
+
+    scorer = BatchSentimentScorer(cache=SentimentCache(cache_path))
+    start = time.perf_counter()
+    cold = scorer.score_by_ticker(articles)
+    cold_time = time.perf_counter() - start
+    start = time.perf_counter()
+    warm = scorer.score_by_ticker(articles)
+    warm_time = time.perf_counter() - start
+    scorer.close()
+
+    print(f"--- Sentiment benchmark ({n} headlines, {unique} unique) ---")
+    print(f"analyze_sentiment loop: {n / baseline_time:>12,.0f} headlines/sec")
+    print(f"Batch, cold cache:      {n / cold_time:>12,.0f} headlines/sec")
+    print(f"Batch, warm cache:      {n / warm_time:>12,.0f} headlines/sec")
+    print(f"Counts match analyze_sentiment(): {cold == baseline == warm}")
+
+
+if __name__ == "__main__":
+    benchmark_sentiment()
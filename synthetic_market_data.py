@@ -0,0 +1,117 @@
+# Deterministic synthetic market data for benchmarks and offline runs.
+# Every generator takes a seed and returns the same shapes the live sources do
+# (yfinance quotes and downloads, NSE option-chain JSON, headlines, RSS XML), so the
+# hot paths can be timed without touching the network.
+
+import numpy as np
+import pandas as pd
+
+# Generators that live next to the code they feed, re-exported here
+from nse_option_chain_fetcher import synthetic_option_chain
+from option_chain_store import synthetic_chain_session
+from scenario_grid import synthetic_book
+from sentiment_batch import synthetic_headlines
+
+
+def synthetic_rss(source, n_items=20, start=0):
+    """rss_ingestion.synthetic_rss(), imported on use because feedparser is the optional `news` extra."""
+    from rss_ingestion import synthetic_rss
+
+    return synthetic_rss(source, n_items, start)
+
+
+def synthetic_tickers(n):
+    return [f"SYN{i:05d}.NS" for i in range(n)]
+
+
+def synthetic_quotes(n, seed=0):
+    """
+    Current price and 52-week high for n tickers, as get_stock_data() returns them.
+    About a quarter of the prices sit 20% or more below their high.
+
+    Returns:
+    tuple: (tickers, current_prices, fifty_two_week_highs)
+    """
+    rng = np.random.default_rng(seed)
+    highs = rng.uniform(50, 5000, n)
+    prices = highs * rng.uniform(0.6, 1.0, n)
+    return synthetic_tickers(n), prices, highs
+
+
+def synthetic_price_paths(n_tickers, n_ticks, drift=-0.0002, volatility=0.01, seed=0):
+    """(ticks x tickers) random-walk prices starting at each ticker's 52-week high."""
+    rng = np.random.default_rng(seed)
+    highs = rng.uniform(50, 5000, n_tickers)
+    returns = 1 + drift + rng.normal(0, volatility, (n_ticks, n_tickers))
+    return highs, highs * np.cumprod(returns, axis=0)
+
+
+def synthetic_download_frame(tickers, n_bars=375, start='2024-01-01 09:15', missing_fraction=0.01, seed=0):
+    """
+    yf.download(..., group_by='ticker') shaped frame: (ticker, field) columns with 1-minute
+    bars, a few missing values and one ticker with no data at all.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=n_bars, freq='min', tz='Asia/Kolkata')
+    n = len(tickers)
+    close = rng.uniform(50, 5000, n) * np.cumprod(1 + rng.normal(0, 0.001, (n_bars, n)), axis=0)
+    open_ = close * (1 + rng.normal(0, 0.0005, close.shape))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.0005, close.shape)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.0005, close.shape)))
+    volume = rng.integers(0, 10_000, close.shape).astype(float)
+
+    fields = {'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}
+    for values in fields.values():
+        values[rng.random(values.shape) < missing_fraction] = np.nan
+        if n > 1:
+            values[:, -1] = np.nan
+
+    data = np.stack([fields[f] for f in fields], axis=2).reshape(n_bars, n * len(fields))
+    columns = pd.MultiIndex.from_product([tickers, list(fields)], names=['Ticker', 'Price'])
+    return pd.DataFrame(data, index=index, columns=columns)
+
+
+def synthetic_ohlc_frames(n_symbols, n_bars, interval='1d', start='2015-01-01', volatility=0.02, seed=0):
+    """
+    {symbol: frame} shaped like OHLCHistory() output (lowercase OHLCV columns, index named
+    'Date') from independent random walks, for backtests. Intraday intervals ('1m', '5m',
+    ...) fill the NSE session 09:15-15:30 IST.
+    """
+    rng = np.random.default_rng(seed)
+    if interval.endswith('m'):
+        minutes = int(interval[:-1])
+        per_day = 375 // minutes
+        days = pd.bdate_range(start, periods=-(-n_bars // per_day))
+        session = pd.timedelta_range('09:15:00', periods=per_day, freq=f'{minutes}min')
+        stamps = days.to_numpy()[:, None] + session.to_numpy()[None, :]
+        index = pd.DatetimeIndex(stamps.ravel()[:n_bars]).tz_localize('Asia/Kolkata')
+    else:
+        index = pd.bdate_range(start, periods=n_bars)
+
+    frames = {}
+    for symbol in synthetic_tickers(n_symbols):
+        close = rng.uniform(100, 3000) * np.exp(np.cumsum(rng.normal(0, volatility, n_bars)))
+        open_ = close * np.exp(rng.normal(0, volatility / 4, n_bars))
+        spread = np.abs(rng.normal(0, volatility / 2, n_bars))
+        frames[symbol] = pd.DataFrame({
+            'open': open_,
+            'high': np.maximum(open_, close) * (1 + spread),
+            'low': np.minimum(open_, close) * (1 - spread),
+            'close': close,
+            'volume': rng.integers(1_000, 100_000, n_bars),
+        }, index=pd.DatetimeIndex(index, name='Date'))
+    return frames
+
+
+def synthetic_option_contracts(n, spot=2600.0, seed=0):
+    """Arrays for n option contracts: S, K, T, r, sigma, is_call, q."""
+    rng = np.random.default_rng(seed)
+    return {
+        'S': np.full(n, spot),
+        'K': np.round(spot * rng.uniform(0.7, 1.3, n) / 10) * 10,
+        'T': rng.choice([7, 14, 28, 56, 91, 182, 364], n) / 365.0,
+        'r': np.full(n, 0.065),
+        'sigma': rng.uniform(0.1, 0.6, n),
+        'is_call': rng.random(n) < 0.5,
+        'q': np.full(n, 0.01),
+    }
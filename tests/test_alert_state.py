@@ -0,0 +1,94 @@
+import contextlib
+import io
+
+import numpy as np
+
+from alert_state import INITIAL_DROP, NO_ALERT, RECOVERY_RESET, SUBSEQUENT_DROP, AlertStateStore
+from market_benchmarks import _baseline_check_and_notify
+
+
+def _baseline_kind(monitoring_status, ticker, price, high):
+    out = io.StringIO()
+    before = (monitoring_status.get(ticker) or {}).get('last_notified_price')
+    with contextlib.redirect_stdout(out):
+        _baseline_check_and_notify(monitoring_status, ticker, ticker, price, high)
+    text = out.getvalue()
+    if 'ALERT!' in text:
+        return INITIAL_DROP
+    if 'UPDATE!' in text:
+        return SUBSEQUENT_DROP
+    if before is not None and monitoring_status[ticker]['last_notified_price'] != before:
+        return RECOVERY_RESET
+    return NO_ALERT
+
+
+def _store_kind(store, ticker, price, high):
+    # Mirrors the informer's check_and_notify(): unseen tickers start monitoring on first sight
+    ticker_id = store.add_ticker(ticker)
+    if not store.monitored[ticker_id]:
+        store.initialize([ticker_id], [high], [price])
+    last = store.last_notified_price[ticker_id]
+    alerts = store.evaluate([ticker_id], [price], highs=[high])
+    if alerts['ids'].size:
+        return int(alerts['kind'][0])
+    if not np.isnan(last) and store.last_notified_price[ticker_id] != last:
+        return RECOVERY_RESET
+    return NO_ALERT
+
+
+def test_evaluate_matches_the_original_rule():
+    rng = np.random.default_rng(4)
+    n_tickers, n_ticks = 12, 400
+    tickers = [f'T{i}.NS' for i in range(n_tickers)]
+    highs = rng.uniform(100, 2000, n_tickers)
+    # Random walks starting near the 20% line so every path crosses it both ways
+    paths = highs * rng.uniform(0.78, 0.85, n_tickers) * np.exp(
+        np.cumsum(rng.normal(0, 0.015, (n_ticks, n_tickers)), axis=0))
+    paths[rng.random(paths.shape) < 0.05] = np.nan
+    # The last third of the tickers are first seen part-way through the run
+    first_seen = np.zeros(n_tickers, dtype=int)
+    first_seen[-n_tickers // 3:] = rng.integers(50, 200, n_tickers // 3)
+
+    store = AlertStateStore(tickers[:-n_tickers // 3])
+    monitoring_status = {}
+    for i, ticker in enumerate(tickers[:-n_tickers // 3]):
+        price = paths[0, i] if not np.isnan(paths[0, i]) else highs[i]
+        store.initialize([i], [highs[i]], [price])
+        monitoring_status[ticker] = {'52_week_high': highs[i], 'current_price': price, 'initial_drop_price': None,
+                                     'last_notified_price': None, 'initial_drop_alerted': False}
+
+    seen = set()
+    for t in range(n_ticks):
+        for i, ticker in enumerate(tickers):
+            price = paths[t, i]
+            if t < first_seen[i] or (np.isnan(price) and ticker not in monitoring_status):
+                continue
+            if np.isnan(price):
+                # The original loop skipped tickers without a quote; evaluate() ignores NaN prices
+                store.evaluate(store.ids([ticker]), [price], highs=[highs[i]])
+            else:
+                expected = _baseline_kind(monitoring_status, ticker, float(price), highs[i])
+                assert _store_kind(store, ticker, float(price), highs[i]) == expected, (t, ticker)
+                seen.add(expected)
+            assert store.status(ticker) == monitoring_status[ticker], (t, ticker)
+
+    assert seen == {NO_ALERT, INITIAL_DROP, SUBSEQUENT_DROP, RECOVERY_RESET}
+
+
+def test_late_ticker_can_alert_on_first_sight():
+    store = AlertStateStore(['AAA.NS'])
+    store.initialize([0], [100.0], [95.0])
+    monitoring_status = {}
+    assert _baseline_kind(monitoring_status, 'BBB.NS', 70.0, 100.0) == INITIAL_DROP
+    assert _store_kind(store, 'BBB.NS', 70.0, 100.0) == INITIAL_DROP
+    assert store.status('BBB.NS') == monitoring_status['BBB.NS']
+
+
+def test_nan_price_keeps_state():
+    store = AlertStateStore(['AAA.NS'])
+    store.initialize([0], [100.0], [79.0])
+    store.evaluate([0], [79.0])
+    before = store.status('AAA.NS')
+    alerts = store.evaluate([0], [np.nan])
+    assert alerts['ids'].size == 0
+    assert store.status('AAA.NS') == before
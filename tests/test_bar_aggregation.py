@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from bar_aggregation import StreamingBars, parity_check
+
+
+def test_batch_and_streaming_match_pandas_resample():
+    assert parity_check(n_symbols=8, n_days=2, seed=1) == (0.0, 0.0)
+
+
+def test_bar_missing_its_last_minute_completes_on_the_next_one():
+    bars = StreamingBars(['A', 'B'], timeframes=['5m'])
+    minutes = pd.date_range('2025-07-24 09:15', periods=4, freq='1min', tz='Asia/Kolkata')
+    for j, timestamp in enumerate(minutes):   # 09:15 to 09:18; 09:19 never arrives
+        price = np.array([100.0 + j, np.nan if j == 3 else 200.0 + j])   # B also skips 09:18
+        volume = np.where(np.isnan(price), np.nan, [10.0, 20.0])
+        assert bars.update(timestamp, price, price + 1, price - 1, price + 0.5, volume) == []
+
+    price = np.array([110.0, 210.0])
+    completed = bars.update(pd.Timestamp('2025-07-24 09:20', tz='Asia/Kolkata'),
+                            price, price + 1, price - 1, price + 0.5, np.array([1.0, 1.0]))
+    assert len(completed) == 1
+    timeframe, start, bar = completed[0]
+    assert (timeframe, start) == ('5m', pd.Timestamp('2025-07-24 09:15', tz='Asia/Kolkata'))
+    np.testing.assert_array_equal(bar['open'], [100.0, 200.0])
+    np.testing.assert_array_equal(bar['high'], [104.0, 203.0])
+    np.testing.assert_array_equal(bar['low'], [99.0, 199.0])
+    np.testing.assert_array_equal(bar['close'], [103.5, 202.5])
+    np.testing.assert_array_equal(bar['volume'], [40.0, 60.0])
+    # The 09:20 minute starts the next bar
+    start, forming = bars.current('5m')
+    assert start == pd.Timestamp('2025-07-24 09:20', tz='Asia/Kolkata')
+    np.testing.assert_array_equal(forming['open'], [110.0, 210.0])
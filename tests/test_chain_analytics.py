@@ -0,0 +1,40 @@
+import numpy as np
+
+from chain_analytics import chain_arrays, chain_summary, max_pain, max_pain_broadcast, put_call_ratios
+from nse_option_chain_fetcher import synthetic_option_chain
+
+
+def _chains():
+    return {symbol: synthetic_option_chain(symbol, spot=spot, n_strikes=n, seed=seed)['records']
+            for seed, (symbol, spot, n) in enumerate([('NIFTY', 22000.0, 80), ('BANKNIFTY', 48000.0, 60),
+                                                      ('TCS', 3900.0, 25)])}
+
+
+def test_max_pain_matches_the_broadcast_reference_per_group():
+    groups, arrays, starts = chain_arrays(_chains())
+    strikes, payouts = max_pain(arrays, starts)
+    ends = np.append(starts[1:], arrays['strike'].size)
+    assert len(groups) == 9
+    for g, (lo, hi) in enumerate(zip(starts, ends)):
+        strike, payout = max_pain_broadcast(arrays['strike'][lo:hi], arrays['ce_oi'][lo:hi], arrays['pe_oi'][lo:hi])
+        assert strikes[g] == strike
+        assert np.isclose(payouts[g], payout, rtol=1e-12)
+
+
+def test_pcr_is_nan_without_call_open_interest():
+    chain = synthetic_option_chain('NIFTY', n_strikes=20)['records']
+    first_expiry = chain['expiryDates'][0]
+    for row in chain['data']:
+        if row['expiryDate'] == first_expiry:
+            row.pop('CE', None)            # no calls listed at all
+        elif 'CE' in row:
+            row['CE']['openInterest'] = 0.0
+            row['CE']['totalTradedVolume'] = 0.0
+    _, arrays, starts = chain_arrays({'NIFTY': chain})
+    ratios = put_call_ratios(arrays, starts)
+    assert np.isnan(ratios['pcr_oi']).all()
+    assert np.isnan(ratios['pcr_volume']).all()
+    assert (ratios['pe_oi'] > 0).all()
+
+    summary, _ = chain_summary({'NIFTY': chain})
+    assert summary['pcr_oi'].isna().all()
@@ -0,0 +1,31 @@
+import numpy as np
+
+from drop_alert_backtest import frames_to_arrays, replay_with_store, rolling_52_week_high, simulate_alerts
+from synthetic_market_data import synthetic_ohlc_frames
+
+
+def alert_history():
+    frames = synthetic_ohlc_frames(n_symbols=20, n_bars=1500, interval='1d')
+    _, index, close, high = frames_to_arrays(frames)
+    return close, rolling_52_week_high(high, index)
+
+
+def test_each_sweep_pair_matches_its_single_parameter_replay():
+    close, high_52_week = alert_history()
+    initial_pcts, subsequent_pcts = [10, 40, 60, 20], [1, 1, 2, 5]
+    sweep = simulate_alerts(close, high_52_week, initial_pcts, subsequent_pcts)
+    for param, (initial_pct, subsequent_pct) in enumerate(zip(initial_pcts, subsequent_pcts)):
+        mine = sweep['param'] == param
+        swept = sorted(zip(sweep['symbol'][mine].tolist(), sweep['bar'][mine].tolist(),
+                           sweep['kind'][mine].tolist(), sweep['price'][mine].tolist()))
+        assert swept == sorted(replay_with_store(close, high_52_week, initial_pct, subsequent_pct))
+
+
+def test_sweep_column_does_not_depend_on_the_rest_of_the_grid():
+    close, high_52_week = alert_history()
+    alone = simulate_alerts(close, high_52_week, [10], [1])
+    for other in (40, 60):
+        sweep = simulate_alerts(close, high_52_week, [10, other], [1, 1])
+        mine = sweep['param'] == 0
+        np.testing.assert_array_equal(sweep['bar'][mine], alone['bar'])
+        np.testing.assert_array_equal(sweep['symbol'][mine], alone['symbol'])
@@ -0,0 +1,5 @@
+from extremes_index import parity_check
+
+
+def test_matches_pandas_rolling_extremes():
+    assert parity_check(n_symbols=20, n_bars=500, seed=1) == 0.0
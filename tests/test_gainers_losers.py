@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+import bar_aggregation
+import quote_snapshot
+from bar_aggregation import FIELDS
+from gainers_losers import IncrementalRanker, OpenLastFeed, change_percentage, top_bottom_indices
+
+INDEX = pd.date_range('2025-07-24 09:15', periods=10, freq='1min', tz='Asia/Kolkata')
+
+
+def final_panel(n_tickers=2):
+    # Minute j: open j + 1, high j + 2, low j, close j + 1.5, volume 100
+    base = np.arange(len(INDEX), dtype=float) + 1
+    rows = {'open': base, 'high': base + 1, 'low': base - 1, 'close': base + 0.5, 'volume': np.full(len(INDEX), 100.0)}
+    return {field: np.tile(rows[field], (n_tickers, 1)) for field in FIELDS}
+
+
+def test_forming_minute_is_refetched_not_folded(monkeypatch):
+    panel = final_panel()
+    calls = []
+
+    def fetch_minute_panel(tickers, since=None):
+        calls.append(since)
+        if since is None:
+            # First download at 09:19:30: minute 09:19 is still forming
+            sel = np.arange(5)
+            partial = {field: panel[field][:, sel].copy() for field in FIELDS}
+            partial['high'][:, -1] = partial['open'][:, -1]
+            partial['volume'][:, -1] = 10.0
+            partial['close'][:, -1] = partial['open'][:, -1]
+            return INDEX[sel], partial
+        sel = np.flatnonzero(INDEX > since)
+        return INDEX[sel], {field: panel[field][:, sel] for field in FIELDS}
+
+    monkeypatch.setattr(bar_aggregation, 'fetch_minute_panel', fetch_minute_panel)
+    monkeypatch.setattr(quote_snapshot, 'snapshot_available', lambda name=None: False)
+
+    feed = OpenLastFeed(['AAA.NS', 'BBB.NS'])
+    opens, lasts = feed.fetch()
+    np.testing.assert_array_equal(opens, [1.0, 1.0])
+    np.testing.assert_array_equal(lasts, [5.0, 5.0])   # forming 09:19 close so far
+
+    opens, lasts = feed.fetch()
+    assert calls == [None, INDEX[3]]   # re-requested from the last complete minute
+    np.testing.assert_array_equal(opens, [1.0, 1.0])
+    np.testing.assert_array_equal(lasts, [10.5, 10.5])
+
+    # Every complete minute was folded once, with its final values
+    day = feed.bars.current('1d')[1]
+    np.testing.assert_array_equal(day['volume'], [900.0, 900.0])
+    np.testing.assert_array_equal(day['high'], [10.0, 10.0])
+
+
+def full_order(change):
+    ranked = np.flatnonzero(np.isfinite(change))
+    return ranked[np.argsort(change[ranked], kind='stable')]
+
+
+def test_top_bottom_skips_missing_and_non_positive_opens():
+    open_prices = np.array([100.0, np.nan, 0.0, -5.0, 200.0, 50.0])
+    last_prices = np.array([110.0, 120.0, 10.0, 10.0, 190.0, np.nan])
+    change = change_percentage(open_prices, last_prices)
+    top, bottom = top_bottom_indices(change, 1)
+    assert list(top) == [0]
+    assert list(bottom) == [4]
+
+
+def test_top_bottom_with_n_at_least_the_finite_count():
+    values = np.array([3.0, np.nan, -1.0, np.inf, 2.0])
+    for n in (3, 4, 10):
+        top, bottom = top_bottom_indices(values, n)
+        assert list(top) == [0, 4, 2]
+        assert list(bottom) == [2, 4, 0]
+    top, bottom = top_bottom_indices(np.full(3, np.nan), 5)
+    assert top.size == bottom.size == 0
+
+
+def test_incremental_order_matches_a_full_sort():
+    rng = np.random.default_rng(7)
+    n = 200
+    tickers = [f'T{i}.NS' for i in range(n)]
+    open_prices = rng.uniform(50, 500, n)
+    last_prices = open_prices * rng.uniform(0.9, 1.1, n)
+    last_prices[:10] = np.nan                      # no trade yet at the first tick
+    ranker = IncrementalRanker(tickers, open_prices, last_prices)
+    np.testing.assert_array_equal(ranker.order, full_order(ranker.change))
+
+    for step in range(50):
+        last = np.where(rng.random(n) < 0.3, ranker.last_prices * rng.uniform(0.98, 1.02, n), np.nan)
+        opens = None
+        if step % 10 == 3:
+            # A bad open drops tickers out of the ranking; a corrected one brings them back
+            opens = np.full(n, np.nan)
+            opens[rng.choice(n, 5, replace=False)] = 0.0
+        elif step % 10 == 6:
+            opens = np.where(ranker.open_prices > 0, np.nan, rng.uniform(50, 500, n))
+        if step == 20:
+            last[:10] = rng.uniform(50, 500, 10)   # first trade of the late tickers
+        ranker.update(last, opens)
+        np.testing.assert_array_equal(ranker.order, full_order(ranker.change))
+
+    top, bottom = top_bottom_indices(ranker.change, 10)
+    gainers, losers = ranker.top(10)
+    assert list(gainers['symbol']) == [tickers[i].replace('.NS', '') for i in top]
+    assert list(losers['symbol']) == [tickers[i].replace('.NS', '') for i in bottom]
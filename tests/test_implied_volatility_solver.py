@@ -0,0 +1,37 @@
+import numpy as np
+
+from black_scholes_vectorized import black_scholes_batch
+from implied_volatility_solver import CONVERGED, OUT_OF_BRACKET, implied_volatility_batch, solve_chain, synthetic_chain
+
+
+def test_converged_iv_reprices_the_quote():
+    chain, _, _ = synthetic_chain(2_000, seed=1)
+    solved = solve_chain(chain, 2600.0, 0.065, 0.01)
+    ok = (solved['iv_status'] == 'converged').to_numpy()
+    assert ok.any()
+
+    model = black_scholes_batch(2600.0, chain['strike'].to_numpy()[ok], solved['T'].to_numpy()[ok], 0.065,
+                                solved['iv'].to_numpy()[ok], (chain['option_type'] == 'call').to_numpy()[ok],
+                                0.01)['price']
+    np.testing.assert_allclose(model, solved['price'].to_numpy()[ok], rtol=0, atol=1e-8)
+
+
+def test_root_above_the_bracket_is_not_converged():
+    # An ATM call at 95 needs a volatility above sigma_high = 5 (the price there is 92.39)
+    iv, status = implied_volatility_batch(95.0, 100.0, 100.0, 0.5, 0.05, True)
+    assert status == OUT_OF_BRACKET
+    assert np.isnan(iv)
+
+
+def test_worthless_quote_is_not_converged():
+    # Deep OTM quote below what any volatility in the bracket can tell apart
+    iv, status = implied_volatility_batch(1e-14, 2600.0, 3600.0, 7 / 365, 0.065, True)
+    assert status == OUT_OF_BRACKET
+    assert np.isnan(iv)
+
+
+def test_recovers_known_volatility():
+    price = black_scholes_batch(100.0, 110.0, 0.5, 0.05, 0.3, True)['price']
+    iv, status = implied_volatility_batch(price, 100.0, 110.0, 0.5, 0.05, True)
+    assert status == CONVERGED
+    assert abs(iv - 0.3) < 1e-8
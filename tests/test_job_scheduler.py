@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from job_scheduler import COALESCE, SKIP, InlineExecutor, Scheduler, VirtualClock
+
+START = 1_700_000_017.0   # 37 s past a minute boundary
+
+
+def run_for(scheduler, clock, seconds):
+    async def main():
+        runner = asyncio.ensure_future(scheduler.run())
+        await clock.advance(seconds)
+        scheduler.stop()
+        await runner
+    asyncio.run(main())
+
+
+def make_scheduler():
+    clock = VirtualClock(start=START)
+    return clock, Scheduler(clock, executor=InlineExecutor())
+
+
+def test_runs_are_aligned_to_wall_clock_boundaries():
+    clock, scheduler = make_scheduler()
+    starts = []
+    scheduler.every(60, lambda: starts.append(clock.time()), name='quotes')
+    scheduler.every(300, lambda: starts.append(clock.time()), name='offset', offset=5)
+    run_for(scheduler, clock, 30 * 60)
+
+    minute_runs = [t for t in starts if t % 60 == 0]
+    assert len(minute_runs) == 30
+    assert sorted(t % 300 for t in starts if t % 60 != 0) == [5.0] * 6
+    assert all(job.max_lag == 0 for job in scheduler.jobs)
+
+
+def test_run_immediately_then_aligned():
+    clock, scheduler = make_scheduler()
+    starts = []
+    scheduler.every(60, lambda: starts.append(clock.time()), run_immediately=True)
+    run_for(scheduler, clock, 150)
+    assert starts == [START, START + 23, START + 83, START + 143]
+
+
+def test_skip_drops_ticks_while_running():
+    clock, scheduler = make_scheduler()
+    starts = []
+
+    async def slow():
+        starts.append(clock.time())
+        await clock.sleep(150 if len(starts) == 1 else 10)   # the first run spans two boundaries
+
+    job = scheduler.every(60, slow, policy=SKIP)
+    run_for(scheduler, clock, 10 * 60)
+    assert job.skipped == 2
+    assert job.coalesced == 0
+    assert [t - starts[0] for t in starts[:2]] == [0, 180]   # next run on the next free boundary
+    assert job.max_lag == 0
+
+
+def test_coalesce_runs_once_for_all_missed_ticks_with_their_lag():
+    clock, scheduler = make_scheduler()
+    starts = []
+
+    async def slow():
+        starts.append(clock.time())
+        await clock.sleep(150 if len(starts) == 1 else 10)   # misses the next two boundaries
+
+    job = scheduler.every(60, slow, policy=COALESCE)
+    run_for(scheduler, clock, 10 * 60)
+    # The two missed ticks fold into one run right after the slow one, 90 s late
+    assert [t - starts[0] for t in starts[:3]] == [0, 150, 180]
+    assert job.coalesced == 1
+    assert job.skipped == 0
+    assert job.max_lag == pytest.approx(90.0)
+
+
+def test_failures_are_counted_and_do_not_stop_the_job():
+    clock, scheduler = make_scheduler()
+
+    def broken():
+        raise RuntimeError('feed down')
+
+    job = scheduler.every(60, broken)
+    run_for(scheduler, clock, 5 * 60)
+    assert job.runs == job.failures == 5
+
+
+def test_invalid_policy_is_rejected():
+    with pytest.raises(ValueError):
+        make_scheduler()[1].every(60, lambda: None, policy='queue')
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from black_scholes_vectorized import black_scholes_batch
+from lattice_pricer import BINOMIAL, TRINOMIAL, lattice_price_batch
+
+
+def european_chain(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    K = rng.uniform(70, 130, n)
+    T = rng.uniform(0.05, 2.0, n)
+    sigma = rng.uniform(0.1, 0.6, n)
+    is_call = rng.random(n) < 0.5
+    return 100.0, K, T, 0.05, sigma, is_call, 0.02
+
+
+@pytest.mark.parametrize('method', [BINOMIAL, TRINOMIAL])
+def test_european_lattice_converges_to_black_scholes(method):
+    args = european_chain()
+    exact = black_scholes_batch(*args)
+    errors = []
+    for steps in (50, 200, 800):
+        lattice = lattice_price_batch(*args, steps=steps, method=method, american=False, bump_greeks=False)
+        errors.append(np.abs(lattice['price'] - exact['price']).max())
+        np.testing.assert_allclose(lattice['delta'], exact['delta'], atol=0.02)
+    assert errors[-1] < 0.01
+    assert errors[-1] < errors[0]
+
+
+def test_american_put_is_worth_at_least_the_european():
+    strikes = np.arange(150, 251, 10, dtype=float)
+    american = lattice_price_batch(200.0, strikes, 0.5, 0.05, 0.3, False, q=0.005, bump_greeks=False)
+    european = black_scholes_batch(200.0, strikes, 0.5, 0.05, 0.3, False, q=0.005)
+    assert np.all(american['price'] >= european['price'] - 1e-9)
+
+
+@pytest.mark.parametrize('method', [BINOMIAL, TRINOMIAL])
+def test_invalid_branch_probabilities_raise(method):
+    # Drift per step far above volatility per step: the up probability would exceed 1
+    with pytest.raises(ValueError, match='branch probabilities'):
+        lattice_price_batch(100.0, 100.0, 1.0, 0.10, 0.01, True, 0.0, steps=10, method=method)
+    price = lattice_price_batch(100.0, 100.0, 1.0, 0.10, 0.01, True, 0.0, steps=200, method=method)['price']
+    assert abs(price - black_scholes_batch(100.0, 100.0, 1.0, 0.10, 0.01, True)['price']) < 1e-6
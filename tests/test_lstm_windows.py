@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from lstm_windows import (MultiSeriesWindows, batch_generator, make_tf_dataset, notebook_loop_windows,
+                          train_test_windows, training_length, window_views, write_scaled_series)
+
+
+def _series(n=500, seed=11):
+    rng = np.random.default_rng(seed)
+    return (100 + np.cumsum(rng.normal(0, 1, n))).astype(np.float32)
+
+
+def test_window_views_match_the_notebook_loop():
+    scaled = _series()
+    x, y = window_views(scaled, 60)
+    x_loop, y_loop = notebook_loop_windows(scaled.reshape(-1, 1), 60)
+    np.testing.assert_array_equal(x[..., np.newaxis], x_loop)
+    np.testing.assert_array_equal(y, y_loop)
+
+
+def test_train_test_split_matches_the_notebook(tmp_path):
+    prices = _series(1_000)
+    series, _, train_len = write_scaled_series(prices, str(tmp_path / 'series.npy'))
+    assert train_len == training_length(len(prices))
+    x_train, y_train, x_test, y_test = train_test_windows(series, train_len, 60)
+
+    dataset = np.asarray(series).reshape(-1, 1)
+    x_loop, y_loop = notebook_loop_windows(dataset[:train_len], 60)
+    np.testing.assert_array_equal(x_train[..., np.newaxis], x_loop)
+    np.testing.assert_array_equal(y_train, y_loop)
+    # The notebook's test set starts `window` rows before the split so its first input is full
+    x_loop, y_loop = notebook_loop_windows(dataset[train_len - 60:], 60)
+    np.testing.assert_array_equal(x_test[..., np.newaxis], x_loop)
+    np.testing.assert_array_equal(y_test, dataset[train_len:, 0])
+
+
+def test_batches_cover_every_sample_once_per_epoch():
+    x, y = window_views(_series(), 20)
+    seen = [yb for _, yb in batch_generator(x, y, batch_size=32, seed=0, epochs=2)]
+    first, second = np.concatenate(seen[:len(seen) // 2]), np.concatenate(seen[len(seen) // 2:])
+    np.testing.assert_array_equal(np.sort(first), np.sort(y))
+    np.testing.assert_array_equal(np.sort(second), np.sort(y))
+
+
+def test_multi_series_gather_matches_each_series():
+    a, b = _series(100, 1), _series(80, 2)
+    windows = MultiSeriesWindows([a, b], window=10)
+    xa, ya = window_views(a, 10)
+    xb, yb = window_views(b, 10)
+    x, y = windows.gather(np.array([0, len(ya) - 1, len(ya), len(windows) - 1]))
+    np.testing.assert_array_equal(x[..., 0], np.stack([xa[0], xa[-1], xb[0], xb[-1]]))
+    np.testing.assert_array_equal(y, [ya[0], ya[-1], yb[0], yb[-1]])
+
+
+def test_tf_dataset_reshuffles_every_epoch():
+    pytest.importorskip('tensorflow')
+    x, y = window_views(_series(), 20)
+    dataset = make_tf_dataset(x, y, batch_size=32, seed=0)
+    epochs = [np.concatenate([yb.numpy() for _, yb in dataset]) for _ in range(2)]
+    np.testing.assert_array_equal(np.sort(epochs[0]), np.sort(epochs[1]))
+    assert not np.array_equal(epochs[0], epochs[1])
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from macd_indicators import BEARISH, BULLISH, StreamingMACD, crossover_events, ema_batch, macd_batch
+
+
+def _closes(n_symbols=5, n_bars=300, seed=6):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n_symbols, n_bars)), axis=1))
+    close[1, :40] = np.nan                         # listed late
+    close[2, rng.random(n_bars) < 0.1] = np.nan    # interior gaps
+    close[3, 100:130] = np.nan                     # suspended for a month
+    return close
+
+
+def test_ema_batch_matches_pandas_ewm():
+    close = _closes()
+    for span in (9, 12, 26):
+        out = ema_batch(close, span)
+        for row, expected_row in zip(out, close):
+            # Gaps carry the previous EMA forward, which is ewm(ignore_na=True) then ffill
+            expected = pd.Series(expected_row).ewm(span=span, adjust=False, ignore_na=True).mean().ffill()
+            np.testing.assert_allclose(row, expected.to_numpy(), rtol=1e-12, atol=1e-12)
+
+
+def test_streaming_from_history_continues_the_batch():
+    close = _closes()
+    symbols = [f'S{i}' for i in range(close.shape[0])]
+    split = 150
+    engine = StreamingMACD.from_history(symbols, close[:, :split])
+    full = macd_batch(close)
+
+    streamed_events = []
+    for t in range(split, close.shape[1]):
+        streamed_events += [(symbol, t, direction) for symbol, direction in engine.update(close[:, t])]
+        np.testing.assert_allclose(engine.ema_fast, full['ema_fast'][:, t], rtol=1e-10)
+        np.testing.assert_allclose(engine.ema_slow, full['ema_slow'][:, t], rtol=1e-10)
+        np.testing.assert_allclose(engine.signal, full['signal'][:, t], rtol=1e-10, atol=1e-12)
+        np.testing.assert_allclose(engine.histogram, full['histogram'][:, t], rtol=1e-10, atol=1e-12)
+
+    events = crossover_events(full['histogram'], symbols, np.arange(close.shape[1]))
+    events = events[events['timestamp'] >= split]
+    expected = zip(events['symbol'], events['timestamp'], events['direction'])
+    assert sorted(streamed_events) == sorted((s, int(t), int(d)) for s, t, d in expected)
+    assert streamed_events
+
+
+def test_crossover_events_on_a_known_sign_flip():
+    histogram = np.array([
+        [-1.0, -0.5, 0.5, 1.0, -1.0],
+        [np.nan, 1.0, 0.0, -1.0, -2.0],   # a bar exactly on the signal line is not a crossover
+    ])
+    events = crossover_events(histogram, ['A', 'B'], pd.RangeIndex(5))
+    assert list(events['symbol']) == ['A', 'A']
+    assert list(events['timestamp']) == [2, 4]
+    assert list(events['direction']) == [BULLISH, BEARISH]
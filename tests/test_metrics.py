@@ -0,0 +1,74 @@
+import json
+import urllib.request
+
+import pytest
+
+from metrics import MetricsRegistry, MetricsServer
+
+
+def test_counter_render():
+    registry = MetricsRegistry()
+    counter = registry.counter('fetch_failures_total', 'Failed fetches', ['source', 'port'])
+    counter.inc(source='yf', port=8080)
+    counter.inc(2, source='yf', port='8080')   # same child as the int label value
+    counter.labels('nse', 1).inc(0.5)
+    assert registry.render_prometheus() == (
+        '# HELP fetch_failures_total Failed fetches\n'
+        '# TYPE fetch_failures_total counter\n'
+        'fetch_failures_total{source="nse",port="1"} 0.5\n'
+        'fetch_failures_total{source="yf",port="8080"} 3\n'
+    )
+
+
+def test_histogram_render():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('stage_seconds', 'Stage time', ['stage'], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, stage='fetch')
+    assert registry.render_prometheus().splitlines()[2:] == [
+        'stage_seconds_bucket{stage="fetch",le="0.1"} 2',
+        'stage_seconds_bucket{stage="fetch",le="1"} 3',
+        'stage_seconds_bucket{stage="fetch",le="+Inf"} 4',
+        'stage_seconds_sum{stage="fetch"} 2.65',
+        'stage_seconds_count{stage="fetch"} 4',
+    ]
+
+
+def test_non_finite_values_render_as_prometheus_literals():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('lag_seconds', 'Lag', buckets=(1.0,))
+    histogram.observe(float('inf'))
+    counter = registry.counter('weird_total', 'Weird')
+    counter.inc(float('nan'))
+    lines = registry.render_prometheus().splitlines()
+    assert 'lag_seconds_sum +Inf' in lines
+    assert 'weird_total NaN' in lines
+    histogram.observe(float('-inf'))
+    assert 'lag_seconds_sum NaN' in registry.render_prometheus().splitlines()
+
+
+def test_label_validation():
+    registry = MetricsRegistry()
+    counter = registry.counter('jobs_total', 'Jobs', ['job', 'policy'])
+    with pytest.raises(ValueError):
+        counter.inc(job='a')
+    with pytest.raises(ValueError):
+        counter.inc(job='a', policy='skip', extra='x')
+    with pytest.raises(ValueError):
+        counter.labels('a')
+    assert counter.labels('a', 'skip') is counter.labels(policy='skip', job='a')
+
+
+def test_server_round_trip():
+    registry = MetricsRegistry()
+    registry.counter('cycles_total', 'Cycles', ['loop']).inc(3, loop='informer')
+    registry.histogram('cycle_seconds', 'Cycle time', ['loop'], buckets=(1.0, 10.0)).observe(2.0, loop='informer')
+    with MetricsServer(registry, port=0) as server:
+        text = urllib.request.urlopen(server.url + '/metrics').read().decode()
+        data = json.loads(urllib.request.urlopen(server.url + '/metrics.json').read())
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(server.url + '/missing')
+    assert text == registry.render_prometheus()
+    assert data['cycles_total']['samples'] == [{'labels': {'loop': 'informer'}, 'value': 3.0}]
+    sample = data['cycle_seconds']['samples'][0]
+    assert (sample['count'], sample['sum'], sample['p50']) == (1, 2.0, 10.0)
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from nse_option_chain_fetcher import LocalNSEServer, NSEOptionChainFetcher, records_to_frame, synthetic_option_chain
+
+API = '/api/option-chain-indices'
+
+
+def test_null_and_placeholder_values_become_nan():
+    records = synthetic_option_chain('NIFTY', n_strikes=4)['records']
+    row = records['data'][0]
+    row['CE']['openInterest'] = None
+    row['CE']['impliedVolatility'] = '-'
+    del row['CE']['lastPrice']
+    frame = records_to_frame(records)
+    assert np.isnan(frame.loc[0, 'CE_openInterest'])
+    assert np.isnan(frame.loc[0, 'CE_impliedVolatility'])
+    assert np.isnan(frame.loc[0, 'CE_lastPrice'])
+    assert frame.loc[0, 'CE_change'] == row['CE']['change']
+
+
+def test_rejected_cookies_are_refreshed():
+    with LocalNSEServer() as server:
+        fetcher = NSEOptionChainFetcher(base_url=server.url, retries=2)
+        first = fetcher.fetch('NIFTY')
+        server.expire_cookies()
+        assert fetcher.fetch('NIFTY') == first
+        # The stale cookie is answered 401, which primes the homepage again before one retry
+        assert server.requests == ['/', API, API, '/', API]
+        fetcher.close()
+
+
+@pytest.mark.parametrize('status', [403, 503])
+def test_transient_errors_are_retried(status):
+    with LocalNSEServer() as server:
+        fetcher = NSEOptionChainFetcher(base_url=server.url, retries=2)
+        server.fail_next(1, status)
+        assert fetcher.fetch('NIFTY')['data']
+        assert server.requests.count(API) == 2
+        fetcher.close()
+
+
+def test_gives_up_after_the_configured_retries():
+    with LocalNSEServer(cookie_ttl=-1) as server:
+        fetcher = NSEOptionChainFetcher(base_url=server.url, retries=2)
+        with pytest.raises(RuntimeError):
+            fetcher.fetch('NIFTY')
+        assert server.requests.count(API) == 3
+        assert fetcher.fetch_many(['NIFTY']) == {}
+        fetcher.close()
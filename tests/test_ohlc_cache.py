@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+import ohlc_cache
+from ohlc_cache import FakeDownloader, OHLCCache
+
+
+def test_failed_download_is_retried(tmp_path):
+    def failing(symbol, interval, start, end):
+        raise RuntimeError('rate limited')
+
+    cache = OHLCCache(str(tmp_path), downloader=failing)
+    with pytest.raises(RuntimeError):
+        cache.read('AAA.NS', '1d', '2024-01-01', '2024-02-01')
+    cache.downloader = FakeDownloader()
+    frame = cache.read('AAA.NS', '1d', '2024-01-01', '2024-02-01')
+    assert len(frame) > 0
+    assert cache.downloader.calls == [('AAA.NS', '1d', '2024-01-01', '2024-02-01')]
+
+
+def test_covered_range_is_not_downloaded_again(tmp_path):
+    cache = OHLCCache(str(tmp_path), downloader=FakeDownloader())
+    first = cache.read('AAA.NS', '1d', '2024-01-01', '2024-02-01')
+    second = cache.read('AAA.NS', '1d', '2024-01-08', '2024-01-20')
+    assert len(cache.downloader.calls) == 1
+    pd.testing.assert_frame_equal(second, first.loc['2024-01-08':'2024-01-19'])
+
+
+def test_empty_past_range_is_covered(tmp_path):
+    # A weekend returns no bars, which is an answer rather than a failure
+    downloader = FakeDownloader()
+    cache = OHLCCache(str(tmp_path), downloader=downloader)
+    assert cache.read('AAA.NS', '1d', '2024-01-06', '2024-01-08').empty
+    assert cache.read('AAA.NS', '1d', '2024-01-06', '2024-01-08').empty
+    assert len(downloader.calls) == 1
+
+
+def test_reads_do_not_rewrite_the_manifest_every_time(tmp_path, monkeypatch):
+    cache = OHLCCache(str(tmp_path), downloader=FakeDownloader())
+    cache.read('AAA.NS', '1d', '2024-01-01', '2024-02-01')
+    saves = []
+    monkeypatch.setattr(cache, '_save_manifest', lambda: saves.append(1))
+    for _ in range(20):
+        cache.read('AAA.NS', '1d', '2024-01-01', '2024-02-01')
+    assert saves == []
+
+    monkeypatch.setattr(ohlc_cache, 'MANIFEST_TOUCH_INTERVAL_SECONDS', 0)
+    cache.read('AAA.NS', '1d', '2024-01-01', '2024-02-01')
+    assert saves == [1]
@@ -0,0 +1,31 @@
+import numpy as np
+
+from nse_option_chain_fetcher import records_to_frame, synthetic_option_chain
+from option_chain_store import OptionChainStore
+
+DAY = '2025-07-24'
+
+
+def chain(n_strikes, seed=0):
+    return records_to_frame(synthetic_option_chain('NIFTY', n_strikes=n_strikes, seed=seed)['records'])
+
+
+def test_reader_sees_contracts_registered_after_it_opened(tmp_path):
+    writer = OptionChainStore(str(tmp_path))
+    reader = OptionChainStore(str(tmp_path))
+    writer.record('NIFTY', chain(10), when=f'{DAY} 09:15')
+    before = len(reader.state_at('NIFTY', '15:30', day=DAY))   # loads the reader's contract list
+
+    # Two more strikes per expiry, registered by the writer only
+    wider = chain(12, seed=1)
+    writer.record('NIFTY', wider, when=f'{DAY} 09:16')
+    state = reader.state_at('NIFTY', '15:30', day=DAY)
+    assert len(state) == len(writer.state_at('NIFTY', '15:30', day=DAY)) > before
+
+    new_strike = wider['strikePrice'].max()
+    expiry = wider['expiryDate'].iloc[0]
+    side = 'CE' if wider.loc[wider['strikePrice'] == new_strike, 'CE_present'].iloc[0] else 'PE'
+    history = reader.history('NIFTY', expiry, new_strike, side, day=DAY)
+    assert np.isnan(history.iloc[0])
+    assert history.iloc[1] == writer.history('NIFTY', expiry, new_strike, side, day=DAY).iloc[1]
+    assert not np.isnan(history.iloc[1])
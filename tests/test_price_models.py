@@ -0,0 +1,79 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+import market_cli
+import price_models
+from price_models import (DEFAULT_PARAMS, THREAD_ENV_VARS, InferenceService, ModelCache, _thread_env, keras_trainer,
+                          lstm_forward, train_many, untrained_trainer)
+from synthetic_market_data import synthetic_price_paths
+
+
+def _worker_thread_env():
+    return {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+
+
+def test_workers_start_with_the_thread_limits():
+    # The limits must be in the environment when the worker starts, before it imports NumPy
+    with _thread_env(2), ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        env = pool.submit(_worker_thread_env).result()
+    assert env == {name: '2' for name in THREAD_ENV_VARS}
+
+
+def test_thread_env_is_restored():
+    before = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+    with _thread_env(3):
+        pass
+    assert {name: os.environ.get(name) for name in THREAD_ENV_VARS} == before
+
+
+def test_empty_universe_report_has_columns(tmp_path):
+    report = train_many({}, cache=ModelCache(str(tmp_path)))
+    assert report.empty
+    assert list(report.columns) == ['ticker', 'status', 'rmse', 'next_close', 'seconds', 'key']
+
+
+def test_train_command_fails_cleanly_without_closes(monkeypatch, tmp_path):
+    monkeypatch.setattr(price_models, 'load_closes', lambda tickers, start, end: {})
+    assert market_cli.main(['train', '--tickers', 'AAA.NS', '--model-dir', str(tmp_path)]) == 1
+
+
+def test_predict_gives_nan_for_tickers_missing_from_closes(tmp_path):
+    _, paths = synthetic_price_paths(2, 400)
+    closes = {'AAA.NS': paths[:, 0], 'BBB.NS': paths[:, 1]}
+    cache = ModelCache(str(tmp_path))
+    report = train_many(closes, cache=cache, max_workers=1, trainer=untrained_trainer)
+    assert (report['status'] == 'trained').all()
+
+    service = InferenceService(list(closes), cache=cache)
+    predictions = service.predict({'AAA.NS': closes['AAA.NS']})
+    assert np.isfinite(predictions['AAA.NS'])
+    assert np.isnan(predictions['BBB.NS'])
+
+
+def test_cache_key_depends_on_the_trainer(tmp_path):
+    _, paths = synthetic_price_paths(1, 400)
+    closes = {'AAA.NS': paths[:, 0]}
+    cache = ModelCache(str(tmp_path))
+    report = train_many(closes, cache=cache, max_workers=1, trainer=untrained_trainer)
+    assert report['key'][0] == cache.key('AAA.NS', closes['AAA.NS'], DEFAULT_PARAMS, untrained_trainer)
+    # Untrained weights must not be served to a run that asks for trained ones
+    assert not cache.contains('AAA.NS', cache.key('AAA.NS', closes['AAA.NS'], DEFAULT_PARAMS, keras_trainer))
+
+
+def test_forward_pass_matches_keras_predict():
+    pytest.importorskip('tensorflow')
+    from price_predictor import build_model
+
+    window, units = 12, 8
+    model = build_model(window, units)
+    rng = np.random.default_rng(0)
+    model.set_weights([w + rng.normal(0, 0.1, w.shape).astype(np.float32) for w in model.get_weights()])
+    windows = rng.uniform(0, 1, (16, window)).astype(np.float32)
+
+    expected = model.predict(windows[..., np.newaxis], verbose=0).reshape(-1)
+    stacked = [w[np.newaxis] for w in model.get_weights()]
+    np.testing.assert_allclose(lstm_forward(stacked, windows[np.newaxis])[0], expected, rtol=1e-4, atol=1e-5)
@@ -0,0 +1,39 @@
+import time
+import uuid
+
+import numpy as np
+import pytest
+
+from quote_snapshot import SnapshotQuoteSource, SnapshotWriter, read_quote
+from quote_sources import CURRENT_PRICE
+
+
+@pytest.fixture
+def writer():
+    writer = SnapshotWriter(['AAA.NS', 'BBB.NS'], name=f'test_snapshot_{uuid.uuid4().hex[:12]}')
+    yield writer
+    writer.close()
+
+
+def test_failed_fetch_does_not_refresh_the_timestamp(writer):
+    writer.publish([0, 1], last=[10.0, 20.0], open=[9.0, 19.0])
+    time.sleep(0.05)
+    # BBB's fetch failed: NaN everywhere keeps its old price, and must keep its old timestamp
+    writer.publish([0, 1], last=[11.0, np.nan], open=[9.0, np.nan])
+
+    assert read_quote('AAA.NS', name=writer.name, max_age=0.04)['last'] == 11.0
+    assert read_quote('BBB.NS', name=writer.name, max_age=0.04) is None
+    assert read_quote('BBB.NS', name=writer.name)['last'] == 20.0
+
+    source = SnapshotQuoteSource(name=writer.name, max_age=0.04)
+    assert set(source.fetch_batch(['AAA.NS', 'BBB.NS'], (CURRENT_PRICE,))) == {'AAA.NS'}
+    source.reader.close()
+
+
+def test_slow_fields_alone_do_not_refresh_a_stale_price(writer):
+    writer.publish([0, 1], last=[10.0, 20.0])
+    stamped = read_quote('BBB.NS', name=writer.name)['timestamp']
+    time.sleep(0.01)
+    writer.publish([0, 1], last=[10.5, np.nan], high_52_week=[12.0, 25.0])
+    assert read_quote('BBB.NS', name=writer.name)['timestamp'] == stamped
+    assert read_quote('BBB.NS', name=writer.name)['high_52_week'] == 25.0
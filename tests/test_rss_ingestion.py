@@ -0,0 +1,54 @@
+import time
+import urllib.request
+
+import pytest
+
+pytest.importorskip('feedparser')
+
+from rss_ingestion import LocalFeedServer, RSSIngestor, SeenIndex, synthetic_rss
+
+
+def titles(items):
+    return [item.title for item in items]
+
+
+def test_entries_over_the_cap_are_emitted_later(tmp_path):
+    with LocalFeedServer() as server:
+        feeds = {'BBC': server.set_feed('BBC', synthetic_rss('BBC', n_items=12))}
+        ingestor = RSSIngestor(feeds, state_dir=str(tmp_path), max_items_per_feed=5)
+        polls = [titles(ingestor.poll()) for _ in range(4)]
+        ingestor.close()
+
+    assert [len(p) for p in polls] == [5, 5, 2, 0]
+    assert len(set(sum(polls, []))) == 12
+
+
+def test_poll_prunes_the_seen_index(tmp_path):
+    with LocalFeedServer() as server:
+        feeds = {'BBC': server.set_feed('BBC', synthetic_rss('BBC', n_items=3))}
+        ingestor = RSSIngestor(feeds, state_dir=str(tmp_path))
+        ingestor.seen.retention_seconds = 0
+        assert len(ingestor.poll()) == 3
+        time.sleep(0.01)
+        server.set_feed('BBC', synthetic_rss('BBC', n_items=3))  # same entries, new ETag
+        # The keys from the first poll have expired, so the entries count as new again
+        assert len(ingestor.poll()) == 3
+        ingestor.close()
+
+
+def test_seen_index_limit_records_only_returned_keys(tmp_path):
+    seen = SeenIndex(str(tmp_path / 'seen.sqlite'))
+    assert seen.add_new(['a', 'b', 'c'], limit=2) == {'a', 'b'}
+    assert seen.add_new(['a', 'b', 'c']) == {'c'}
+    seen.close()
+
+
+def test_feed_server_honours_if_modified_since():
+    with LocalFeedServer() as server:
+        url = server.set_feed('BBC', synthetic_rss('BBC', n_items=1))
+        with urllib.request.urlopen(url) as response:
+            last_modified = response.headers['Last-Modified']
+        request = urllib.request.Request(url, headers={'If-Modified-Since': last_modified})
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(request)
+        assert excinfo.value.code == 304
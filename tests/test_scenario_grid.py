@@ -0,0 +1,26 @@
+import numpy as np
+
+from scenario_grid import GREEKS, ScenarioGrid, scenario_report, synthetic_book
+
+GRID = ScenarioGrid([-0.1, -0.05, 0.0, 0.05, 0.1], [-0.05, 0.0, 0.05], [0, 1, 5])
+
+
+def _assert_reports_equal(actual, expected):
+    assert actual['underlyings'] == expected['underlyings']
+    for name in ['value', 'pnl'] + GREEKS:
+        np.testing.assert_allclose(actual[name], expected[name], rtol=1e-10, atol=1e-6)
+
+
+def test_chunked_and_pooled_reports_match_a_single_chunk():
+    book = synthetic_book(300, seed=3)
+    single = scenario_report(book, GRID, max_cells=10**9)
+    # 45 scenarios per position, so 1_000 cells is 22 positions per chunk
+    _assert_reports_equal(scenario_report(book, GRID, max_cells=1_000), single)
+    _assert_reports_equal(scenario_report(book, GRID, max_cells=1_000, processes=2), single)
+
+
+def test_zero_shock_pnl_is_zero():
+    report = scenario_report(synthetic_book(200, seed=4), GRID)
+    i, j, k = (int(np.flatnonzero(axis == 0)[0]) for axis in (GRID.spot_shocks, GRID.vol_shifts, GRID.days_forward))
+    np.testing.assert_array_equal(report['pnl'][:, i, j, k], 0.0)
+    assert np.abs(report['pnl']).max() > 0
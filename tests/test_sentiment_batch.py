@@ -0,0 +1,41 @@
+import itertools
+
+import pytest
+
+import sentiment_batch
+from sentiment_batch import BatchSentimentScorer, SentimentCache, headline_key, normalize_headline
+
+
+def test_scores_match_textblob_on_the_original_headline():
+    textblob = pytest.importorskip('textblob')
+    headlines = [
+        'Profit rises on strong quarter',
+        '  Profit  rises on\tstrong quarter\n',
+        'Ｐｒｏｆｉｔ ｒｉｓｅｓ on ｓｔｒｏｎｇ quarter',   # full-width letters are not folded into the ASCII key
+        'Café chain posts weak outlook',
+        'Café  chain posts   weak outlook',
+        '',
+    ]
+    scorer = BatchSentimentScorer(cache=SentimentCache(':memory:'), processes=1)
+    expected = [textblob.TextBlob(headline).sentiment.polarity for headline in headlines]
+    assert scorer.score(headlines) == expected
+    assert scorer.score(headlines) == expected
+    assert len(scorer.cache) == 4
+
+
+def test_whitespace_variants_share_a_key():
+    assert headline_key(normalize_headline(' A  b\nc ')) == headline_key(normalize_headline('A b c'))
+    assert normalize_headline('Ｐｒｏｆｉｔ') == 'Ｐｒｏｆｉｔ'
+
+
+def test_cache_evicts_the_least_recently_used(monkeypatch):
+    clock = itertools.count()
+    monkeypatch.setattr(sentiment_batch.time, 'time', lambda: float(next(clock)))
+    cache = SentimentCache(':memory:', max_entries=3)
+    cache.put_many({'a': 0.1, 'b': 0.2})
+    cache.put_many({'c': 0.3})
+    assert cache.get_many(['a']) == {'a': 0.1}   # 'a' is now more recent than 'b'
+    cache.put_many({'d': 0.4})
+    assert len(cache) == 3
+    assert cache.get_many(['a', 'b', 'c', 'd']) == {'a': 0.1, 'c': 0.3, 'd': 0.4}
+    cache.close()
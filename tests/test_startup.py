@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+from market_cli import heavy_modules_loaded
+from ohlc_cache import FakeDownloader, OHLCCache
+from script_loader import load_script
+
+
+def test_importing_the_cli_loads_no_heavy_modules():
+    assert heavy_modules_loaded() == []
+
+
+def test_ohlc_script_imports_without_side_effects(tmp_path, monkeypatch):
+    module = load_script('ohlc_macd')
+    assert module.ohlc_cache is None   # no cache created and nothing downloaded on import
+
+    monkeypatch.setattr(module, 'ohlc_cache', OHLCCache(str(tmp_path), downloader=FakeDownloader()))
+    frame = module.OHLCHistory('RELIANCE.NS', '1d', '2023-01-01', '2023-02-01')
+    assert list(frame.columns) == ['open', 'high', 'low', 'close', 'volume']
+    assert len(frame) > 0
+
+
+def test_calculator_script_imports_no_helper_modules():
+    code = ("import sys; from script_loader import load_script; load_script('black_scholes_calculator'); "
+            "print(','.join(m for m in ('lattice_pricer', 'quote_snapshot', 'pandas') if m in sys.modules))")
+    out = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    assert out == ''
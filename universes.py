@@ -0,0 +1,75 @@
+# Ticker universes of the scripts, in one place so the snapshot daemon can poll their
+# union and every script can look up the same lists.
+
+# F&O stocks ranked by the Top Gainers & Losers notebook (Yahoo Finance tickers)
+FO_STOCKS = [
+    # Adani Group
+    "ADANIENT.NS", "ADANIPORTS.NS", "ADANIGREEN.NS", "ADANIENSOL.NS", "ATGL.NS", "ADANIPOWER.NS",
+
+    # Banking & Finance
+    "AUBANK.NS", "AXISBANK.NS", "BANDHANBNK.NS", "BANKBARODA.NS", "BANKINDIA.NS",
+    "CANBK.NS", "CHOLAFIN.NS", "FEDERALBNK.NS", "HDFCBANK.NS", "ICICIBANK.NS",
+    "IDFCFIRSTB.NS", "INDIANB.NS", "INDUSINDBK.NS", "KOTAKBANK.NS", "L&TFH.NS",
+    "PERSISTENT.NS", "PNB.NS", "POONAWALLA.NS", "SBIN.NS", "SHRIRAMFIN.NS",
+    "UBL.NS", "UNIONBANK.NS", "YESBANK.NS",
+
+    # Consumer Goods & Services
+    "APOLLOTYRE.NS", "ASHOKLEY.NS", "BAJAJ-AUTO.NS", "BATAINDIA.NS", "BERGEPAINT.NS",
+    "BRITANNIA.NS", "DMART.NS", "EIHOTEL.NS", "GODREJCP.NS", "HAVELLS.NS",
+    "HINDUNILVR.NS", "JUBLFOOD.NS", "MARICO.NS", "UNITDSPR.NS", "NESTLEIND.NS",
+    "PIDILITIND.NS", "TITAN.NS", "TATACONSUM.NS", "VEDL.NS",
+
+    # Technology & IT
+    "ANGELONE.NS", "COFORGE.NS", "CAMS.NS", "CYIENT.NS", "DELHIVERY.NS",
+    "HCLTECH.NS", "INFY.NS", "JIOFIN.NS", "KPITTECH.NS", "LTIM.NS", "LTTS.NS",
+   "NAUKRI.NS", "PAYTM.NS", "POLICYBZR.NS", "TATAELXSI.NS",
+    "TATASTEEL.NS", "TECHM.NS", "WIPRO.NS", "ETERNAL.NS",
+
+    # Infrastructure & Construction
+    "APLAPOLLO.NS", "ACE.NS", "BLUEDART.NS", "CUB.NS", "DLF.NS", "GRANULES.NS",
+    "IRB.NS", "NCC.NS", "NHPC.NS", "PRESTIGE.NS", "RELIANCE.NS",
+    "POWERGRID.NS", "PFC.NS",
+
+    # Manufacturing & Industrials
+    "ABB.NS", "AMBUJACEM.NS", "BALKRISIND.NS", "BALRAMCHIN.NS", "BHEL.NS",
+    "BOSCHLTD.NS", "CGPOWER.NS", "CESC.NS", "EICHERMOT.NS", "ESCORTS.NS",
+    "HAL.NS", "HFCL.NS", "HEROMOTOCO.NS", "HINDALCO.NS", "HINDCOPPER.NS",
+    "ITC.NS", "JSL.NS", "JSWENERGY.NS", "JSWSTEEL.NS", "KEI.NS", "LT.NS",
+    "M&M.NS", "SAIL.NS", "SUPREMEIND.NS", "TATACHEM.NS", "TATAMOTORS.NS",
+    "TIINDIA.NS", "TVSMOTOR.NS", "ULTRACEMCO.NS", "ZEEL.NS",
+
+    # Healthcare & Pharma
+    "ABBOTINDIA.NS", "ALKEM.NS", "APOLLOHOSP.NS", "BIOCON.NS", "CIPLA.NS",
+    "DIVISLAB.NS", "DRREDDY.NS", "IPCALAB.NS", "LUPIN.NS", "MAXHEALTH.NS",
+    "SUNPHARMA.NS", "TORNTPHARM.NS",
+
+    # Other Sectors
+    "BSE.NS", "CDSL.NS", "COALINDIA.NS", "GAIL.NS", "HINDZINC.NS", "IRFC.NS",
+    "LICI.NS", "MGL.NS", "MSUMI.NS", "NMDC.NS", "ONGC.NS", "PETRONET.NS",
+    "PNBHOUSING.NS", "RECLTD.NS", "SJVN.NS", "SONACOMS.NS", "TATAPOWER.NS",
+    "HUDCO.NS", "NYKAA.NS", "OIL.NS", "IEX.NS", "IRCTC.NS",
+    "DLF.NS", "LODHA.NS", "LICHSGFIN.NS"
+]
+
+
+def informer_tickers():
+    """Yahoo Finance tickers watched by 20%_down_price_informer.py."""
+    from script_loader import load_script
+
+    return list(load_script('price_informer').NSE_STOCKS.values())
+
+
+# Named universes for the snapshot daemon's --universe option
+UNIVERSES = {
+    'fo': lambda: list(FO_STOCKS),
+    'informer': informer_tickers,
+}
+
+
+def union_of(names, extra=()):
+    """Tickers of the named universes plus `extra`, de-duplicated in first-seen order."""
+    tickers = []
+    for name in names:
+        tickers.extend(UNIVERSES[name]())
+    tickers.extend(extra)
+    return list(dict.fromkeys(tickers))